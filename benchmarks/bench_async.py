@@ -0,0 +1,48 @@
+"""
+Wall time of N independent project fetches, sequential APIClient versus concurrent AsyncAPIClient.
+
+Run from the project root:
+    python -m benchmarks.bench_async --projects 10 --latency 0.1
+"""
+
+import argparse
+import os
+import asyncio
+import time
+
+from benchmarks.fake_api import FakeDida365
+from server.client import APIClient, AsyncAPIClient
+
+
+async def _fetch_all(client: AsyncAPIClient, project_ids: list[str]) -> None:
+    await asyncio.gather(*(client.get_project_details(p) for p in project_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+    # Measure the transport, not the client-side rate limit
+    os.environ["TICKTICK_RATE_LIMIT"] = "off"
+
+    with FakeDida365(projects=args.projects, latency=args.latency) as fake:
+        project_ids = list(fake.projects)
+
+        with APIClient(token="bench", base_url=fake.base_url) as client:
+            start = time.perf_counter()
+            for project_id in project_ids:
+                client.get_project_details(project_id)
+            print(f"sync  {time.perf_counter() - start:6.3f} s")
+
+        async def run_async():
+            async with AsyncAPIClient(token="bench", base_url=fake.base_url) as client:
+                start = time.perf_counter()
+                await _fetch_all(client, project_ids)
+                print(f"async {time.perf_counter() - start:6.3f} s")
+
+        asyncio.run(run_async())
+
+
+if __name__ == "__main__":
+    main()
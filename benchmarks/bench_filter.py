@@ -0,0 +1,134 @@
+"""
+Micro-benchmark of utils.filter over synthetic tasks, against the previous per-task implementation
+and with candidates taken from utils.index.TaskIndex.
+
+Run from the project root:
+    python -m benchmarks.bench_filter --tasks 10000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from utils.filter import compile_filter, filter_task
+from utils.index import TaskIndex
+
+FILTERS = [
+    ["dueDate <= tomorrow"],
+    ["dueDate <= tomorrow", "startDate <= today", "priority >= medium"],
+    ["priority == high", "status == 0"],
+]
+
+
+def legacy_filter_task(tasks, filter_fields):
+    """
+    The filter as it was before compilation: every predicate resolves its date
+    keyword, parses the task date and lowercases the field name on each call.
+    """
+    ops = {
+        "==": lambda a, b: a == b,
+        "!=": lambda a, b: a != b,
+        ">": lambda a, b: a > b,
+        "<": lambda a, b: a < b,
+        ">=": lambda a, b: a >= b,
+        "<=": lambda a, b: a <= b,
+    }
+    priority_map = {"none": 0, "low": 1, "medium": 3, "high": 5}
+
+    def resolve(kw):
+        today = datetime.now().date()
+        if kw.lower() == "yesterday":
+            return today - timedelta(days=1)
+        if kw.lower() == "today":
+            return today
+        if kw.lower() == "tomorrow":
+            return today + timedelta(days=1)
+        return datetime.strptime(kw, "%Y-%m-%d").date()
+
+    def build(expr):
+        field, op, raw_val = expr.split(maxsplit=2)
+        cmp_fn = ops[op]
+
+        def predicate(task):
+            if field not in task:
+                return False
+            val = task[field]
+            if "date" in field.lower():
+                try:
+                    actual = datetime.strptime(val, "%Y-%m-%dT%H:%M:%S.%f%z").date()
+                except Exception:
+                    return False
+                return cmp_fn(actual, resolve(raw_val))
+            if field.lower() == "priority":
+                expected = priority_map.get(raw_val.lower(), None)
+                if expected is None:
+                    expected = int(raw_val)
+                return cmp_fn(int(val), expected)
+            if isinstance(val, (int, float)):
+                return cmp_fn(val, type(val)(raw_val))
+            return cmp_fn(str(val), raw_val)
+
+        return predicate
+
+    preds = [build(expr) for expr in filter_fields]
+    return [task for task in tasks if all(pred(task) for pred in preds)]
+
+
+def synthetic_tasks(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    today = datetime.now().replace(hour=16, minute=0, second=0, microsecond=0)
+    tasks = []
+    for i in range(n):
+        task = {
+            "id": f"{i:024x}",
+            "projectId": f"project{i % 30:08d}",
+            "title": f"Task {i}",
+            "priority": rng.choice((0, 1, 3, 5)),
+            "status": rng.choice((0, 0, 0, 2)),
+        }
+        for field in ("dueDate", "startDate"):
+            if rng.random() < 0.8:
+                day = today + timedelta(days=rng.randint(-30, 30))
+                task[field] = day.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        tasks.append(task)
+    return tasks
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tasks = synthetic_tasks(args.tasks)
+    index = TaskIndex()
+    index.load_project("bench", [dict(t, projectId="bench") for t in tasks])
+    for filter_fields in FILTERS:
+        assert filter_task(tasks, filter_fields) == legacy_filter_task(
+            tasks, filter_fields
+        )
+        legacy = _best_of(
+            lambda f=filter_fields: legacy_filter_task(tasks, f), args.repeat
+        )
+        compiled = _best_of(lambda f=filter_fields: filter_task(tasks, f), args.repeat)
+        indexed = _best_of(
+            lambda f=filter_fields: index.select(compile_filter(f)), args.repeat
+        )
+        print(
+            f"{' & '.join(filter_fields):<60} legacy {legacy * 1000:8.2f} ms  "
+            f"compiled {compiled * 1000:7.2f} ms  indexed {indexed * 1000:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-call latency of one-shot `httpx.request` calls versus the pooled session in `APIClient`.
+
+Run from the project root:
+    python -m benchmarks.bench_session --calls 200 --connect-latency 0.02
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fake_api import FakeDida365
+from server.client import APIClient
+
+
+def _report(name: str, samples: list[float], connections: int) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{name:<12} mean {statistics.mean(samples) * 1000:7.2f} ms  "
+        f"p50 {statistics.median(samples) * 1000:7.2f} ms  "
+        f"p95 {p95 * 1000:7.2f} ms  connections {connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument(
+        "--connect-latency",
+        type=float,
+        default=0.02,
+        help="seconds added to every new connection, stands in for the TLS handshake",
+    )
+    args = parser.parse_args()
+    # Measure the transport, not the client-side rate limit
+    os.environ["TICKTICK_RATE_LIMIT"] = "off"
+
+    with FakeDida365(connect_latency=args.connect_latency) as fake:
+        url = f"{fake.base_url}/open/v1/project"
+        headers = {"Authorization": "Bearer bench", "User-Agent": "MCP-Dida365/1.0"}
+
+        samples = []
+        before = fake.connections
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            httpx.request("GET", url, headers=headers).raise_for_status()
+            samples.append(time.perf_counter() - start)
+        _report("one-shot", samples, fake.connections - before)
+
+        samples = []
+        before = fake.connections
+        with APIClient(token="bench", base_url=fake.base_url) as client:
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                client._make_request("GET", "/project")
+                samples.append(time.perf_counter() - start)
+        _report("pooled", samples, fake.connections - before)
+
+
+if __name__ == "__main__":
+    main()
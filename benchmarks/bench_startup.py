@@ -0,0 +1,93 @@
+"""
+Server startup cost: import time of the MCP module, and time until a host gets its first
+`initialize` and `list_tools` answers over stdio.
+
+The modules only needed once a tool runs (API client, OAuth flow) are timed separately:
+they are imported on the first tool call, not at startup.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_times(statement: str) -> dict[str, float]:
+    """
+    Cumulative -X importtime, in ms, of each top-level import of `statement`,
+    in the order they run: a later entry only counts modules not imported before.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # "import time: self [us] | cumulative | imported package", nested imports are indented
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            if not parts[2].startswith("  "):
+                times[parts[2].strip()] = int(parts[1]) / 1000
+    return times
+
+
+async def _first_list_tools() -> tuple[float, float, int]:
+    params = StdioServerParameters(command=sys.executable, args=["main.py"], cwd=ROOT)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter() - start
+                tools = await session.list_tools()
+                listed = time.perf_counter() - start
+    return initialized, listed, len(tools.tools)
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<28} median {statistics.median(samples):8.1f} ms  "
+        f"min {min(samples):8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [
+        _import_times("import server.mcp, server.client, utils.auth")
+        for _ in range(args.runs)
+    ]
+    _report("import server.mcp", [t["server.mcp"] for t in imports])
+    _report(
+        "deferred to first tool call",
+        [t["server.client"] + t["utils.auth"] for t in imports],
+    )
+
+    initialized, listed = [], []
+    for _ in range(args.runs):
+        init_s, list_s, tool_count = asyncio.run(_first_list_tools())
+        initialized.append(init_s * 1000)
+        listed.append(list_s * 1000)
+    _report("spawn -> initialize", initialized)
+    _report(f"spawn -> list_tools ({tool_count})", listed)
+
+
+if __name__ == "__main__":
+    main()
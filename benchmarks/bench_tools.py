@@ -0,0 +1,278 @@
+"""
+Latency, upstream requests, response size and peak memory of every MCP tool, against the fake API.
+
+Each tool is called through FastMCP (argument validation and serialization included)
+`--iterations` times. The report has p50/p95/p99 latency, upstream requests per call,
+response bytes and the peak memory traced during one extra call. `--output` saves it as
+JSON; `--baseline` compares the run to a saved one and flags regressions.
+
+Run from the project root:
+    python -m benchmarks.bench_tools --projects 10 --tasks 200 --latency 0.01 --output bench.json
+    python -m benchmarks.bench_tools --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_api import FakeDida365
+
+# Tool name -> arguments of the i-th call, built from the fake's data
+Scenario = Callable[[FakeDida365, int], Dict[str, Any]]
+
+
+def _task(fake: FakeDida365, project_id: str, i: int) -> str:
+    """
+    Seed a task directly in the fake, so mutating tools never run out of targets.
+    """
+    with fake._lock:
+        return fake._new_task({"projectId": project_id, "title": f"bench {i}"})["id"]
+
+
+def _scenarios(project_id: str) -> Dict[str, Scenario]:
+    filters = ["dueDate <= 2025-07-10", "priority >= medium"]
+    return {
+        "get_projects": lambda f, i: {},
+        "get_project_by_id": lambda f, i: {"project_id": project_id},
+        "get_project_details": lambda f, i: {"project_id": project_id},
+        "get_project_details_compact": lambda f, i: {
+            "project_id": project_id,
+            "mode": "compact",
+        },
+        "filter_project_tasks": lambda f, i: {
+            "project_id": project_id,
+            "filter_fields": filters,
+        },
+        "filter_all_tasks": lambda f, i: {"filter_fields": filters},
+        "summarize_tasks": lambda f, i: {},
+        "summarize_tasks_compact": lambda f, i: {"mode": "compact"},
+        "get_agenda": lambda f, i: {
+            "start": "2025-07-01",
+            "end": "2025-07-31",
+            "timezone": "Asia/Shanghai",
+        },
+        "get_agenda_jsonl": lambda f, i: {
+            "start": "2025-07-01",
+            "end": "2025-07-31",
+            "timezone": "Asia/Shanghai",
+            "mode": "jsonl",
+        },
+        "get_project_changes": lambda f, i: {"project_id": project_id},
+        "get_task_by_id": lambda f, i: {
+            "project_id": project_id,
+            "task_id": next(iter(f.tasks[project_id])),
+        },
+        "create_task": lambda f, i: {"project_id": project_id, "title": f"new {i}"},
+        "create_tasks": lambda f, i: {
+            "tasks": [
+                {"project_id": project_id, "title": f"batch {i}-{n}"} for n in range(10)
+            ]
+        },
+        "update_task": lambda f, i: {
+            "task_id": _task(f, project_id, i),
+            "project_id": project_id,
+            "title": f"renamed {i}",
+        },
+        "update_tasks": lambda f, i: {
+            "updates": [
+                {
+                    "task_id": _task(f, project_id, i),
+                    "project_id": project_id,
+                    "priority": 5,
+                }
+                for _ in range(10)
+            ]
+        },
+        "complete_task": lambda f, i: {
+            "project_id": project_id,
+            "task_id": _task(f, project_id, i),
+        },
+        "complete_tasks": lambda f, i: {
+            "tasks": [
+                {"project_id": project_id, "task_id": _task(f, project_id, i)}
+                for _ in range(10)
+            ]
+        },
+        "delete_task": lambda f, i: {
+            "project_id": project_id,
+            "task_id": _task(f, project_id, i),
+        },
+        "delete_tasks": lambda f, i: {
+            "tasks": [
+                {"project_id": project_id, "task_id": _task(f, project_id, i)}
+                for _ in range(10)
+            ]
+        },
+        "create_project": lambda f, i: {"name": f"bench project {i}"},
+        "update_project": lambda f, i: {"project_id": project_id, "color": "#F18181"},
+        "delete_project": lambda f, i: {
+            "project_id": f.handle("POST", "/project", {"name": f"doomed {i}"})[1]["id"]
+        },
+    }
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    # Nearest rank, on sorted samples
+    rank = max(1, round(pct / 100 * len(samples)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def _response_bytes(result: Any) -> int:
+    # FastMCP returns the content blocks, plus structured output on newer versions
+    if isinstance(result, tuple):
+        result = result[0]
+    return sum(len(getattr(block, "text", "").encode("utf-8")) for block in result)
+
+
+async def _run(args: argparse.Namespace, fake: FakeDida365) -> Dict[str, Any]:
+    import server.mcp as server
+    from server.client import AsyncAPIClient
+    from utils.accounts import DEFAULT_ACCOUNT
+
+    client = AsyncAPIClient(token="bench", base_url=fake.base_url)
+    server.clients.put(DEFAULT_ACCOUNT, client)
+    project_id = next(iter(fake.projects))
+    results: Dict[str, Any] = {}
+    try:
+        for name, scenario in _scenarios(project_id).items():
+            if args.tools and name not in args.tools:
+                continue
+            tool = name.removesuffix("_compact").removesuffix("_jsonl")
+            samples, requests, sizes = [], [], []
+            for i in range(args.iterations):
+                arguments = scenario(fake, i)
+                if args.cold:
+                    client.cache.clear()
+                before = fake.received
+                start = time.perf_counter()
+                result = await server.mcp.call_tool(tool, arguments)
+                samples.append(time.perf_counter() - start)
+                requests.append(fake.received - before)
+                sizes.append(_response_bytes(result))
+
+            arguments = scenario(fake, args.iterations)
+            if args.cold:
+                client.cache.clear()
+            tracemalloc.start()
+            await server.mcp.call_tool(tool, arguments)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            samples.sort()
+            results[name] = {
+                "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+                "p99_ms": round(_percentile(samples, 99) * 1000, 3),
+                "requests_per_call": round(sum(requests) / len(requests), 2),
+                "response_bytes": round(sum(sizes) / len(sizes)),
+                "peak_memory_kb": round(peak / 1024, 1),
+            }
+    finally:
+        await client.aclose()
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _print_report(tools: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    header = (
+        f"{'tool':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'req/call':>10}{'bytes':>9}{'peak KB':>10}"
+    )
+    print(header)
+    for name, r in tools.items():
+        line = (
+            f"{name:<28}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            f"{r['requests_per_call']:>10.2f}{r['response_bytes']:>9}"
+            f"{r['peak_memory_kb']:>10.1f}"
+        )
+        old = baseline.get(name)
+        if old:
+            flags = []
+            if r["p50_ms"] > old["p50_ms"] * 1.2 + 0.5:
+                flags.append(f"p50 {old['p50_ms']:.2f}->{r['p50_ms']:.2f}")
+            if r["requests_per_call"] > old["requests_per_call"]:
+                flags.append(
+                    f"requests {old['requests_per_call']}->{r['requests_per_call']}"
+                )
+            if r["response_bytes"] > old["response_bytes"] * 1.05:
+                flags.append(f"bytes {old['response_bytes']}->{r['response_bytes']}")
+            if flags:
+                line += "  REGRESSION " + ", ".join(flags)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per project")
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument(
+        "--cold", action="store_true", help="clear the client cache before every call"
+    )
+    parser.add_argument("--tools", nargs="*", help="only these tools")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare to the results in this JSON file")
+    args = parser.parse_args()
+    # Tool errors are part of the measurement, not of the report
+    logging.disable(logging.ERROR)
+    # Measure the tools, not the client-side rate limit
+    os.environ["TICKTICK_RATE_LIMIT"] = "off"
+
+    with FakeDida365(
+        projects=args.projects,
+        tasks_per_project=args.tasks,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    ) as fake:
+        # No inbox probe: it would add requests to the first call only
+        os.environ["TICKTICK_INBOX_PROJECT_ID"] = fake.inbox_id
+        tools = asyncio.run(_run(args, fake))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["tools"]
+    _print_report(tools, baseline)
+
+    if args.output:
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "projects": args.projects,
+                "tasks_per_project": args.tasks,
+                "latency": args.latency,
+                "error_rate": args.error_rate,
+                "iterations": args.iterations,
+                "cold": args.cold,
+            },
+            "tools": tools,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
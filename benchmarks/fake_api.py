@@ -0,0 +1,271 @@
+"""
+A local stand-in for the Dida365 open API (`/open/v1`), used by the benchmarks.
+
+It serves the endpoints that `APIClient` calls from in-memory data, and can add
+artificial latency per request and per new connection (to mimic the TCP/TLS handshake).
+With `rate_limit` set it throttles like the real API: requests above that rate
+(per second, with a burst of `rate_burst`) get a 429, with a Retry-After header
+when `retry_after` is set. With `error_rate` set, that fraction of requests fails
+with a 503 (seeded by `seed`, so runs are repeatable).
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+
+class FakeDida365:
+    def __init__(
+        self,
+        projects: int = 3,
+        tasks_per_project: int = 20,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate_limit: float = 0.0,
+        rate_burst: int = 5,
+        retry_after: Optional[float] = None,
+        token: Optional[str] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.retry_after = retry_after
+        # When set, requests bearing another token get a 401
+        self.token = token
+        self.throttled = 0
+        self.error_rate = error_rate
+        self.errors = 0
+        self.bytes_sent = 0
+        self._random = random.Random(seed)
+        self._allowance = float(rate_burst)
+        self._allowance_at = time.monotonic()
+        self.inbox_id = "inbox0000000000"
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.tasks: Dict[str, Dict[str, Dict[str, Any]]] = {self.inbox_id: {}}
+        # requests counts the calls served, received also those answered 401/429/503
+        self.requests = 0
+        self.received = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._seed(projects, tasks_per_project)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _seed(self, projects: int, tasks_per_project: int) -> None:
+        for p in range(projects):
+            project_id = f"project{p:08d}"
+            self.projects[project_id] = {
+                "id": project_id,
+                "name": f"Project {p}",
+                "sortOrder": p,
+                "viewMode": "list",
+                "kind": "TASK",
+            }
+            self.tasks[project_id] = {}
+            for t in range(tasks_per_project):
+                task = {
+                    "projectId": project_id,
+                    "title": f"Task {p}-{t}",
+                    "priority": (0, 1, 3, 5)[t % 4],
+                    "dueDate": f"2025-07-{t % 28 + 1:02d}T16:00:00.000+0000",
+                }
+                if t % 10 == 0:
+                    task["repeatFlag"] = "RRULE:FREQ=WEEKLY;INTERVAL=1"
+                self._new_task(task)
+
+    def _new_task(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        project_id = data.get("projectId")
+        if project_id not in self.tasks:
+            # Unknown project ids end up in the inbox, like the real API does.
+            project_id = self.inbox_id
+        task = {
+            "id": uuid.uuid4().hex[:24],
+            "status": 0,
+            "etag": uuid.uuid4().hex[:8],
+            "modifiedTime": time.strftime("%Y-%m-%dT%H:%M:%S.000+0000", time.gmtime()),
+            "timeZone": "UTC",
+            **data,
+            "projectId": project_id,
+        }
+        self.tasks[project_id][task["id"]] = task
+        return task
+
+    def _over_limit(self) -> bool:
+        """
+        Server-side token bucket, True when the request must be answered with a 429.
+        """
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(
+                self.rate_burst,
+                self._allowance + (now - self._allowance_at) * self.rate_limit,
+            )
+            self._allowance_at = now
+            if self._allowance < 1:
+                self.throttled += 1
+                return True
+            self._allowance -= 1
+            return False
+
+    def _fails(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def handle(self, method: str, path: str, body: Dict[str, Any]) -> tuple[int, Any]:
+        """
+        Dispatch one API call, return (status code, json body or None).
+        """
+        with self._lock:
+            self.requests += 1
+            if method == "GET" and path == "/project":
+                return 200, list(self.projects.values())
+            if method == "POST" and path == "/project":
+                project_id = uuid.uuid4().hex[:24]
+                self.projects[project_id] = {"id": project_id, **body}
+                self.tasks[project_id] = {}
+                return 200, self.projects[project_id]
+            if method == "POST" and path == "/task":
+                return 200, self._new_task(body)
+
+            m = re.fullmatch(r"/project/([^/]+)(/data)?", path)
+            if m:
+                project_id, data = m.group(1), m.group(2)
+                if project_id not in self.tasks:
+                    return 404, None
+                if method == "GET" and data:
+                    return 200, {
+                        "project": self.projects.get(project_id, {"id": project_id}),
+                        "tasks": [
+                            t
+                            for t in self.tasks[project_id].values()
+                            if t["status"] == 0
+                        ],
+                    }
+                if method == "GET":
+                    return 200, self.projects.get(project_id, {})
+                if method == "PUT":
+                    self.projects[project_id].update(body)
+                    return 200, self.projects[project_id]
+                if method == "DELETE":
+                    self.projects.pop(project_id, None)
+                    self.tasks.pop(project_id, None)
+                    return 200, None
+
+            m = re.fullmatch(r"/task/([^/]+)", path)
+            if m and method == "PUT":
+                tasks = self.tasks.get(body.get("projectId"), {})
+                if m.group(1) not in tasks:
+                    return 404, None
+                task = tasks[m.group(1)]
+                task.update(body)
+                task["etag"] = uuid.uuid4().hex[:8]
+                return 200, task
+
+            m = re.fullmatch(r"/project/([^/]+)/task/([^/]+)(/complete)?", path)
+            if m:
+                tasks = self.tasks.get(m.group(1), {})
+                if m.group(2) not in tasks:
+                    return 404, None
+                if method == "GET":
+                    return 200, tasks[m.group(2)]
+                if method == "POST" and m.group(3):
+                    tasks[m.group(2)]["status"] = 2
+                    return 200, None
+                if method == "DELETE":
+                    tasks.pop(m.group(2))
+                    return 200, None
+            return 404, None
+
+    def __enter__(self):
+        fake = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+                if fake.connect_latency:
+                    time.sleep(fake.connect_latency)
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+                if fake.latency:
+                    time.sleep(fake.latency)
+                path = self.path.split("?", 1)[0].removeprefix("/open/v1")
+                with fake._lock:
+                    fake.received += 1
+                throttled = fake._over_limit()
+                bearer = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                if fake.token is not None and bearer != fake.token:
+                    status, payload = 401, {"errorMessage": "unauthorized"}
+                elif throttled:
+                    status, payload = 429, {"errorMessage": "Too Many Requests"}
+                elif fake._fails():
+                    status, payload = 503, {"errorMessage": "Service Unavailable"}
+                else:
+                    status, payload = fake.handle(self.command, path, body or {})
+                out = b"" if payload is None else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                if throttled and fake.retry_after is not None:
+                    self.send_header("Retry-After", f"{fake.retry_after:g}")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+                with fake._lock:
+                    fake.bytes_sent += len(out)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128  # bursts of concurrent connects
+
+        self._server = _Server((self.host, self.port), _Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="FakeDida365", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread:
+            self._thread.join()
@@ -1,5 +1,6 @@
+import argparse
 import logging
-from utils.auth import Auth
+import os
 from server.mcp import mcp
 import sys
 import traceback
@@ -9,10 +10,63 @@ logging.basicConfig(
 )
 
 
+def parse_args() -> argparse.Namespace:
+    # Defaults come from the environment (.env is loaded by server.mcp)
+    parser = argparse.ArgumentParser(description="Dida365 / TickTick MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http", "sse"],
+        default=os.getenv("TICKTICK_TRANSPORT") or "stdio",
+        help="stdio serves the host app that spawned this process, the HTTP transports "
+        "serve many MCP clients from one long-running process",
+    )
+    parser.add_argument(
+        "--host", default=os.getenv("TICKTICK_HTTP_HOST") or "127.0.0.1"
+    )
+    parser.add_argument(
+        "--port", type=int, default=int(os.getenv("TICKTICK_HTTP_PORT") or 8000)
+    )
+    parser.add_argument(
+        "--max-concurrent-tools",
+        type=int,
+        default=int(os.getenv("TICKTICK_HTTP_MAX_CONCURRENT_TOOLS") or 32),
+        help="tool calls running at once across all sessions, the others wait (0: no limit)",
+    )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=int,
+        default=int(os.getenv("TICKTICK_HTTP_SHUTDOWN_TIMEOUT") or 30),
+        help="seconds requests in progress get to finish on SIGINT / SIGTERM",
+    )
+    parser.add_argument(
+        "--authorize",
+        metavar="ACCOUNT",
+        help="sign an account in (adding it) and exit; the HTTP transport serves the "
+        "accounts of TICKTICK_ACCOUNT_KEYS once authorized",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     try:
-        Auth().run()
-        mcp.run()
+        if args.authorize:
+            from utils.accounts import authorize
+
+            authorize(args.authorize)
+            logging.info(f"Account {args.authorize!r} is authorized")
+        elif args.transport == "stdio":
+            mcp.run()
+        else:
+            from server.http import serve_http
+
+            serve_http(
+                args.transport,
+                host=args.host,
+                port=args.port,
+                max_concurrent_tools=args.max_concurrent_tools or None,
+                shutdown_timeout=args.shutdown_timeout,
+            )
     except Exception as e:
         logging.error(f"Error: {e}")
         traceback.print_exc(file=sys.stderr)
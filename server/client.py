@@ -1,41 +1,194 @@
+import asyncio
+import functools
+import itertools
+import random
 import os
+import time
 from dotenv import load_dotenv
 import httpx
-from utils.token_mng import load_token, is_token_valid
-from utils.auth import Auth
-from typing import Dict, List, Any, Literal, Optional
+from utils.accounts import DEFAULT_ACCOUNT, account_files, token_manager_for
+from utils.token_mng import TokenManager
+from typing import Awaitable, Callable, Dict, List, Any, Literal, NamedTuple, Optional
 import logging
 import json
-from utils.inbox_mng import get_inbox_project_id
+from utils.inbox_mng import get_inbox_project_id, aget_inbox_project_id
+from server.cache import TTLCache
+from server.metrics import endpoint_template, metrics
+from server.scheduler import RequestScheduler
+from server.singleflight import SingleFlight
+from server.tracing import span, trace_methods
+from utils.mirror import TaskMirror
+from utils.index import TaskIndex
+from utils.snapshot import SnapshotStore, diff_snapshots, take_snapshot
 
 load_dotenv()
 
 ReturnType = Dict[Any, Any] | List[Dict[Any, Any]] | None
 
+# Seconds a cached read stays fresh, per endpoint. 0 disables caching of that endpoint.
+CACHE_TTL = {
+    "projects": 300.0,  # GET /project
+    "project": 300.0,  # GET /project/{id}
+    "project_data": 30.0,  # GET /project/{id}/data
+    "task": 30.0,  # GET /project/{id}/task/{id}
+}
 
-class APIClient:
-    def __init__(self):
-        if not is_token_valid():
-            Auth().run()
-        self.token, _ = load_token()
-        self.base_url = os.getenv("TICKTICK_API_BASE_URL", "https://api.dida365.com")
+
+class _Request(NamedTuple):
+    """
+    An API call built by _BaseClient, sent by APIClient or awaited by AsyncAPIClient.
+    GETs with a cache `key` go through the read-through cache; `done` turns the parsed
+    response into the method's result, after keeping the cache and indexes consistent.
+    """
+
+    method: str
+    url: str
+    data: Optional[Dict[str, Any]] = None
+    idempotent: Optional[bool] = None
+    key: Optional[tuple] = None
+    done: Optional[Callable[[ReturnType], Any]] = None
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    if value.lower() in ("none", "off"):
+        return None
+    return float(value)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def http_client_settings() -> Dict[str, Any]:
+    """
+    Build the keyword arguments for httpx.Client / httpx.AsyncClient from the environment.
+    Every phase (connect, read, write, pool) has its own timeout.
+    """
+    http2 = _env_bool("TICKTICK_HTTP2")
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logging.warning(
+                "TICKTICK_HTTP2 is set but h2 is not installed, using HTTP/1.1"
+            )
+            http2 = False
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=_env_int("TICKTICK_HTTP_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=_env_int("TICKTICK_HTTP_MAX_KEEPALIVE", 10),
+            keepalive_expiry=_env_float("TICKTICK_HTTP_KEEPALIVE_EXPIRY", 60.0),
+        ),
+        "timeout": httpx.Timeout(
+            connect=_env_float("TICKTICK_HTTP_CONNECT_TIMEOUT", 5.0),
+            read=_env_float("TICKTICK_HTTP_READ_TIMEOUT", 30.0),
+            write=_env_float("TICKTICK_HTTP_WRITE_TIMEOUT", 30.0),
+            pool=_env_float("TICKTICK_HTTP_POOL_TIMEOUT", 10.0),
+        ),
+    }
+
+
+class _BaseClient:
+    """
+    Configuration and request/response handling shared by APIClient and AsyncAPIClient.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        account: str = DEFAULT_ACCOUNT,
+    ):
+        # Token, inbox id and mirror are per account, the default one uses .token / .data
+        self.account = account
+        files = account_files(account)
+        self.data_file = files.data
+        # Without an explicit token, the account's token manager keeps it fresh
+        self.tokens: Optional[TokenManager] = None
+        if token is None:
+            tokens = token_manager_for(account)
+            # Other accounts than the process's own are only authorized by the operator
+            if not tokens.is_valid() and tokens.reauthorize:
+                tokens.new_auth().run()
+            self.tokens = tokens
+        self._token = token
+        self.base_url = base_url or os.getenv(
+            "TICKTICK_API_BASE_URL", "https://api.dida365.com"
+        )
         self.api_version = os.getenv("TICKTICK_API_VERSION", "/open/v1")
+        # Upper bound of concurrent requests issued by fan-out helpers
+        self.max_concurrency = _env_int("TICKTICK_MAX_CONCURRENCY", 8)
+        # Every request goes through the scheduler: rate limit, in-flight cap and retries
+        self.scheduler = RequestScheduler(
+            rate=_env_float("TICKTICK_RATE_LIMIT", 10.0) or 0.0,
+            burst=_env_int("TICKTICK_RATE_BURST", 10),
+            max_in_flight=_env_int("TICKTICK_MAX_IN_FLIGHT", 16),
+            max_retries=_env_int("TICKTICK_MAX_RETRIES", 3),
+        )
+        # Concurrent identical GETs share one upstream request
+        self.flights = SingleFlight()
+        # Bumped when a write is sent and when it ends. A read records it when it starts:
+        # if it moved meanwhile, the read may predate the write and is not stored nor shared.
+        self.write_generation = 0
+        self._generations = itertools.count(1)
+        # Attempts added to idempotent batch items on top of the scheduler retries
+        self.batch_retries = _env_int("TICKTICK_BATCH_RETRIES", 0)
+        self.cache = TTLCache(maxsize=_env_int("TICKTICK_CACHE_SIZE", 256))
+        self.cache_ttl = {
+            endpoint: _env_float(f"TICKTICK_CACHE_TTL_{endpoint.upper()}", ttl) or 0.0
+            for endpoint, ttl in CACHE_TTL.items()
+        }
+        # In-memory secondary indexes over the fetched tasks
+        self.index = TaskIndex()
+        # Recent task snapshots per project, for get_project_changes cursors
+        self.snapshots = SnapshotStore()
+        # Optional SQLite mirror of projects and tasks, for indexed filtering
+        self.mirror = TaskMirror(files.mirror) if files.mirror else None
 
-    def _make_request(self, method: str, url: str, **kwargs) -> ReturnType:
+    @property
+    def token(self) -> Optional[str]:
+        return self.tokens.token if self.tokens is not None else self._token
+
+    def _retry_unauthorized(
+        self, response: httpx.Response, token: Optional[str]
+    ) -> bool:
         """
-        Make an authenticated request to the provider API.
+        After a 401, tell whether a refreshed token is available to retry the request once.
         """
+        return (
+            response.status_code == 401
+            and self.tokens is not None
+            and self.tokens.token_rejected(token)
+        )
 
+    def _request_args(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """
+        Build the arguments of an authenticated request to the provider API.
+        """
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = f"Bearer {self.token}"
         headers["User-Agent"] = "MCP-Dida365/1.0"
+        return {
+            "method": method,
+            "url": f"{self.base_url}{self.api_version}{url}",
+            "headers": headers,
+            "json": kwargs.get("data", {}),  # well, json is a must.
+        }
 
-        response = httpx.request(
-            method,
-            f"{self.base_url}{self.api_version}{url}",
-            headers=headers,
-            json=kwargs.get("data", {}),  # well, json is a must.
-        )
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> ReturnType:
         try:
             response.raise_for_status()
             # Return empty dict for 204 No Content
@@ -44,7 +197,126 @@ class APIClient:
             return response.json()
         except httpx.HTTPStatusError as e:
             logging.error(f"API Request Failed: {e}")
-            return {"error": str(e)}
+            return {"error": str(e), "status": e.response.status_code}
+
+    # Read-through cache. Keys are tuples starting with the endpoint name of CACHE_TTL.
+    def _cache_get(self, key: tuple) -> Any:
+        if not self.cache_ttl[key[0]]:
+            return None
+        return self.cache.get(key)
+
+    def _cache_set(self, key: tuple, result: ReturnType) -> None:
+        ttl = self.cache_ttl[key[0]]
+        if (
+            ttl
+            and result is not None
+            and not (isinstance(result, dict) and "error" in result)
+        ):
+            self.cache.set(key, result, ttl)
+
+    def _bump_generation(self) -> None:
+        self.write_generation = next(self._generations)
+
+    def _store_read(self, key: tuple, result: ReturnType, generation: int) -> None:
+        """
+        Keep the result of an upstream read started at `generation`: cache it, index its
+        tasks, and sync the mirror if enabled. A read that overlapped a write is dropped
+        instead, as it may not reflect that write: the next read goes upstream, and until
+        then the project is left out of the index, so callers filter the tasks they fetched.
+        """
+        if generation != self.write_generation:
+            self.cache.pop(key)
+            if key[0] == "project_data":
+                self.index.drop_project(key[1])
+            return
+        self._cache_set(key, result)
+        if key[0] == "projects" and isinstance(result, list):
+            if self.mirror is not None:
+                self.mirror.sync_projects(result)
+        elif key[0] == "project_data" and isinstance(result, dict):
+            if "error" in result:
+                return
+            self.index.load_project(key[1], result.get("tasks", []))
+            if self.mirror is not None:
+                self.mirror.sync_project(key[1], result)
+
+    # Write-through: keep the affected entries consistent after a mutation.
+    def _on_task_written(
+        self, project_id: str, task_id: Optional[str], task: ReturnType
+    ) -> None:
+        """
+        After create_task / update_task: put the returned task into its project data,
+        and drop it from the project it was moved out of.
+        """
+        if not isinstance(task, dict) or "error" in task or "id" not in task:
+            # The outcome is unknown, let the next read go upstream
+            self.cache.pop(("project_data", project_id))
+            if task_id:
+                self.cache.pop(("task", project_id, task_id))
+            return
+        new_project_id = task.get("projectId", project_id)
+        if new_project_id != project_id:
+            self._on_task_removed(project_id, task["id"])
+
+        def upsert(details: Dict[Any, Any]) -> None:
+            tasks = details.setdefault("tasks", [])
+            for idx, existing in enumerate(tasks):
+                if existing.get("id") == task["id"]:
+                    tasks[idx] = task
+                    return
+            tasks.append(task)
+
+        self.cache.update(("project_data", new_project_id), upsert)
+        self._cache_set(("task", new_project_id, task["id"]), task)
+        self.index.upsert(task)
+        if self.mirror is not None:
+            self.mirror.upsert_task(task)
+
+    def _on_task_removed(
+        self, project_id: str, task_id: str, result: ReturnType = None
+    ) -> None:
+        """
+        After complete_task / delete_task: project data only lists open tasks.
+        """
+        if isinstance(result, dict) and "error" in result:
+            self.cache.pop(("project_data", project_id), ("task", project_id, task_id))
+            return
+
+        def remove(details: Dict[Any, Any]) -> None:
+            details["tasks"] = [
+                t for t in details.get("tasks", []) if t.get("id") != task_id
+            ]
+
+        self.cache.update(("project_data", project_id), remove)
+        self.cache.pop(("task", project_id, task_id))
+        self.index.remove(task_id)
+        if self.mirror is not None:
+            self.mirror.delete_task(task_id)
+
+    def _on_project_written(
+        self, project_id: Optional[str], project: ReturnType, deleted: bool = False
+    ) -> None:
+        """
+        After create_project / update_project / delete_project.
+        """
+        self.cache.pop(("projects",))
+        if project_id is None:
+            return
+        if isinstance(project, dict) and "error" not in project and project.get("id"):
+            self._cache_set(("project", project_id), project)
+
+            def replace(details: Dict[Any, Any]) -> None:
+                details["project"] = project
+
+            self.cache.update(("project_data", project_id), replace)
+        else:
+            self.cache.pop(("project", project_id), ("project_data", project_id))
+            self.cache.invalidate(lambda k: k[:2] == ("task", project_id))
+        if deleted:
+            self.index.drop_project(project_id)
+            self.snapshots.drop_project(project_id)
+            if self.mirror is not None:
+                self.mirror.delete_project(project_id)
 
     @staticmethod
     def _build_data(**kwargs):
@@ -56,49 +328,44 @@ class APIClient:
             if v is not None
         }
 
-    # Project helper functions
-    def get_projects(self) -> List[Any]:
+    # Endpoints: the requests and result handling shared by both clients
+    @staticmethod
+    def _dict_or_empty(result: ReturnType) -> Dict[Any, Any]:
+        return result if isinstance(result, dict) else {}
+
+    @staticmethod
+    def _with_inbox(result: ReturnType, inbox_project_id: Optional[str]) -> List[Any]:
         """
-        Get all projects, return a list of projects
+        The projects of GET /project, the Inbox first.
         """
-        result = self._make_request("GET", "/project")
-        inbox_project_id = get_inbox_project_id(self)
         if isinstance(result, list):
             return [{"id": inbox_project_id, "name": "Inbox"}] + result
-        else:
-            return []
+        return []
 
-    def get_project_by_id(self, project_id: str) -> Dict[Any, Any]:
-        """
-        Get a project by id, return a dict
-        """
-        result = self._make_request("GET", f"/project/{project_id}")
-        if isinstance(result, dict):
-            return result
-        else:
-            return {}
+    def _get_project_request(self, project_id: str) -> _Request:
+        return _Request(
+            "GET",
+            f"/project/{project_id}",
+            key=("project", project_id),
+            done=self._dict_or_empty,
+        )
 
-    def get_project_details(self, project_id: str) -> Dict[Any, Any]:
-        """
-        Get a project data and tasks, return a dict
-        """
-        result = self._make_request("GET", f"/project/{project_id}/data")
-        if isinstance(result, dict):
-            return result
-        else:
-            return {}
+    def _get_project_details_request(self, project_id: str) -> _Request:
+        return _Request(
+            "GET",
+            f"/project/{project_id}/data",
+            key=("project_data", project_id),
+            done=self._dict_or_empty,
+        )
 
-    def create_project(
+    def _create_project_request(
         self,
         name: str,
         color: Optional[str] = None,
         sortOrder: Optional[int] = None,
         viewMode: Optional[Literal["list", "kanban", "timeline"]] = None,
         kind: Optional[Literal["TASK", "NOTE"]] = None,
-    ) -> Dict[Any, Any]:
-        """
-        Create a project, return a dict
-        """
+    ) -> _Request:
         data = self._build_data(
             name=name,
             color=color,
@@ -108,13 +375,16 @@ class APIClient:
             _type_map={"name": str, "sortOrder": str},
         )
         logging.info(f"Creating project: {json.dumps(data)}")
-        result = self._make_request("POST", "/project", data=data)
-        if isinstance(result, dict):
-            return result
-        else:
+
+        def done(result: ReturnType) -> Dict[Any, Any]:
+            self._on_project_written(None, result)
+            if isinstance(result, dict):
+                return result
             return {"error": "Failed to create project"}
 
-    def update_project(
+        return _Request("POST", "/project", data, done=done)
+
+    def _update_project_request(
         self,
         project_id: str,
         name: Optional[str] = None,
@@ -122,10 +392,7 @@ class APIClient:
         sortOrder: Optional[int] = None,
         viewMode: Optional[Literal["list", "kanban", "timeline"]] = None,
         kind: Optional[Literal["TASK", "NOTE"]] = None,
-    ) -> Dict[Any, Any]:
-        """
-        Update a project, return a dict
-        """
+    ) -> _Request:
         data = self._build_data(
             name=name,
             color=color,
@@ -134,26 +401,34 @@ class APIClient:
             kind=kind,
             _type_map={"sortOrder": str},
         )
-        result = self._make_request("PUT", f"/project/{project_id}", data=data)
-        if isinstance(result, dict):
-            return result
-        else:
+
+        def done(result: ReturnType) -> Dict[Any, Any]:
+            self._on_project_written(project_id, result)
+            if isinstance(result, dict):
+                return result
             return {"error": "Failed to update project"}
 
-    def delete_project(self, project_id: str) -> ReturnType:
-        """
-        Delete a project, return a dict
-        """
-        return self._make_request("DELETE", f"/project/{project_id}")
+        return _Request("PUT", f"/project/{project_id}", data, done=done)
 
-    # Task helper functions
-    def get_task_by_id(self, project_id: str, task_id: str) -> ReturnType:
-        """
-        Get task by project id and task id, return a dict or empty
-        """
-        return self._make_request("GET", f"/project/{project_id}/task/{task_id}")
+    def _delete_project_request(self, project_id: str) -> _Request:
+        def done(result: ReturnType) -> ReturnType:
+            self._on_project_written(
+                project_id,
+                None,
+                deleted=not isinstance(result, dict) or "error" not in result,
+            )
+            return result
+
+        return _Request("DELETE", f"/project/{project_id}", done=done)
 
-    def create_task(
+    def _get_task_request(self, project_id: str, task_id: str) -> _Request:
+        return _Request(
+            "GET",
+            f"/project/{project_id}/task/{task_id}",
+            key=("task", project_id, task_id),
+        )
+
+    def _create_task_request(
         self,
         project_id: str,
         title: str,
@@ -167,11 +442,7 @@ class APIClient:
         priority: Optional[int] = None,
         sortOrder: Optional[int] = None,
         items: Optional[list] = None,
-    ) -> ReturnType:
-        """
-        Create a task in a project. Returns the created task dict.
-        All parameters except project_id and title are optional and map to the API fields.
-        """
+    ) -> _Request:
         data = self._build_data(
             projectId=project_id,
             title=title,
@@ -186,9 +457,14 @@ class APIClient:
             sortOrder=sortOrder,
             items=items,
         )
-        return self._make_request("POST", "/task", data=data)
 
-    def update_task(
+        def done(result: ReturnType) -> ReturnType:
+            self._on_task_written(project_id, None, result)
+            return result
+
+        return _Request("POST", "/task", data, done=done)
+
+    def _update_task_request(
         self,
         task_id: str,
         project_id: str,
@@ -203,10 +479,7 @@ class APIClient:
         priority: Optional[int] = None,
         sortOrder: Optional[int] = None,
         items: Optional[list] = None,
-    ) -> ReturnType:
-        """
-        Update a task, return a dict
-        """
+    ) -> _Request:
         data = self._build_data(
             id=task_id,
             projectId=project_id,
@@ -222,18 +495,577 @@ class APIClient:
             sortOrder=sortOrder,
             items=items,
         )
-        return self._make_request("PUT", f"/task/{task_id}", data=data)
+
+        def done(result: ReturnType) -> ReturnType:
+            self._on_task_written(project_id, task_id, result)
+            return result
+
+        return _Request("PUT", f"/task/{task_id}", data, done=done)
+
+    def _complete_task_request(self, project_id: str, task_id: str) -> _Request:
+        def done(result: ReturnType) -> ReturnType:
+            self._on_task_removed(project_id, task_id, result)
+            return result
+
+        # Completing a task twice leaves it completed, so it can be retried
+        return _Request(
+            "POST",
+            f"/project/{project_id}/task/{task_id}/complete",
+            idempotent=True,
+            done=done,
+        )
+
+    def _delete_task_request(self, project_id: str, task_id: str) -> _Request:
+        def done(result: ReturnType) -> ReturnType:
+            self._on_task_removed(project_id, task_id, result)
+            return result
+
+        return _Request("DELETE", f"/project/{project_id}/task/{task_id}", done=done)
+
+
+@trace_methods
+class APIClient(_BaseClient):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.Client] = None,
+        account: str = DEFAULT_ACCOUNT,
+    ):
+        super().__init__(token, base_url, account)
+        # One pooled session for the lifetime of the client, so consecutive calls reuse
+        # the TCP/TLS connection instead of paying a new handshake each time.
+        self.http = http_client or httpx.Client(
+            headers={"User-Agent": "MCP-Dida365/1.0"},
+            **http_client_settings(),
+        )
+
+    def close(self) -> None:
+        """
+        Close the underlying HTTP session and its pooled connections.
+        """
+        self.http.close()
+        if self.mirror is not None:
+            self.mirror.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _make_request(self, method: str, url: str, **kwargs) -> ReturnType:
+        """
+        Make an authenticated request to the provider API, through the scheduler.
+        Pass idempotent=True for a mutation that is safe to send twice.
+        """
+        idempotent = kwargs.pop("idempotent", None)
+        with span(
+            "http.request", method=method, endpoint=endpoint_template(url)
+        ) as request_span:
+            with span("auth.token"):
+                token = self.token
+            writing = method != "GET"
+            if writing:
+                self._bump_generation()
+            start = time.perf_counter()
+            try:
+                response = self.scheduler.send(
+                    self.http, self._request_args(method, url, **kwargs), idempotent
+                )
+                if self._retry_unauthorized(response, token):
+                    response = self.scheduler.send(
+                        self.http, self._request_args(method, url, **kwargs), idempotent
+                    )
+            except Exception:
+                metrics.observe_request(
+                    method, url, "error", time.perf_counter() - start, 0
+                )
+                raise
+            finally:
+                if writing:
+                    # Whatever its outcome, reads that overlapped it may predate it
+                    self._bump_generation()
+            size = len(response.content)
+            metrics.observe_request(
+                method, url, response.status_code, time.perf_counter() - start, size
+            )
+            request_span.set("status", response.status_code)
+            request_span.set("bytes", size)
+            with span("json.decode"):
+                return self._parse_response(response)
+
+    def _read(self, key: tuple, url: str) -> ReturnType:
+        """
+        Cached GET. Concurrent misses on the same URL share a single upstream request,
+        unless a write happened in between.
+        """
+        result = self._cache_get(key)
+        if result is None:
+            generation = self.write_generation
+
+            def fetch() -> ReturnType:
+                fetched = self._make_request("GET", url)
+                self._store_read(key, fetched, generation)
+                return fetched
+
+            # Callers arriving after a write start a new flight rather than join an older one
+            result = self.flights.do(("GET", url, generation), fetch)
+        return result
+
+    def _send(self, request: _Request) -> Any:
+        """
+        Send a request built by _BaseClient and handle its result.
+        """
+        if request.key is not None:
+            result = self._read(request.key, request.url)
+        else:
+            result = self._make_request(
+                request.method,
+                request.url,
+                data=request.data or {},
+                idempotent=request.idempotent,
+            )
+        return request.done(result) if request.done is not None else result
+
+    # Project helper functions
+    def get_projects(self) -> List[Any]:
+        """
+        Get all projects, return a list of projects
+        """
+        result = self._read(("projects",), "/project")
+        with span("inbox.lookup"):
+            return self._with_inbox(result, get_inbox_project_id(self))
+
+    def get_project_by_id(self, project_id: str) -> Dict[Any, Any]:
+        """
+        Get a project by id, return a dict
+        """
+        return self._send(self._get_project_request(project_id))
+
+    def get_project_details(self, project_id: str) -> Dict[Any, Any]:
+        """
+        Get a project data and tasks, return a dict
+        """
+        return self._send(self._get_project_details_request(project_id))
+
+    def create_project(self, name: str, **fields: Any) -> Dict[Any, Any]:
+        """
+        Create a project, return a dict.
+        The optional fields (color, sortOrder, viewMode, kind) map to the API fields.
+        """
+        return self._send(self._create_project_request(name, **fields))
+
+    def update_project(self, project_id: str, **fields: Any) -> Dict[Any, Any]:
+        """
+        Update a project, return a dict.
+        The fields (name, color, sortOrder, viewMode, kind) map to the API fields.
+        """
+        return self._send(self._update_project_request(project_id, **fields))
+
+    def delete_project(self, project_id: str) -> ReturnType:
+        """
+        Delete a project, return a dict
+        """
+        return self._send(self._delete_project_request(project_id))
+
+    # Task helper functions
+    def get_task_by_id(self, project_id: str, task_id: str) -> ReturnType:
+        """
+        Get task by project id and task id, return a dict or empty
+        """
+        return self._send(self._get_task_request(project_id, task_id))
+
+    def create_task(self, project_id: str, title: str, **fields: Any) -> ReturnType:
+        """
+        Create a task in a project. Returns the created task dict.
+        The optional fields (content, isAllDay, startDate, dueDate, timeZone, reminders,
+        repeatFlag, priority, sortOrder, items) map to the API fields.
+        """
+        return self._send(self._create_task_request(project_id, title, **fields))
+
+    def update_task(self, task_id: str, project_id: str, **fields: Any) -> ReturnType:
+        """
+        Update a task, return a dict. The fields are those of create_task.
+        """
+        return self._send(self._update_task_request(task_id, project_id, **fields))
 
     def complete_task(self, project_id: str, task_id: str) -> ReturnType:
         """
         Complete a task, return a dict
         """
-        return self._make_request(
-            "POST", f"/project/{project_id}/task/{task_id}/complete"
-        )
+        return self._send(self._complete_task_request(project_id, task_id))
 
     def delete_task(self, project_id: str, task_id: str) -> ReturnType:
         """
         Delete a task, return a dict
         """
-        return self._make_request("DELETE", f"/project/{project_id}/task/{task_id}")
+        return self._send(self._delete_task_request(project_id, task_id))
+
+
+@trace_methods
+class AsyncAPIClient(_BaseClient):
+    """
+    Asyncio counterpart of APIClient with the same methods, built on httpx.AsyncClient.
+    Independent calls can be awaited concurrently instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        account: str = DEFAULT_ACCOUNT,
+    ):
+        super().__init__(token, base_url, account)
+        # One pooled session for the lifetime of the client, so consecutive calls reuse
+        # the TCP/TLS connection instead of paying a new handshake each time.
+        self.http = http_client or httpx.AsyncClient(
+            headers={"User-Agent": "MCP-Dida365/1.0"},
+            **http_client_settings(),
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the underlying HTTP session and its pooled connections.
+        """
+        await self.http.aclose()
+        if self.mirror is not None:
+            self.mirror.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def _make_request(self, method: str, url: str, **kwargs) -> ReturnType:
+        """
+        Make an authenticated request to the provider API, through the scheduler.
+        Pass idempotent=True for a mutation that is safe to send twice.
+        """
+        idempotent = kwargs.pop("idempotent", None)
+        with span(
+            "http.request", method=method, endpoint=endpoint_template(url)
+        ) as request_span:
+            with span("auth.token"):
+                token = self.token
+            writing = method != "GET"
+            if writing:
+                self._bump_generation()
+            start = time.perf_counter()
+            try:
+                response = await self.scheduler.asend(
+                    self.http, self._request_args(method, url, **kwargs), idempotent
+                )
+                if self._retry_unauthorized(response, token):
+                    response = await self.scheduler.asend(
+                        self.http, self._request_args(method, url, **kwargs), idempotent
+                    )
+            except Exception:
+                metrics.observe_request(
+                    method, url, "error", time.perf_counter() - start, 0
+                )
+                raise
+            finally:
+                if writing:
+                    # Whatever its outcome, reads that overlapped it may predate it
+                    self._bump_generation()
+            size = len(response.content)
+            metrics.observe_request(
+                method, url, response.status_code, time.perf_counter() - start, size
+            )
+            request_span.set("status", response.status_code)
+            request_span.set("bytes", size)
+            with span("json.decode"):
+                return self._parse_response(response)
+
+    async def _read(self, key: tuple, url: str) -> ReturnType:
+        """
+        Cached GET. Concurrent misses on the same URL share a single upstream request,
+        unless a write happened in between.
+        """
+        result = self._cache_get(key)
+        if result is None:
+            generation = self.write_generation
+
+            async def fetch() -> ReturnType:
+                fetched = await self._make_request("GET", url)
+                self._store_read(key, fetched, generation)
+                return fetched
+
+            # Callers arriving after a write start a new flight rather than join an older one
+            result = await self.flights.ado(("GET", url, generation), fetch)
+        return result
+
+    async def _send(self, request: _Request) -> Any:
+        """
+        Send a request built by _BaseClient and handle its result.
+        """
+        if request.key is not None:
+            result = await self._read(request.key, request.url)
+        else:
+            result = await self._make_request(
+                request.method,
+                request.url,
+                data=request.data or {},
+                idempotent=request.idempotent,
+            )
+        return request.done(result) if request.done is not None else result
+
+    # Project helper functions
+    async def get_projects(self) -> List[Any]:
+        """
+        Get all projects, return a list of projects
+        """
+        result = await self._read(("projects",), "/project")
+        with span("inbox.lookup"):
+            return self._with_inbox(result, await aget_inbox_project_id(self))
+
+    async def get_project_by_id(self, project_id: str) -> Dict[Any, Any]:
+        """
+        Get a project by id, return a dict
+        """
+        return await self._send(self._get_project_request(project_id))
+
+    async def get_project_details(self, project_id: str) -> Dict[Any, Any]:
+        """
+        Get a project data and tasks, return a dict
+        """
+        return await self._send(self._get_project_details_request(project_id))
+
+    async def get_all_project_details(
+        self, max_concurrency: Optional[int] = None
+    ) -> List[Dict[Any, Any]]:
+        """
+        Get the data and tasks of every open project (Inbox included), fetched concurrently
+        with at most `max_concurrency` requests in flight. Return a list of dicts shaped
+        like get_project_details, in the order of get_projects.
+        """
+        projects = [p for p in await self.get_projects() if not p.get("closed")]
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def fetch(project: Dict[Any, Any]) -> Dict[Any, Any]:
+            async with semaphore:
+                details = await self.get_project_details(project["id"])
+            # The Inbox has no project entity of its own, keep the one from get_projects
+            result = {
+                "project": details.get("project") or project,
+                "tasks": details.get("tasks", []),
+            }
+            if "error" in details:
+                result["error"] = details["error"]
+            return result
+
+        return list(await asyncio.gather(*(fetch(p) for p in projects)))
+
+    async def create_project(self, name: str, **fields: Any) -> Dict[Any, Any]:
+        """
+        Create a project, return a dict.
+        The optional fields (color, sortOrder, viewMode, kind) map to the API fields.
+        """
+        return await self._send(self._create_project_request(name, **fields))
+
+    async def update_project(self, project_id: str, **fields: Any) -> Dict[Any, Any]:
+        """
+        Update a project, return a dict.
+        The fields (name, color, sortOrder, viewMode, kind) map to the API fields.
+        """
+        return await self._send(self._update_project_request(project_id, **fields))
+
+    async def delete_project(self, project_id: str) -> ReturnType:
+        """
+        Delete a project, return a dict
+        """
+        return await self._send(self._delete_project_request(project_id))
+
+    # Task helper functions
+    async def get_task_by_id(self, project_id: str, task_id: str) -> ReturnType:
+        """
+        Get task by project id and task id, return a dict or empty
+        """
+        return await self._send(self._get_task_request(project_id, task_id))
+
+    async def create_task(
+        self, project_id: str, title: str, **fields: Any
+    ) -> ReturnType:
+        """
+        Create a task in a project. Returns the created task dict.
+        The optional fields (content, isAllDay, startDate, dueDate, timeZone, reminders,
+        repeatFlag, priority, sortOrder, items) map to the API fields.
+        """
+        return await self._send(self._create_task_request(project_id, title, **fields))
+
+    async def update_task(
+        self, task_id: str, project_id: str, **fields: Any
+    ) -> ReturnType:
+        """
+        Update a task, return a dict. The fields are those of create_task.
+        """
+        return await self._send(
+            self._update_task_request(task_id, project_id, **fields)
+        )
+
+    async def complete_task(self, project_id: str, task_id: str) -> ReturnType:
+        """
+        Complete a task, return a dict
+        """
+        return await self._send(self._complete_task_request(project_id, task_id))
+
+    async def delete_task(self, project_id: str, task_id: str) -> ReturnType:
+        """
+        Delete a task, return a dict
+        """
+        return await self._send(self._delete_task_request(project_id, task_id))
+
+    async def get_project_changes(
+        self, project_id: str, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        What changed in a project since the version a previous call's cursor points to.
+        The project is re-read upstream, its snapshot recorded, and the result holds the
+        new "cursor" plus "added" and "modified" tasks, "completed" tasks and "removed" ids.
+        Without a cursor only a baseline is recorded ("baseline": True); with an expired
+        one every open task is reported as added ("expired": True).
+        """
+        base_version = None
+        if cursor:
+            base_version = self.snapshots.decode_cursor(cursor, project_id)
+        # Polling has to see changes made outside this server, skip the cached copy
+        self.cache.pop(("project_data", project_id))
+        details = await self.get_project_details(project_id)
+        if "error" in details:
+            return {"error": details["error"]}
+        tasks = {t["id"]: t for t in details.get("tasks", []) if t.get("id")}
+        snapshot = take_snapshot(tasks.values())
+        version = self.snapshots.record(project_id, snapshot)
+        result: Dict[str, Any] = {
+            "cursor": self.snapshots.encode_cursor(project_id, version),
+            "added": [],
+            "modified": [],
+            "completed": [],
+            "removed": [],
+        }
+        if not cursor:
+            result["baseline"] = True
+            result["total"] = len(tasks)
+            return result
+        if base_version is None:
+            result["expired"] = True
+            result["added"] = list(tasks.values())
+            return result
+
+        changes = diff_snapshots(self.snapshots.get(project_id, base_version), snapshot)
+        result["added"] = [tasks[i] for i in changes["added"]]
+        result["modified"] = [tasks[i] for i in changes["modified"]]
+        # Project data only lists open tasks: look the others up to tell completed from gone
+        self.cache.pop(*(("task", project_id, i) for i in changes["gone"]))
+        lookups = await self.run_batch(
+            [
+                functools.partial(self.get_task_by_id, project_id, task_id)
+                for task_id in changes["gone"]
+            ],
+            retries=self.batch_retries,
+        )
+        for task_id, task in zip(changes["gone"], lookups):
+            if isinstance(task, dict) and task.get("status") and "error" not in task:
+                result["completed"].append(task)
+            else:
+                result["removed"].append(task_id)
+        return result
+
+    # Batch helper functions
+    @staticmethod
+    def _is_transient(result: ReturnType) -> bool:
+        """
+        Throttling and server-side errors are worth retrying, client errors are not.
+        """
+        if not isinstance(result, dict) or "error" not in result:
+            return False
+        status = result.get("status")
+        return status == 429 or (isinstance(status, int) and status >= 500)
+
+    async def run_batch(
+        self,
+        calls: List[Callable[[], Awaitable[ReturnType]]],
+        max_concurrency: Optional[int] = None,
+        retries: int = 0,
+    ) -> List[ReturnType]:
+        """
+        Run independent API calls concurrently, at most `max_concurrency` in flight.
+        Return one result per call, in order. A failing call does not abort the others,
+        its exception becomes that item's {"error": ...}.
+        Transient failures (429, 5xx, connection errors) are retried up to `retries` times
+        with jittered exponential backoff, only pass retries > 0 for idempotent calls.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run(call: Callable[[], Awaitable[ReturnType]]) -> ReturnType:
+            for attempt in range(retries + 1):
+                async with semaphore:
+                    try:
+                        result = await call()
+                    except httpx.TransportError as e:
+                        result = {"error": f"{type(e).__name__}: {e}", "status": None}
+                        transient = True
+                    except Exception as e:
+                        logging.error(f"Batch item failed: {e}")
+                        return {"error": str(e)}
+                    else:
+                        transient = self._is_transient(result)
+                if not transient or attempt == retries:
+                    return result
+                await asyncio.sleep(random.uniform(0, 0.5 * 2**attempt))
+            return result
+
+        return list(await asyncio.gather(*(run(call) for call in calls)))
+
+    async def create_tasks(
+        self, specs: List[Dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> List[ReturnType]:
+        """
+        Create several tasks concurrently. Each spec takes the keyword arguments of
+        create_task. Return the created task dict or {"error": ...} per spec, in order.
+        Creation is not idempotent, so failed items are not retried.
+        """
+        return await self.run_batch(
+            [functools.partial(self.create_task, **spec) for spec in specs],
+            max_concurrency,
+        )
+
+    async def update_tasks(
+        self, updates: List[Dict[str, Any]], max_concurrency: Optional[int] = None
+    ) -> List[ReturnType]:
+        """
+        Update several tasks concurrently. Each item takes the keyword arguments of
+        update_task (task_id, project_id and the fields to change).
+        """
+        return await self.run_batch(
+            [functools.partial(self.update_task, **update) for update in updates],
+            max_concurrency,
+            retries=self.batch_retries,
+        )
+
+    async def complete_tasks(
+        self, tasks: List[Dict[str, str]], max_concurrency: Optional[int] = None
+    ) -> List[ReturnType]:
+        """
+        Complete several tasks concurrently, each item has project_id and task_id.
+        """
+        return await self.run_batch(
+            [functools.partial(self.complete_task, **task) for task in tasks],
+            max_concurrency,
+            retries=self.batch_retries,
+        )
+
+    async def delete_tasks(
+        self, tasks: List[Dict[str, str]], max_concurrency: Optional[int] = None
+    ) -> List[ReturnType]:
+        """
+        Delete several tasks concurrently, each item has project_id and task_id.
+        """
+        return await self.run_batch(
+            [functools.partial(self.delete_task, **task) for task in tasks],
+            max_concurrency,
+            retries=self.batch_retries,
+        )
@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# Imported first by server.mcp: some settings are read from the environment at import time,
+# and server.client (which used to load .env) is now only imported on the first tool call
+load_dotenv()
@@ -0,0 +1,119 @@
+import asyncio
+import ipaddress
+import logging
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+import server.mcp as server
+from utils.accounts import ACCOUNT_KEYS, account_for_key, bearer_key
+
+HttpTransport = Literal["streamable-http", "sse"]
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class AccountKeyMiddleware:
+    """
+    Refuse the HTTP requests that bear no key of a configured account
+    (TICKTICK_ACCOUNT_KEYS) before they reach the MCP endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            key = bearer_key(Headers(scope=scope).get("Authorization"))
+            if account_for_key(key) is None:
+                response = JSONResponse(
+                    {"error": "Unknown account key"},
+                    status_code=401,
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def http_app(transport: HttpTransport = "streamable-http", json_response: bool = True):
+    """
+    The Starlette app of the HTTP transport. The MCP sessions of an account share its API
+    client (connection pool, caches, token, inbox id). With TICKTICK_ACCOUNT_KEYS set, the
+    account is the one whose bearer key the requests bear, and requests without a known
+    key are refused. The clients are closed when the app shuts down rather than when a
+    session ends.
+
+    With `json_response`, streamable-HTTP answers each request with plain JSON instead of an
+    SSE stream: the tools do not stream progress, and sse-starlette ends every SSE response
+    as soon as uvicorn receives SIGTERM, while plain responses are waited for. Under the
+    legacy SSE transport, calls still in progress at shutdown are cut.
+    """
+    server.close_clients_with_session = False
+    if transport == "sse":
+        app = server.mcp.sse_app()
+    else:
+        server.mcp.settings.json_response = json_response
+        app = server.mcp.streamable_http_app()
+    sessions_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # The clients of accounts that stopped calling are closed without waiting for a call
+        eviction = asyncio.create_task(server.clients.evict_periodically())
+        try:
+            async with sessions_lifespan(app):
+                yield
+        finally:
+            eviction.cancel()
+        await server.close_clients()
+        logging.info("MCP server stopped")
+
+    app.router.lifespan_context = lifespan
+    if ACCOUNT_KEYS:
+        app.add_middleware(AccountKeyMiddleware)
+    return app
+
+
+def serve_http(
+    transport: HttpTransport = "streamable-http",
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_concurrent_tools: Optional[int] = None,
+    shutdown_timeout: Optional[int] = 30,
+) -> None:
+    """
+    Serve MCP over HTTP until SIGINT / SIGTERM. On shutdown, new connections are refused and
+    requests in progress get `shutdown_timeout` seconds to finish before they are cancelled.
+    """
+    import uvicorn
+
+    if not _is_loopback(host) and not ACCOUNT_KEYS:
+        logging.warning(
+            f"Serving on {host}: the MCP endpoint has no authentication, anyone who can "
+            "reach it can read and change your tasks (set TICKTICK_ACCOUNT_KEYS)"
+        )
+    server.limit_concurrent_tools(max_concurrent_tools)
+    path = (
+        server.mcp.settings.sse_path
+        if transport == "sse"
+        else server.mcp.settings.streamable_http_path
+    )
+    logging.info(f"Serving MCP ({transport}) on http://{host}:{port}{path}")
+    config = uvicorn.Config(
+        http_app(transport),
+        host=host,
+        port=port,
+        log_level=server.mcp.settings.log_level.lower(),
+        timeout_graceful_shutdown=shutdown_timeout,
+    )
+    uvicorn.Server(config).run()
@@ -1,22 +1,194 @@
+import server.env  # noqa: F401  (loads .env)
 from mcp.server.fastmcp import FastMCP
-from typing import List, Dict, Any, Optional, Literal
-from server.client import APIClient
+from typing import TYPE_CHECKING, Iterator, List, Dict, Any, Optional, Literal, Tuple
+from server.cache import TTLCache
+from server.metrics import instrument_tool, metrics, start_exporters
+from server.tracing import configure_from_env, span, traced
+import asyncio
+import base64
+import functools
+import json
 import logging
-from utils.filter import filter_task
-from datetime import datetime
+import os
+from utils.agenda import AgendaEntry, build_agenda, zone
+from utils.filter import PRIORITY_NAMES, compile_filter, resolve_date_keyword
+from utils.summary import TaskSummary
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from itertools import islice
+from server.pool import ClientPool
+from utils.accounts import (
+    ACCOUNT_KEYS,
+    AccountError,
+    account_for_key,
+    bearer_key,
+    own_account,
+    token_manager_for,
+    validate_account,
+)
+from utils.token_mng import AuthorizationPending
+
+if TYPE_CHECKING:
+    from server.client import AsyncAPIClient
+
+configure_from_env()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """
+    Runs around each MCP session: start the optional metrics exporters (once per process).
+    Under stdio the session is the whole process, so the API clients are closed when it
+    ends; the HTTP transport shares them across sessions and closes them when the server
+    shuts down (see server/http.py).
+    """
+    start_exporters()
+    try:
+        yield
+    finally:
+        if close_clients_with_session:
+            await close_clients()
+
 
 mcp = FastMCP(
     "Dida365 MCP",
+    lifespan=lifespan,
     instructions="""
 This server provides a todo list management service for user.
 If not specified, the task should always be created in the default project named "AI-Planner".
 Prompt the user to re-auth when response contains unauthorized error.
 """,
 )
-client = APIClient()
 
 
-def format_task(task: Dict[Any, Any]) -> str:
+def _build_client(account: str) -> "AsyncAPIClient":
+    """
+    Build the API client of an account.
+    Without a valid token, start the OAuth flow of the process's own account in the
+    background (once) and raise AuthorizationPending until it completes. Other accounts
+    are authorized by the operator: raise AccountError.
+    """
+    tokens = token_manager_for(validate_account(account))
+    if not tokens.is_valid():
+        if not tokens.reauthorize:
+            raise AccountError(
+                f"Account {account!r} is not authorized: run "
+                f"`python main.py --authorize {account}` on the server, "
+                "then call the tool again."
+            )
+        auth_url = tokens.start_reauth()
+        raise AuthorizationPending(
+            f"Authorization pending: complete the sign-in at {auth_url}, "
+            "then call the tool again."
+        )
+    from server.client import AsyncAPIClient
+
+    return AsyncAPIClient(account=account)
+
+
+# One client per account, built on its first tool call, so the server answers
+# initialize/list_tools without touching tokens, the network or the heavier client modules.
+clients = ClientPool(
+    _build_client,
+    max_clients=int(os.getenv("TICKTICK_CLIENT_POOL_SIZE") or 8),
+    idle_timeout=float(os.getenv("TICKTICK_CLIENT_IDLE_TIMEOUT") or 900),
+)
+# False when several sessions share the process (HTTP transport)
+close_clients_with_session = True
+# Bound on the tool calls running at once across sessions, None for no bound
+_tool_slots: Optional[asyncio.Semaphore] = None
+
+
+def current_account() -> str:
+    """
+    The account of the current call. With TICKTICK_ACCOUNT_KEYS set, an HTTP call runs for
+    the account whose key it bears (Authorization: Bearer <key>) and is refused without
+    one; otherwise calls run for TICKTICK_ACCOUNT, else the default account.
+    """
+    try:
+        request = mcp.get_context().request_context.request
+    except (LookupError, ValueError):
+        request = None
+    if request is None or not ACCOUNT_KEYS:
+        return own_account()
+    account = account_for_key(bearer_key(request.headers.get("Authorization")))
+    if account is None:
+        raise AccountError(
+            "Unknown account key: send Authorization: Bearer <key> with the key of a "
+            "configured account"
+        )
+    return account
+
+
+def get_client() -> "AsyncAPIClient":
+    """
+    Return the API client of the current call's account, building it on first use.
+    """
+    return clients.get(current_account())
+
+
+def tool():
+    """
+    mcp.tool() that also records the duration and output size of every call,
+    runs it in a "tool.<name>" span and waits for a slot when tool calls are bounded.
+    The account's client is not evicted from the pool while the call runs.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def bounded(*args, **kwargs):
+            with clients.using(current_account()):
+                if _tool_slots is None:
+                    return await fn(*args, **kwargs)
+                async with _tool_slots:
+                    return await fn(*args, **kwargs)
+
+        return mcp.tool()(instrument_tool(traced(f"tool.{fn.__name__}")(bounded)))
+
+    return decorator
+
+
+def limit_concurrent_tools(max_calls: Optional[int]) -> None:
+    """
+    Let at most `max_calls` tool calls run at once, the others wait. None removes the bound.
+    """
+    global _tool_slots
+    _tool_slots = asyncio.Semaphore(max_calls) if max_calls else None
+
+
+async def close_clients() -> None:
+    """
+    Close the API clients of every account. The next tool call builds a new one.
+    """
+    await clients.aclose()
+
+
+OutputMode = Literal["verbose", "compact", "jsonl"]
+
+# Longest window get_agenda lists, in days
+MAX_AGENDA_DAYS = 366
+
+# Formatted tasks by (id, modifiedTime, etag, mode, fields): unchanged tasks are not re-formatted
+_formatted_tasks = TTLCache(maxsize=4096, ttl=3600)
+
+
+def _non_empty(v: Any) -> bool:
+    return v not in (None, "", [], {})
+
+
+def _project_fields(
+    data: Dict[Any, Any], fields: Optional[List[str]]
+) -> Dict[Any, Any]:
+    if not fields:
+        return data
+    return {k: data[k] for k in fields if k in data}
+
+
+def current_time_header() -> str:
+    return f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+def _format_task_verbose(task: Dict[Any, Any]) -> str:
     lines: List[str] = []
 
     # 1) Subtasks
@@ -25,28 +197,247 @@ def format_task(task: Dict[Any, Any]) -> str:
         lines.append("Subtasks:")
         for idx, sub in enumerate(items, 1):
             fields = "; ".join(
-                f"{k}: {v}"
-                for k, v in sub.items()
-                if v not in (None, "", [], {}) and k != "timeZone"
+                f"{k}: {v}" for k, v in sub.items() if _non_empty(v) and k != "timeZone"
             )
             lines.append(f"  {idx}. {fields}")
 
     # 2) Other task fields
     skip = {"items"}
     for k, v in task.items():
-        if k in skip or v in (None, "", [], {}):
+        if k in skip or not _non_empty(v):
             continue
         lines.append(f"{k}: {v}")
+    return "\n".join(lines)
+
+
+def _format_task_compact(task: Dict[Any, Any], projected: bool) -> str:
+    if projected:
+        return "; ".join(
+            f"{k}: {len(v) if k == 'items' else v}"
+            for k, v in task.items()
+            if _non_empty(v)
+        )
+    parts = [f"{task.get('title', '')} [id: {task.get('id')}]"]
+    for key, label in (("startDate", "start"), ("dueDate", "due")):
+        if task.get(key):
+            parts.append(f"{label}: {str(task[key])[:10]}")
+    if task.get("priority"):
+        parts.append(
+            f"priority: {PRIORITY_NAMES.get(task['priority'], task['priority'])}"
+        )
+    if task.get("status"):
+        parts.append("completed")
+    if task.get("repeatFlag"):
+        parts.append("repeating")
+    if task.get("tags"):
+        parts.append(f"tags: {', '.join(task['tags'])}")
+    items = task.get("items") or []
+    if items:
+        done = sum(1 for sub in items if sub.get("status"))
+        parts.append(f"subtasks: {done}/{len(items)} done")
+    return " | ".join(parts)
 
-    # 3) Add current time
-    lines.append(f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+def format_task(
+    task: Dict[Any, Any],
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
+    """
+    Format a task as readable lines (verbose), a single line (compact) or a JSON object (jsonl),
+    keeping only `fields` when given.
+    """
+    key = None
+    if task.get("id") and task.get("modifiedTime"):
+        key = (
+            task["id"],
+            task["modifiedTime"],
+            task.get("etag"),
+            mode,
+            tuple(fields) if fields else None,
+        )
+        cached = _formatted_tasks.get(key)
+        if cached is not None:
+            return cached
+
+    data = _project_fields(task, fields)
+    if mode == "jsonl":
+        formatted = json.dumps(
+            {k: v for k, v in data.items() if _non_empty(v)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    elif mode == "compact":
+        formatted = _format_task_compact(data, projected=bool(fields))
+    else:
+        formatted = _format_task_verbose(data)
+
+    if key is not None:
+        _formatted_tasks.set(key, formatted)
+    return formatted
+
+
+def format_project(
+    project: Dict[Any, Any],
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
+    data = {k: v for k, v in _project_fields(project, fields).items() if _non_empty(v)}
+    if mode == "jsonl":
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if mode == "compact":
+        return "; ".join(f"{k}: {v}" for k, v in data.items())
+    return "\n".join(f"{k}: {v}" for k, v in data.items())
+
+
+def listing_separator(mode: OutputMode) -> str:
+    return "\n\n" if mode == "verbose" else "\n"
+
+
+def format_summary(label: str, summary: Dict[str, Any], mode: OutputMode) -> str:
+    """
+    Format a TaskSummary.to_dict() under a label (the project, or "All projects").
+    """
+    if mode == "jsonl":
+        return json.dumps(
+            {"scope": label, **summary}, ensure_ascii=False, separators=(",", ":")
+        )
+
+    def counts(values: Dict[str, int]) -> str:
+        return ", ".join(f"{k} {v}" for k, v in values.items()) or "-"
+
+    tags = counts(summary["tags"])
+    if summary["other_tags"]:
+        tags += f" (+{summary['other_tags']} more)"
+    parts = [
+        ("open", f"{summary['open']}, completed {summary['completed']}"),
+        ("due", counts(summary["due"])),
+        ("priority", counts(summary["priority"])),
+        ("tags", tags),
+        ("earliest due", summary["earliest_due"] or "-"),
+        ("open subtasks", summary["open_subtasks"]),
+    ]
+    if mode == "compact":
+        return f"{label}: " + " | ".join(f"{k} {v}" for k, v in parts)
+    return "\n".join([f"{label}:"] + [f"  {k}: {v}" for k, v in parts])
+
+
+def format_batch_result(
+    action: str, items: List[Dict[str, Any]], results: List[Any]
+) -> str:
+    """
+    Summarize a batch in one line, listing only the items that failed.
+    """
+    failures = []
+    for item, result in zip(items, results):
+        if isinstance(result, dict) and "error" in result:
+            error = str(result["error"]).splitlines()[0]
+            failures.append(
+                f"- {item.get('task_id')} (project {item.get('project_id')}): {error}"
+            )
+    lines = [f"{action} {len(items) - len(failures)}/{len(items)} tasks"]
+    if failures:
+        lines.append("Failed:")
+        lines.extend(failures)
     return "\n".join(lines)
 
 
-def format_project(project: Dict[Any, Any]) -> str:
-    return "\n".join(
-        f"{k}: {v}" for k, v in project.items() if v not in (None, "", [], {})
-    )
+def encode_cursor(offset: int, sort: Optional[str]) -> str:
+    """
+    Opaque continuation cursor carrying the next offset and the sort order of the listing.
+    """
+    raw = json.dumps({"offset": offset, "sort": sort}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(data["offset"]), data.get("sort")
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def sort_tasks(
+    tasks: List[Dict[Any, Any]], sort: Optional[str]
+) -> List[Dict[Any, Any]]:
+    """
+    Sort by a task field, "-field" for descending. Tasks without the field go last.
+    """
+    if not sort:
+        return tasks
+    field = sort.lstrip("-")
+    present = [t for t in tasks if t.get(field) not in (None, "")]
+    missing = [t for t in tasks if t.get(field) in (None, "")]
+    present.sort(key=lambda t: t[field], reverse=sort.startswith("-"))
+    return present + missing
+
+
+def iter_formatted_tasks(
+    tasks: List[Dict[Any, Any]],
+    start: int,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> Iterator[str]:
+    """
+    Format tasks lazily from `start`, so a page never formats more than it returns.
+    JSON Lines entries are not numbered, so each line stays a valid JSON object.
+    """
+    for idx in range(start, len(tasks)):
+        formatted = format_task(tasks[idx], fields, mode)
+        yield formatted if mode == "jsonl" else f"{idx + 1}. {formatted}"
+
+
+def project_label(project: Dict[Any, Any], project_id: Optional[str]) -> str:
+    return f"{project.get('name', 'Inbox')} ({project_id})"
+
+
+async def fetch_all_projects(
+    client: "AsyncAPIClient", max_concurrency: Optional[int] = None
+) -> Tuple[Dict[str, Dict[Any, Any]], Dict[str, List[Dict[Any, Any]]], List[str]]:
+    """
+    Fetch every project with its tasks. Return the projects and their tasks by project
+    id, in the order of get_projects, and the labels of the projects that failed.
+    """
+    projects: Dict[str, Dict[Any, Any]] = {}
+    tasks: Dict[str, List[Dict[Any, Any]]] = {}
+    failed = []
+    for details in await client.get_all_project_details(max_concurrency):
+        project = details["project"]
+        if "error" in details:
+            failed.append(project_label(project, project.get("id")))
+        else:
+            projects[project.get("id")] = project
+            tasks[project.get("id")] = details.get("tasks", [])
+    return projects, tasks, failed
+
+
+def failed_projects_note(failed: List[str]) -> str:
+    return f"Failed to fetch projects: {', '.join(failed)}"
+
+
+def filter_fetched_tasks(
+    client: "AsyncAPIClient",
+    filter_fields: List[str],
+    fetched: Dict[str, List[Dict[Any, Any]]],
+) -> List[Dict[Any, Any]]:
+    """
+    Filter the tasks fetched per project id: through the mirror or the index for the
+    projects they hold, and on the fetched tasks for the others (a read that overlapped
+    a write is not indexed), so no project is left out.
+    """
+    compiled = compile_filter(filter_fields)
+    indexed = [pid for pid in fetched if client.index.has_project(pid)]
+    if not indexed:
+        filtered = []
+    elif client.mirror is not None:
+        filtered = client.mirror.query(filter_fields, indexed)
+    else:
+        filtered = client.index.select(compiled, indexed)
+    for project_id, tasks in fetched.items():
+        if project_id not in indexed:
+            filtered.extend(compiled.apply(tasks))
+    return filtered
 
 
 @mcp.prompt()
@@ -56,81 +447,145 @@ def generate_new_task_request(task_description: str) -> str:
     """
     return f"""Use the MCP, create new task(s) with the following description: {task_description}. 
 You should split the task into subtasks(capstones) and fill the details for the task. If the subtask items are supposed to have due date, create it as a Task.
-The task should have a appropriate due date. Take other tasks in the week into consideration.
+The task should have a appropriate due date. Take other tasks in the week into consideration, get_agenda lists them.
+When there are several tasks, create them together with a single create_tasks call.
 """
 
 
-@mcp.tool()
-def get_projects() -> str:
+@tool()
+async def get_projects(
+    fields: Optional[List[str]] = None, mode: OutputMode = "verbose"
+) -> str:
     """
     Get a list of all Projects(collections of tasks). The inbox contains all tasks that are not allocated to any project.
 
+    Args:
+        fields (List[str]): Project fields to include, e.g. ["id", "name"]. Default all
+        mode (str): "verbose", "compact" (one line per project) or "jsonl" (one JSON object per line). Default "verbose"
+
     Returns:
         str: Formatted list of projects
     """
     try:
-        projects = client.get_projects()
+        client = get_client()
+        projects = await client.get_projects()
         projects = list(filter(lambda x: not x.get("closed"), projects))
         formatted = []
         if projects:
             for k, v in enumerate(projects, 1):
-                formatted.append(f"{k}. {format_project(v)}")
-        return "\n\n".join(formatted)
+                entry = format_project(v, fields, mode)
+                formatted.append(entry if mode == "jsonl" else f"{k}. {entry}")
+        return listing_separator(mode).join(formatted)
     except Exception as e:
         logging.error(f"Error in get_projects: {e}")
         return f"Error in get_projects: {e}"
 
 
-@mcp.tool()
-def get_project_by_id(project_id: str) -> str:
+@tool()
+async def get_project_by_id(
+    project_id: str, fields: Optional[List[str]] = None, mode: OutputMode = "verbose"
+) -> str:
     """
     get a project details by id, no tasks included.
 
     Args:
         project_id (str): The ID of the project to get details for.
+        fields (List[str]): Project fields to include. Default all
+        mode (str): "verbose", "compact" or "jsonl". Default "verbose"
 
     Returns:
         str: Formatted single project details
     """
     try:
-        project = client.get_project_by_id(project_id)
-        return format_project(project)
+        client = get_client()
+        project = await client.get_project_by_id(project_id)
+        return format_project(project, fields, mode)
     except Exception as e:
         logging.error(f"Error in get_project_by_id: {e}")
         return f"Error in get_project_by_id: {e}"
 
 
-@mcp.tool()
-def get_project_details(project_id: str) -> str:
+@tool()
+async def get_project_details(
+    project_id: str,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    max_chars: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
     """
-    Get a project(collections of tasks) details and a list of tasks in the project.
-    Note the tasks might be very long, use filter_project_tasks to filter out the task you need.
+    Get a project(collections of tasks) details and a page of the tasks in the project.
+    Projects can be large, so tasks come in pages: pass the returned cursor to get the next page.
+    Use filter_project_tasks to filter out the task you need instead of paging through everything.
 
     Args:
         project_id (str): The ID of the project to get details for.
+        limit (int): Maximum number of tasks in this page, at least 1. Default 50
+        offset (int): Index of the first task of the page, ignored when cursor is given. Optional
+        cursor (str): The cursor returned by the previous page. Optional
+        sort (str): Task field to sort by, prefix with "-" for descending, e.g. "dueDate", "-priority". Optional
+        max_chars (int): Stop adding tasks once the page would exceed this many characters. Optional
+        fields (List[str]): Task fields to include, e.g. ["id", "title", "dueDate"]. Default all
+        mode (str): "verbose", "compact" (one line per task) or "jsonl" (one JSON object per line). Default "verbose"
 
     Returns:
-        str: Formatted single project details and tasks in the project.
+        str: Formatted project details (first page only) and a page of tasks, followed by the next cursor if any.
     """
     try:
-        details = client.get_project_details(project_id)
-        formatted = []
+        client = get_client()
+        if cursor:
+            offset, sort = decode_cursor(cursor)
+        if limit < 1:
+            return "Error in get_project_details: limit must be at least 1"
+        if offset < 0:
+            return "Error in get_project_details: offset must not be negative"
+        details = await client.get_project_details(project_id)
+        sep = listing_separator(mode)
+        formatted = [current_time_header()]
         if details:
-            formatted.append("Project Details:")
-            project = details.get("project", {})
-            tasks = details.get("tasks", [])
-            formatted.append(format_project(project))
-            formatted.append("Tasks:")
-            for idx, task in enumerate(tasks, 1):
-                formatted.append(f"{idx}. {format_task(task)}")
-        return "\n\n".join(formatted)
+            tasks = sort_tasks(details.get("tasks", []), sort)
+            if offset == 0:
+                formatted.append("Project Details:")
+                formatted.append(format_project(details.get("project", {}), mode=mode))
+            if offset >= len(tasks):
+                # No page and no cursor, so following cursors always ends
+                formatted.append(
+                    f"No tasks at offset {offset}, the project has {len(tasks)} tasks."
+                    if tasks
+                    else "No tasks in the project."
+                )
+                return sep.join(formatted)
+            size = sum(len(part) + len(sep) for part in formatted)
+            page = []
+            entries = iter_formatted_tasks(tasks, offset, fields, mode)
+            for entry in islice(entries, limit):
+                if max_chars and page and size + len(entry) + len(sep) > max_chars:
+                    break
+                page.append(entry)
+                size += len(entry) + len(sep)
+            end = offset + len(page)
+            formatted.append(f"Tasks {offset + 1}-{end} of {len(tasks)}:")
+            formatted.extend(page)
+            if end < len(tasks):
+                formatted.append(f"Next cursor: {encode_cursor(end, sort)}")
+            else:
+                formatted.append("No more tasks.")
+        return sep.join(formatted)
     except Exception as e:
         logging.error(f"Error in get_project_details: {e}")
         return f"Error in get_project_details: {e}"
 
 
-@mcp.tool()
-def filter_project_tasks(project_id: str, filter_fields: List[str]) -> str:
+@tool()
+async def filter_project_tasks(
+    project_id: str,
+    filter_fields: List[str],
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
     """
     Filter the tasks in a project.
     Return only those tasks for which **all** filter expressions match.
@@ -142,29 +597,315 @@ def filter_project_tasks(project_id: str, filter_fields: List[str]) -> str:
       ["dueDate <= tomorrow(or iso format date)",
        "startDate <= today(or iso format date)",
        "priority >= high(or low, medium, none)"]
+    An expression may also combine clauses with and / or / not and parentheses, and use
+    "in [a, b]", "contains" (text, tags) and "between a and b" (inclusive). Quote values with spaces.
+     e.g.
+      ["dueDate between today and 2025-07-10",
+       "priority in [high, medium] or tags contains urgent",
+       "not title contains 'weekly review'"]
 
     Args:
         project_id (str): The ID of the project to filter tasks for.
         filter_fields (List[str]): The fields to filter the tasks by.
+        fields (List[str]): Task fields to include in the output, e.g. ["id", "title", "dueDate"]. Default all
+        mode (str): "verbose", "compact" (one line per task) or "jsonl" (one JSON object per line). Default "verbose"
 
     Returns:
         str: Formatted list of filtered tasks
     """
     try:
-        tasks = client.get_project_details(project_id).get("tasks", [])
-        filtered = filter_task(tasks, filter_fields)
-        formatted = []
-        if filtered:
+        client = get_client()
+        details = await client.get_project_details(project_id)
+        if "error" in details:
+            # The mirror and the index may hold an older copy, do not pass it off as current
+            return f"Error in filter_project_tasks: {details['error']}"
+        tasks = details.get("tasks", [])
+        # The read above keeps the mirror and the index in sync with the project
+        with span("filter", tasks=len(tasks)) as filter_span:
+            filtered = filter_fetched_tasks(client, filter_fields, {project_id: tasks})
+            filter_span.set("matched", len(filtered))
+        with span("format", tasks=len(filtered), mode=mode):
+            formatted = [current_time_header()]
             for task in filtered:
-                formatted.append(format_task(task))
-        return "\n\n".join(formatted)
+                formatted.append(format_task(task, fields, mode))
+            return listing_separator(mode).join(formatted)
     except Exception as e:
         logging.error(f"Error in filter_project_tasks: {e}")
         return f"Error in filter_project_tasks: {e}"
 
 
-@mcp.tool()
-def create_project(
+@tool()
+async def filter_all_tasks(
+    filter_fields: List[str],
+    max_concurrency: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
+    """
+    Filter the tasks across all projects, Inbox included, in one call.
+    Use this instead of calling get_project_details for every project, e.g. for "what's due this week".
+    The filter expressions are the same as filter_project_tasks.
+
+    Args:
+        filter_fields (List[str]): The fields to filter the tasks by.
+        max_concurrency (int): Maximum number of projects fetched at the same time. Optional
+        fields (List[str]): Task fields to include in the output. Default all
+        mode (str): "verbose", "compact" (one line per task) or "jsonl" (one JSON object per line). Default "verbose"
+
+    Returns:
+        str: Formatted list of filtered tasks, each one tagged with the project it belongs to.
+    """
+    try:
+        client = get_client()
+        projects, fetched, failed = await fetch_all_projects(client, max_concurrency)
+
+        with span("filter", projects=len(projects)) as filter_span:
+            filtered = filter_fetched_tasks(client, filter_fields, fetched)
+            filter_span.set("matched", len(filtered))
+        with span("format", tasks=len(filtered), mode=mode):
+            formatted = [current_time_header()]
+            for task in filtered:
+                project_id = task.get("projectId")
+                label = project_label(projects.get(project_id, {}), project_id)
+                entry = format_task(task, fields, mode)
+                if mode == "jsonl":
+                    # Keep one object per line, the project is already named by projectId
+                    formatted.append(entry)
+                elif mode == "compact":
+                    formatted.append(f"[{label}] {entry}")
+                else:
+                    formatted.append(f"project: {label}\n{entry}")
+        if failed:
+            formatted.append(failed_projects_note(failed))
+        return listing_separator(mode).join(formatted)
+    except Exception as e:
+        logging.error(f"Error in filter_all_tasks: {e}")
+        return f"Error in filter_all_tasks: {e}"
+
+
+@tool()
+async def summarize_tasks(
+    project_id: Optional[str] = None,
+    per_project: bool = True,
+    max_concurrency: Optional[int] = None,
+    mode: OutputMode = "verbose",
+) -> str:
+    """
+    Count tasks instead of listing them: open/completed, due buckets (overdue, today, tomorrow,
+    next 7 days, later, no due date), priority, most used tags, earliest due date and open subtasks.
+    Use this for questions like "how many tasks are overdue" instead of fetching task lists.
+    The output size does not depend on the number of tasks.
+
+    Args:
+        project_id (str): Summarize only this project. Default every project, Inbox included
+        per_project (bool): With every project, also summarize each one, not only the total. Default True
+        max_concurrency (int): Maximum number of projects fetched at the same time. Optional
+        mode (str): "verbose", "compact" (one line per summary) or "jsonl" (one JSON object per line). Default "verbose"
+
+    Returns:
+        str: The summaries, one per project then the total when several projects are summarized.
+    """
+    try:
+        client = get_client()
+        if project_id:
+            details = await client.get_project_details(project_id)
+            if "error" in details:
+                return f"Error in summarize_tasks: {details['error']}"
+            projects = {project_id: details.get("project") or {}}
+            fetched = {project_id: details.get("tasks", [])}
+            failed = []
+        else:
+            projects, fetched, failed = await fetch_all_projects(
+                client, max_concurrency
+            )
+
+        with span("summarize", projects=len(projects)):
+            total = TaskSummary()
+            summaries = []
+            for pid, project in projects.items():
+                summary = TaskSummary(total.today).update(fetched[pid])
+                total.merge(summary)
+                summaries.append((project_label(project, pid), summary))
+
+        formatted = [current_time_header()]
+        if project_id or per_project:
+            for label, summary in summaries:
+                formatted.append(format_summary(label, summary.to_dict(), mode))
+        if not project_id:
+            formatted.append(format_summary("All projects", total.to_dict(), mode))
+        if failed:
+            formatted.append(failed_projects_note(failed))
+        return listing_separator(mode).join(formatted)
+    except Exception as e:
+        logging.error(f"Error in summarize_tasks: {e}")
+        return f"Error in summarize_tasks: {e}"
+
+
+def format_agenda_entry(
+    entry: AgendaEntry,
+    project_label: str,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "compact",
+) -> str:
+    when = entry.kind if entry.time is None else f"{entry.kind} {entry.time}"
+    if entry.repeat:
+        when += ", repeat"
+    if mode == "jsonl":
+        data = {
+            "date": entry.day.isoformat(),
+            "kind": entry.kind,
+            "time": entry.time,
+            "repeat": entry.repeat,
+        }
+        data.update(
+            (k, v)
+            for k, v in _project_fields(entry.task, fields).items()
+            if _non_empty(v)
+        )
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    formatted = format_task(entry.task, fields, mode)
+    if mode == "compact":
+        return f"  - [{when}] [{project_label}] {formatted}"
+    return f"[{when}] project: {project_label}\n{formatted}"
+
+
+@tool()
+async def get_agenda(
+    start: str = "today",
+    end: Optional[str] = None,
+    timezone: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "compact",
+) -> str:
+    """
+    List the tasks starting or due in a date window across all projects, Inbox included,
+    grouped by day. Repeating tasks are listed on each of their occurrences in the window.
+    Use this to plan a week or check what is scheduled on given days, instead of fetching
+    every project.
+
+    Args:
+        start (str): First day, "YYYY-MM-DD", "today", "tomorrow" or "yesterday". Default "today"
+        end (str): Last day (included), same formats. Default 6 days after start (a week)
+        timezone (str): IANA time zone of the days, e.g. "Asia/Shanghai". Default the server's
+        max_concurrency (int): Maximum number of projects fetched at the same time. Optional
+        fields (List[str]): Task fields to include in the output. Default all
+        mode (str): "verbose", "compact" (one line per task) or "jsonl" (one JSON object per line). Default "compact"
+
+    Returns:
+        str: The days of the window that have tasks, each followed by its tasks: all-day ones
+        first, then by time, each marked start or due, and "repeat" for upcoming occurrences.
+    """
+    try:
+        tz = zone(timezone)
+        today = datetime.now(tz).date()
+        low = resolve_date_keyword(start, today)
+        high = resolve_date_keyword(end, today) if end else low + timedelta(days=6)
+        if high < low:
+            return "Error in get_agenda: end is before start"
+        if (high - low).days >= MAX_AGENDA_DAYS:
+            return (
+                f"Error in get_agenda: the window is limited to {MAX_AGENDA_DAYS} days"
+            )
+
+        client = get_client()
+        projects, fetched, failed = await fetch_all_projects(client, max_concurrency)
+
+        with span(
+            "agenda", projects=len(projects), days=(high - low).days + 1
+        ) as agenda_span:
+            # Stored dates are UTC-ish timestamps, their local day is at most one day off
+            indexed = [pid for pid in fetched if client.index.has_project(pid)]
+            candidates = client.index.dated_between(
+                low - timedelta(days=1), high + timedelta(days=1), indexed
+            )
+            # Projects left out of the index: build_agenda picks the dates from all their tasks
+            for project_id, tasks in fetched.items():
+                if project_id not in indexed:
+                    candidates.extend(tasks)
+            agenda = build_agenda(candidates, low, high, tz)
+            agenda_span.set("candidates", len(candidates))
+        with span("format", days=len(agenda), mode=mode):
+            formatted = [
+                current_time_header(),
+                f"Agenda {low.isoformat()} to {high.isoformat()} ({tz})",
+            ]
+            for day, entries in agenda.items():
+                lines = []
+                if mode != "jsonl":
+                    lines.append(f"{day.isoformat()} {day.strftime('%A')}:")
+                for entry in entries:
+                    project_id = entry.task.get("projectId")
+                    label = project_label(projects.get(project_id, {}), project_id)
+                    lines.append(format_agenda_entry(entry, label, fields, mode))
+                formatted.append(listing_separator(mode).join(lines))
+            if not agenda:
+                formatted.append("No tasks in this window.")
+        if failed:
+            formatted.append(failed_projects_note(failed))
+        return listing_separator(mode).join(formatted)
+    except Exception as e:
+        logging.error(f"Error in get_agenda: {e}")
+        return f"Error in get_agenda: {e}"
+
+
+@tool()
+async def get_project_changes(
+    project_id: str,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "compact",
+) -> str:
+    """
+    Get only what changed in a project since a previous call: tasks added, modified, completed or removed.
+    Use this to watch a project instead of calling get_project_details again and again.
+    Call it first without a cursor to get one, then pass the cursor returned by each call to the next.
+
+    Args:
+        project_id (str): The ID of the project to watch.
+        cursor (str): The cursor returned by the previous call. Optional
+        fields (List[str]): Task fields to include in the output. Default all
+        mode (str): "verbose", "compact" (one line per task) or "jsonl" (one JSON object per line). Default "compact"
+
+    Returns:
+        str: The changed tasks grouped by kind of change, followed by the next cursor.
+    """
+    try:
+        client = get_client()
+        changes = await client.get_project_changes(project_id, cursor)
+        if "error" in changes:
+            return f"Error in get_project_changes: {changes['error']}"
+        sep = listing_separator(mode)
+        formatted = [current_time_header()]
+        if changes.get("baseline"):
+            formatted.append(
+                f"Watching {changes['total']} open tasks, pass the cursor to get changes."
+            )
+        else:
+            if changes.get("expired"):
+                formatted.append("Cursor expired, every open task is listed as added.")
+            counts = ", ".join(
+                f"{len(changes[kind])} {kind}"
+                for kind in ("added", "modified", "completed", "removed")
+            )
+            formatted.append(f"Changes: {counts}")
+            for kind in ("added", "modified", "completed"):
+                if changes[kind]:
+                    formatted.append(f"{kind.capitalize()}:")
+                    formatted.extend(
+                        format_task(task, fields, mode) for task in changes[kind]
+                    )
+            if changes["removed"]:
+                formatted.append(f"Removed: {', '.join(changes['removed'])}")
+        formatted.append(f"Next cursor: {changes['cursor']}")
+        return sep.join(formatted)
+    except Exception as e:
+        logging.error(f"Error in get_project_changes: {e}")
+        return f"Error in get_project_changes: {e}"
+
+
+@tool()
+async def create_project(
     name: str,
     color: Optional[str] = None,
     sortOrder: Optional[int] = None,
@@ -185,7 +926,8 @@ def create_project(
         str: Formatted single project details
     """
     try:
-        project = client.create_project(
+        client = get_client()
+        project = await client.create_project(
             name,
             color=color,
             sortOrder=sortOrder,
@@ -198,8 +940,8 @@ def create_project(
         return f"Error in create_project: {e}"
 
 
-@mcp.tool()
-def update_project(
+@tool()
+async def update_project(
     project_id: str,
     name: Optional[str] = None,
     color: Optional[str] = None,
@@ -219,7 +961,8 @@ def update_project(
         kind (str): The kind of the project. Options: TASK, NOTE. Optional
     """
     try:
-        project = client.update_project(
+        client = get_client()
+        project = await client.update_project(
             project_id,
             name=name,
             color=color,
@@ -233,28 +976,36 @@ def update_project(
         return f"Error in update_project: {e}"
 
 
-@mcp.tool()
-def delete_project(project_id: str) -> str:
+@tool()
+async def delete_project(project_id: str) -> str:
     """
     Delete a project(collection of tasks).
     """
     try:
-        client.delete_project(project_id)
+        client = get_client()
+        await client.delete_project(project_id)
         return f"Project {project_id} deleted successfully"
     except Exception as e:
         logging.error(f"Error in delete_project: {e}")
         return f"Error in delete_project: {e}"
 
 
-@mcp.tool()
-def get_task_by_id(project_id: str, task_id: str) -> str:
+@tool()
+async def get_task_by_id(
+    project_id: str,
+    task_id: str,
+    fields: Optional[List[str]] = None,
+    mode: OutputMode = "verbose",
+) -> str:
     """
     Get a task by id.
+    fields limits the output to the given task fields, mode is "verbose", "compact" or "jsonl".
     """
     try:
-        task = client.get_task_by_id(project_id, task_id)
+        client = get_client()
+        task = await client.get_task_by_id(project_id, task_id)
         if isinstance(task, dict):
-            return format_task(task)
+            return f"{current_time_header()}\n{format_task(task, fields, mode)}"
         else:
             return f"Task {task_id} not found"
     except Exception as e:
@@ -262,8 +1013,8 @@ def get_task_by_id(project_id: str, task_id: str) -> str:
         return f"Error in get_task_by_id: {e}"
 
 
-@mcp.tool()
-def create_task(
+@tool()
+async def create_task(
     project_id: str,
     title: str,
     content: Optional[str] = None,
@@ -298,7 +1049,8 @@ def create_task(
         str: Formatted single task details
     """
     try:
-        task = client.create_task(
+        client = get_client()
+        task = await client.create_task(
             project_id,
             title,
             content=content,
@@ -319,8 +1071,47 @@ def create_task(
         return f"Error in create_task: {e}, {items}"
 
 
-@mcp.tool()
-def update_task(
+@tool()
+async def create_tasks(
+    tasks: List[Dict[str, Any]], max_concurrency: Optional[int] = None
+) -> str:
+    """
+    Create several tasks at once, e.g. all the tasks of a decomposed plan, instead of calling create_task repeatedly.
+    The tasks are submitted concurrently; one failing task does not stop the others.
+
+    Args:
+        tasks (list): The tasks to create, each one a dict with the same fields as create_task:
+            project_id and title are required; content, isAllDay, startDate, dueDate, repeatFlag,
+            priority, sortOrder and items are optional. Example: [{
+                    "project_id": "...", "title": "Draft outline", "dueDate": "2019-11-13T03:00:00+0000"
+                },{
+                    "project_id": "...", "title": "Write chapter 1", "priority": 3
+                }]
+        max_concurrency (int): Maximum number of tasks submitted at the same time. Optional
+
+    Returns:
+        str: One line per task, in order: the created task id, or the error for that task.
+    """
+    try:
+        client = get_client()
+        results = await client.create_tasks(tasks, max_concurrency)
+        lines = []
+        created = 0
+        for idx, (spec, task) in enumerate(zip(tasks, results), 1):
+            if isinstance(task, dict) and task.get("id") and "error" not in task:
+                created += 1
+                lines.append(f"{idx}. created {task['id']}: {task.get('title')}")
+            else:
+                error = task.get("error") if isinstance(task, dict) else task
+                lines.append(f"{idx}. error: {error} ({spec.get('title')})")
+        return "\n".join([f"Created {created}/{len(tasks)} tasks"] + lines)
+    except Exception as e:
+        logging.error(f"Error in create_tasks: {e}")
+        return f"Error in create_tasks: {e}"
+
+
+@tool()
+async def update_task(
     task_id: str,
     project_id: str,
     title: Optional[str] = None,
@@ -354,7 +1145,8 @@ def update_task(
                 }]
     """
     try:
-        task = client.update_task(
+        client = get_client()
+        task = await client.update_task(
             task_id,
             project_id,
             title=title,
@@ -376,27 +1168,146 @@ def update_task(
         return f"Error in update_task: {e}, {items}"
 
 
-@mcp.tool()
-def complete_task(project_id: str, task_id: str) -> str:
+@tool()
+async def complete_task(project_id: str, task_id: str) -> str:
     """
     Complete a task.
     """
     try:
-        client.complete_task(project_id, task_id)
+        client = get_client()
+        await client.complete_task(project_id, task_id)
         return f"Task {task_id} completed successfully"
     except Exception as e:
         logging.error(f"Error in complete_task: {e}")
         return f"Error in complete_task: {e}"
 
 
-@mcp.tool()
-def delete_task(project_id: str, task_id: str) -> str:
+@tool()
+async def delete_task(project_id: str, task_id: str) -> str:
     """
     Delete a task.
     """
     try:
-        client.delete_task(project_id, task_id)
+        client = get_client()
+        await client.delete_task(project_id, task_id)
         return f"Task {task_id} deleted successfully"
     except Exception as e:
         logging.error(f"Error in delete_task: {e}")
         return f"Error in delete_task: {e}"
+
+
+@tool()
+async def update_tasks(
+    updates: List[Dict[str, Any]], max_concurrency: Optional[int] = None
+) -> str:
+    """
+    Update several tasks at once, e.g. to reschedule a sprint, instead of calling update_task repeatedly.
+    Transient failures are retried; only the tasks that still failed are listed in the response.
+
+    Args:
+        updates (list): The updates, each one a dict with task_id and project_id plus the fields to change,
+            same fields as update_task. Example: [{
+                    "task_id": "...", "project_id": "...", "dueDate": "2019-11-13T03:00:00+0000"
+                }]
+        max_concurrency (int): Maximum number of requests at the same time. Optional
+
+    Returns:
+        str: Number of updated tasks, and the error of each failed one.
+    """
+    try:
+        client = get_client()
+        results = await client.update_tasks(updates, max_concurrency)
+        return format_batch_result("Updated", updates, results)
+    except Exception as e:
+        logging.error(f"Error in update_tasks: {e}")
+        return f"Error in update_tasks: {e}"
+
+
+@tool()
+async def complete_tasks(
+    tasks: List[Dict[str, str]], max_concurrency: Optional[int] = None
+) -> str:
+    """
+    Complete several tasks at once.
+    Transient failures are retried; only the tasks that still failed are listed in the response.
+
+    Args:
+        tasks (list): The tasks to complete, e.g. [{"project_id": "...", "task_id": "..."}]
+        max_concurrency (int): Maximum number of requests at the same time. Optional
+
+    Returns:
+        str: Number of completed tasks, and the error of each failed one.
+    """
+    try:
+        client = get_client()
+        results = await client.complete_tasks(tasks, max_concurrency)
+        return format_batch_result("Completed", tasks, results)
+    except Exception as e:
+        logging.error(f"Error in complete_tasks: {e}")
+        return f"Error in complete_tasks: {e}"
+
+
+@tool()
+async def delete_tasks(
+    tasks: List[Dict[str, str]], max_concurrency: Optional[int] = None
+) -> str:
+    """
+    Delete several tasks at once.
+    Transient failures are retried; only the tasks that still failed are listed in the response.
+
+    Args:
+        tasks (list): The tasks to delete, e.g. [{"project_id": "...", "task_id": "..."}]
+        max_concurrency (int): Maximum number of requests at the same time. Optional
+
+    Returns:
+        str: Number of deleted tasks, and the error of each failed one.
+    """
+    try:
+        client = get_client()
+        results = await client.delete_tasks(tasks, max_concurrency)
+        return format_batch_result("Deleted", tasks, results)
+    except Exception as e:
+        logging.error(f"Error in delete_tasks: {e}")
+        return f"Error in delete_tasks: {e}"
+
+
+@mcp.resource("dida365://stats/cache", mime_type="application/json")
+def cache_stats() -> str:
+    """
+    Hit/miss counters of the API response cache of the current account.
+    """
+    client = clients.peek(current_account())
+    if client is None:
+        return json.dumps({})
+    return json.dumps(client.cache.stats())
+
+
+@mcp.resource("dida365://stats/requests", mime_type="application/json")
+def request_stats() -> str:
+    """
+    Upstream request counters of the current account: scheduler retries and throttling,
+    coalesced GETs.
+    """
+    client = clients.peek(current_account())
+    if client is None:
+        return json.dumps({})
+    return json.dumps(
+        {**client.scheduler.stats(), "coalesced": client.flights.coalesced}
+    )
+
+
+@mcp.resource("dida365://stats/clients", mime_type="application/json")
+def client_stats() -> str:
+    """
+    The API client pool: accounts with a client, their idle time and calls in progress.
+    """
+    return json.dumps(clients.stats())
+
+
+@mcp.resource("dida365://stats/metrics", mime_type="application/json")
+def latency_metrics() -> str:
+    """
+    Latency and size histograms (count, mean, p50/p95/p99) of upstream requests
+    per endpoint and status, and of tool calls.
+    """
+    return json.dumps(metrics.snapshot())
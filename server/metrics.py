@@ -0,0 +1,304 @@
+import functools
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Upper bounds of the histogram buckets, +Inf is implied
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_ID_SEGMENT = re.compile(r"(/project|/task)/[^/]+")
+
+
+@functools.lru_cache(maxsize=1024)
+def endpoint_template(url: str) -> str:
+    """
+    "/project/abc/task/def/complete" -> "/project/{id}/task/{id}/complete",
+    so metrics are labelled per endpoint rather than per object.
+    """
+    return _ID_SEGMENT.sub(r"\1/{id}", url)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: observing is a bisect and a few additions.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate of the q-quantile, interpolated inside its bucket like Prometheus'
+        histogram_quantile, within the observed min and max.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = max(self.bounds[idx - 1] if idx else 0.0, self.min)
+                high = min(
+                    self.bounds[idx] if idx < len(self.bounds) else self.max, self.max
+                )
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def summary(self, scale: float = 1.0, digits: int = 3) -> Dict[str, Any]:
+        def fmt(v: Optional[float]) -> Optional[float]:
+            return None if v is None else round(v * scale, digits)
+
+        return {
+            "count": self.count,
+            "mean": fmt(self.sum / self.count) if self.count else None,
+            "p50": fmt(self.quantile(0.5)),
+            "p95": fmt(self.quantile(0.95)),
+            "p99": fmt(self.quantile(0.99)),
+        }
+
+
+class _Series:
+    __slots__ = ("duration", "size", "errors")
+
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.errors = 0
+
+
+class Metrics:
+    """
+    In-process histograms of upstream requests (per method, endpoint template and status)
+    and of tool calls (per tool): duration and response/output size.
+    """
+
+    def __init__(self):
+        self._requests: Dict[Tuple[str, str, str], _Series] = {}
+        self._tools: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(
+        self, method: str, url: str, status: Any, duration: float, size: int
+    ) -> None:
+        key = (method, endpoint_template(url), str(status))
+        with self._lock:
+            series = self._requests.get(key)
+            if series is None:
+                series = self._requests[key] = _Series()
+            series.duration.observe(duration)
+            series.size.observe(size)
+
+    def observe_tool(
+        self, name: str, duration: float, size: int, error: bool = False
+    ) -> None:
+        with self._lock:
+            series = self._tools.get(name)
+            if series is None:
+                series = self._tools[name] = _Series()
+            series.duration.observe(duration)
+            series.size.observe(size)
+            series.errors += error
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._tools.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Counts and estimated latency percentiles (ms), for the MCP resource.
+        """
+        with self._lock:
+            return {
+                "requests": [
+                    {
+                        "method": method,
+                        "endpoint": endpoint,
+                        "status": status,
+                        "duration_ms": s.duration.summary(1000),
+                        "bytes": s.size.sum,
+                    }
+                    for (method, endpoint, status), s in self._requests.items()
+                ],
+                "tools": {
+                    name: {
+                        "duration_ms": s.duration.summary(1000),
+                        "errors": s.errors,
+                        "output_bytes": s.size.summary(digits=0),
+                    }
+                    for name, s in self._tools.items()
+                },
+            }
+
+    def prometheus(self) -> str:
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def histogram(name: str, labels: str, h: Histogram) -> None:
+            cumulative = 0
+            for bound, n in zip(h.bounds + (float("inf"),), h.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {h.sum:g}")
+            lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+        with self._lock:
+            lines.append("# TYPE dida365_request_duration_seconds histogram")
+            for (method, endpoint, status), s in self._requests.items():
+                labels = f'method="{method}",endpoint="{endpoint}",status="{status}"'
+                histogram("dida365_request_duration_seconds", labels, s.duration)
+            lines.append("# TYPE dida365_request_bytes histogram")
+            for (method, endpoint, status), s in self._requests.items():
+                labels = f'method="{method}",endpoint="{endpoint}",status="{status}"'
+                histogram("dida365_request_bytes", labels, s.size)
+            lines.append("# TYPE dida365_tool_duration_seconds histogram")
+            for name, s in self._tools.items():
+                histogram("dida365_tool_duration_seconds", f'tool="{name}"', s.duration)
+            lines.append("# TYPE dida365_tool_output_bytes histogram")
+            for name, s in self._tools.items():
+                histogram("dida365_tool_output_bytes", f'tool="{name}"', s.size)
+            lines.append("# TYPE dida365_tool_errors_total counter")
+            for name, s in self._tools.items():
+                lines.append(f'dida365_tool_errors_total{{tool="{name}"}} {s.errors}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def instrument_tool(
+    fn: Callable[..., Awaitable[str]],
+) -> Callable[..., Awaitable[str]]:
+    """
+    Record the duration and output size of every call of an async tool.
+    Tools report failures as "Error in ..." strings, those count as errors.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            metrics.observe_tool(name, time.perf_counter() - start, 0, error=True)
+            raise
+        size = len(result.encode("utf-8")) if isinstance(result, str) else 0
+        metrics.observe_tool(
+            name,
+            time.perf_counter() - start,
+            size,
+            error=isinstance(result, str) and result.startswith("Error in"),
+        )
+        return result
+
+    return wrapper
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def _write_file(path: str, interval: float) -> None:
+    while True:
+        directory = os.path.dirname(os.path.abspath(path))
+        try:
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(metrics.prometheus())
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.error(f"Failed to write metrics to {path}: {e}")
+        time.sleep(interval)
+
+
+def start_exporters() -> None:
+    """
+    Start the optional Prometheus exporters, once per process:
+    TICKTICK_METRICS_PORT serves /metrics on localhost, TICKTICK_METRICS_FILE is
+    rewritten every TICKTICK_METRICS_INTERVAL seconds (for node_exporter's textfile collector).
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    port = os.getenv("TICKTICK_METRICS_PORT")
+    if port:
+        # Imported here: only needed when the exporter is enabled
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404, "Not Found")
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _Handler)
+        except (OSError, OverflowError, ValueError) as e:
+            # e.g. the port is taken by another server process: the tools work without it
+            logging.error(f"Cannot serve metrics on port {port}: {e}")
+        else:
+            server.daemon_threads = True
+            threading.Thread(
+                target=server.serve_forever, name="MetricsExporter", daemon=True
+            ).start()
+            logging.info(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+
+    path = os.getenv("TICKTICK_METRICS_FILE")
+    if path:
+        interval = float(os.getenv("TICKTICK_METRICS_INTERVAL") or 15)
+        threading.Thread(
+            target=_write_file, args=(path, interval), name="MetricsFile", daemon=True
+        ).start()
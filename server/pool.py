@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+
+class _Entry:
+    __slots__ = ("client", "last_used")
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.last_used = time.monotonic()
+
+
+class ClientPool:
+    """
+    API clients by account, built by `factory` on first use and kept warm (connection pool,
+    caches, indexes) between calls. At most `max_clients` are kept: beyond that, and after
+    `idle_timeout` seconds without a call, the least recently used clients are closed.
+    A client is never closed while a call marked with `using()` runs on it.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_clients: int = 8,
+        idle_timeout: float = 900.0,
+    ):
+        self.factory = factory
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.evicted = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, account: str) -> Any:
+        """
+        The client of an account, built on first use. Exceptions of the factory
+        (e.g. AuthorizationPending) propagate and nothing is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(account)
+            if entry is None:
+                entry = _Entry(self.factory(account))
+                self._entries[account] = entry
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(account)
+            evicted = self._evict_locked(keep=account)
+        self._close_later(evicted)
+        return entry.client
+
+    def peek(self, account: str) -> Optional[Any]:
+        """
+        The client of an account if it is built, without building nor touching it.
+        """
+        entry = self._entries.get(account)
+        return entry.client if entry is not None else None
+
+    def put(self, account: str, client: Any) -> None:
+        """
+        Use an already built client for an account (e.g. one pointed at a test server).
+        """
+        with self._lock:
+            self._entries[account] = _Entry(client)
+            self._entries.move_to_end(account)
+
+    @contextmanager
+    def using(self, account: str) -> Iterator[None]:
+        """
+        Mark a call in progress for an account, so its client is not evicted meanwhile.
+        """
+        with self._lock:
+            self._in_use[account] = self._in_use.get(account, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[account] -= 1
+                if not self._in_use[account]:
+                    del self._in_use[account]
+                entry = self._entries.get(account)
+                if entry is not None:
+                    entry.last_used = time.monotonic()
+
+    def evict_idle(self) -> None:
+        """
+        Close the clients idle for longer than `idle_timeout` now, rather than on the next get().
+        """
+        with self._lock:
+            evicted = self._evict_locked()
+        self._close_later(evicted)
+
+    async def evict_periodically(self, interval: Optional[float] = None) -> None:
+        """
+        Run evict_idle every `interval` seconds (a tenth of `idle_timeout` by default)
+        until cancelled, so idle clients are closed even when no call comes.
+        """
+        interval = interval or max(self.idle_timeout / 10, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def _evict_locked(self, keep: Optional[str] = None) -> List[Any]:
+        deadline = time.monotonic() - self.idle_timeout
+        evicted = []
+        # Least recently used first
+        for account, entry in list(self._entries.items()):
+            if account == keep or self._in_use.get(account):
+                continue
+            if entry.last_used < deadline or len(self._entries) > self.max_clients:
+                del self._entries[account]
+                evicted.append(entry.client)
+                self.evicted += 1
+                logging.info(f"Closing the idle API client of account {account}")
+        return evicted
+
+    def _close_later(self, clients: List[Any]) -> None:
+        if not clients:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to close them on, the connections go with the clients
+            return
+        for client in clients:
+            task = loop.create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def aclose(self) -> None:
+        """
+        Close every client.
+        """
+        with self._lock:
+            clients = [entry.client for entry in self._entries.values()]
+            self._entries.clear()
+        for client in clients:
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "clients": len(self._entries),
+            "max_clients": self.max_clients,
+            "evicted": self.evicted,
+            "accounts": {
+                account: {
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "in_use": self._in_use.get(account, 0),
+                }
+                for account, entry in self._entries.items()
+            },
+        }
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Methods that can be sent again without changing the outcome
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Connection errors raised before the request reached the server, safe to retry for any method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class TokenBucket:
+    """
+    Requests-per-second limiter for one host. A request reserves a token and waits
+    until the token is due, so callers are served in arrival order.
+    The rate adapts: halved on every 429, grown back slowly on success.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, return the seconds to wait before sending.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        """
+        The server answered 429: slow down, and hold every request of the host
+        for `retry_after` seconds when the server said so.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + retry_after
+                )
+
+    def succeeded(self) -> None:
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    The Retry-After header in seconds, given as a number or an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Sends the requests of a client: per-host token buckets, a cap on requests in flight,
+    and retries of 429, 5xx and connection errors with Retry-After or jittered
+    exponential backoff.
+    Mutations are only retried when it is safe: idempotent methods, 429 (the request
+    was rejected) and connection errors raised before anything was sent.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        max_in_flight: int = 16,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retries = 0
+        self.throttled = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._sync_slots = threading.BoundedSemaphore(max_in_flight)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+
+    def bucket(self, host: str) -> Optional[TokenBucket]:
+        if not self.rate:
+            return None
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**attempt))
+
+    def _retry_delay(
+        self,
+        args: Dict[str, Any],
+        attempt: int,
+        idempotent: Optional[bool],
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt, or None when the outcome is final.
+        """
+        if attempt >= self.max_retries:
+            return None
+        safe = (
+            idempotent
+            if idempotent is not None
+            else args["method"].upper() in IDEMPOTENT_METHODS
+        )
+        if error is not None:
+            if not (safe or isinstance(error, _NOT_SENT_ERRORS)):
+                return None
+            return self._backoff(attempt)
+        status = response.status_code
+        if status == 429:
+            self.throttled += 1
+            retry_after = parse_retry_after(response)
+            bucket = self.bucket(httpx.URL(args["url"]).host)
+            if bucket is not None:
+                bucket.throttled(retry_after)
+            if retry_after is not None:
+                # The bucket holds the host for that long, add jitter so waiters spread out
+                return min(self.backoff_cap, retry_after) + random.uniform(0, 0.1)
+            return self._backoff(attempt)
+        if status >= 500 and safe:
+            return self._backoff(attempt)
+        return None
+
+    def _log_retry(self, args: Dict[str, Any], attempt: int, delay: float, why) -> None:
+        self.retries += 1
+        logging.warning(
+            f"{args['method']} {args['url']} failed ({why}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+
+    def send(
+        self,
+        http: httpx.Client,
+        args: Dict[str, Any],
+        idempotent: Optional[bool] = None,
+    ) -> httpx.Response:
+        """
+        Send a request with `http.request(**args)`, retrying as described above.
+        Return the last response; raise the last connection error if every attempt failed.
+        """
+        bucket = self.bucket(httpx.URL(args["url"]).host)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                time.sleep(bucket.reserve())
+            response = error = None
+            with self._sync_slots:
+                try:
+                    response = http.request(**args)
+                except httpx.TransportError as e:
+                    error = e
+            delay = self._retry_delay(args, attempt, idempotent, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                if bucket is not None and response.status_code < 400:
+                    bucket.succeeded()
+                return response
+            self._log_retry(args, attempt, delay, error or response.status_code)
+            time.sleep(delay)
+            attempt += 1
+
+    async def asend(
+        self,
+        http: httpx.AsyncClient,
+        args: Dict[str, Any],
+        idempotent: Optional[bool] = None,
+    ) -> httpx.Response:
+        """
+        Asyncio counterpart of send.
+        """
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_in_flight)
+        bucket = self.bucket(httpx.URL(args["url"]).host)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                await asyncio.sleep(bucket.reserve())
+            response = error = None
+            async with self._async_slots:
+                try:
+                    response = await http.request(**args)
+                except httpx.TransportError as e:
+                    error = e
+            delay = self._retry_delay(args, attempt, idempotent, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                if bucket is not None and response.status_code < 400:
+                    bucket.succeeded()
+                return response
+            self._log_retry(args, attempt, delay, error or response.status_code)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rates": {host: round(b.rate, 2) for host, b in self._buckets.items()},
+        }
@@ -0,0 +1,294 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Finished spans are handed to every exporter
+Exporter = Callable[["Span"], None]
+_exporters: List[Exporter] = []
+# OpenTelemetry tracer, when spans are also mirrored to OpenTelemetry
+_otel_tracer: Any = None
+# Tracing is off, and spans are no-ops, without exporter nor OpenTelemetry
+_enabled = False
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "dida365_span", default=None
+)
+
+
+class Span:
+    """
+    A timed operation with attributes, nested under the span current when it starts
+    (per thread / asyncio task, through a ContextVar). Ids follow the W3C / OpenTelemetry format.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "duration",
+        "error",
+        "_started",
+        "_token",
+        "_otel",
+    )
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self._otel = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        if _otel_tracer is not None:
+            from opentelemetry import trace
+
+            context = None
+            if parent is not None and parent._otel is not None:
+                context = trace.set_span_in_context(parent._otel)
+            self._otel = _otel_tracer.start_span(self.name, context=context)
+        self._token = _current.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.duration = time.perf_counter() - self._started
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        if self._otel is not None:
+            self._otel.set_attributes(
+                {k: v for k, v in self.attributes.items() if v is not None}
+            )
+            if exc_value is not None:
+                self._otel.record_exception(exc_value)
+            self._otel.end()
+        for exporter in _exporters:
+            try:
+                exporter(self)
+            except Exception as e:
+                logging.error(f"Failed to export span {self.name}: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _refresh() -> None:
+    global _enabled
+    _enabled = bool(_exporters) or _otel_tracer is not None
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """
+    `with span("name", key=value) as s:` times the block as a child of the current span.
+    Returns a shared no-op span while tracing is disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def _id_arguments(fn: Callable) -> Callable[[tuple, dict], Dict[str, Any]]:
+    """
+    Extract the *_id arguments of a call to fn as span attributes.
+    """
+    parameters = inspect.signature(fn).parameters
+    names = [p for p in parameters if p != "self"]
+    offset = 1 if "self" in parameters else 0
+
+    def extract(args: tuple, kwargs: dict) -> Dict[str, Any]:
+        attributes = {
+            name: arg
+            for name, arg in zip(names, args[offset:])
+            if name.endswith("_id") and isinstance(arg, str)
+        }
+        for name, arg in kwargs.items():
+            if name.endswith("_id") and isinstance(arg, str):
+                attributes[name] = arg
+        return attributes
+
+    return extract
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator running every call of a function or coroutine function in a span,
+    with its *_id arguments as attributes. Costs one check per call while disabled.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        extract = _id_arguments(fn)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with Span(span_name, extract(args, kwargs)):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, extract(args, kwargs)):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    """
+    Class decorator tracing the public methods defined in the class body.
+    """
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+class JsonlExporter:
+    """
+    Append finished spans to a file, one JSON object per line.
+    Children finish, so are written, before their parents.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def add_exporter(exporter: Exporter) -> None:
+    _exporters.append(exporter)
+    _refresh()
+
+
+def remove_exporter(exporter: Exporter) -> None:
+    _exporters.remove(exporter)
+    _refresh()
+
+
+def enable_opentelemetry() -> bool:
+    """
+    Mirror spans to OpenTelemetry (optional dependency `opentelemetry-api`).
+    Spans go to the global tracer provider, e.g. the one set up by `opentelemetry-instrument`;
+    when none is set and `opentelemetry-sdk` with the OTLP exporter is installed, one exporting
+    to OTEL_EXPORTER_OTLP_ENDPOINT is installed. Return False when OpenTelemetry is missing.
+    """
+    global _otel_tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logging.warning(
+            "TICKTICK_TRACE_OTEL is set but opentelemetry-api is not installed"
+        )
+        return False
+    if isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": "mcp-dida365"})
+            )
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+        except ImportError:
+            logging.warning(
+                "No OpenTelemetry tracer provider is configured and opentelemetry-sdk / "
+                "opentelemetry-exporter-otlp-proto-http are not installed, spans are dropped"
+            )
+    _otel_tracer = trace.get_tracer("mcp-dida365")
+    _refresh()
+    return True
+
+
+_configured = False
+
+
+def configure_from_env() -> None:
+    """
+    Enable tracing from the environment, once per process:
+    TICKTICK_TRACE_FILE appends spans to a JSON-lines file,
+    TICKTICK_TRACE_OTEL=True mirrors them to OpenTelemetry.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    path = os.getenv("TICKTICK_TRACE_FILE")
+    if path:
+        add_exporter(JsonlExporter(path))
+    if os.getenv("TICKTICK_TRACE_OTEL", "").lower() in ("1", "true", "yes", "on"):
+        enable_opentelemetry()
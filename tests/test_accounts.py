@@ -0,0 +1,95 @@
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import utils.accounts
+from utils.accounts import (
+    AccountError,
+    account_files,
+    account_for_key,
+    bearer_key,
+    parse_account_keys,
+    token_manager_for,
+)
+
+
+@pytest.fixture
+def accounts(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils.accounts, "ACCOUNTS_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        utils.accounts, "ACCOUNT_KEYS", parse_account_keys("alice=k1, bob=k2")
+    )
+    monkeypatch.delenv("TICKTICK_ACCOUNT", raising=False)
+    monkeypatch.setattr(utils.accounts, "_managers", {})
+    return tmp_path
+
+
+def test_parse_account_keys():
+    assert parse_account_keys("") == {}
+    assert parse_account_keys("alice=k1,bob=k=2,") == {"k1": "alice", "k=2": "bob"}
+    for value in ("alice", "alice=", "alice=k1,bob=k1", "../x=k1"):
+        with pytest.raises(ValueError):
+            parse_account_keys(value)
+
+
+def test_bearer_key():
+    assert bearer_key("Bearer k1") == "k1"
+    assert bearer_key("bearer  k1 ") == "k1"
+    assert bearer_key("Basic k1") is None
+    assert bearer_key("Bearer") is None
+    assert bearer_key(None) is None
+
+
+def test_only_configured_keys_map_to_accounts(accounts):
+    assert account_for_key("k1") == "alice"
+    assert account_for_key("k2") == "bob"
+    assert account_for_key("k3") is None
+    assert account_for_key("") is None
+    assert account_for_key(None) is None
+
+
+def test_account_files_do_not_create_directories(accounts):
+    files = account_files("alice")
+    assert os.path.dirname(files.token) == str(accounts / "alice")
+    assert not (accounts / "alice").exists()
+    account_files("alice", create=True)
+    assert (accounts / "alice").is_dir()
+
+
+def test_other_accounts_do_not_start_oauth(accounts, monkeypatch):
+    import server.mcp
+
+    started = []
+    monkeypatch.setattr(
+        type(token_manager_for("alice")), "start_reauth", lambda self: started.append(1)
+    )
+    assert token_manager_for("alice").reauthorize is False
+    with pytest.raises(AccountError, match="--authorize alice"):
+        server.mcp._build_client("alice")
+    assert token_manager_for("alice").token_rejected("old") is False
+    assert started == []
+    assert not (accounts / "alice").exists()
+
+    monkeypatch.setenv("TICKTICK_ACCOUNT", "alice")
+    assert token_manager_for("alice").reauthorize is True
+
+
+def test_middleware_refuses_requests_without_a_known_key(accounts):
+    from server.http import AccountKeyMiddleware
+
+    app = Starlette(routes=[Route("/mcp", lambda request: PlainTextResponse("ok"))])
+    app.add_middleware(AccountKeyMiddleware)
+    with TestClient(app) as client:
+        assert client.get("/mcp").status_code == 401
+        assert (
+            client.get("/mcp", headers={"Authorization": "Bearer k3"}).status_code
+            == 401
+        )
+        assert client.get("/mcp?account=alice").status_code == 401
+        response = client.get("/mcp", headers={"Authorization": "Bearer k1"})
+        assert response.status_code == 200
+    assert not (accounts / "alice").exists()
@@ -0,0 +1,217 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from utils.agenda import build_agenda, occurrences, parse_rrule, zone
+
+# (rule, anchor, low, high, expected days), checked against dateutil.rrule
+CASES = [
+    (
+        "FREQ=MONTHLY;BYMONTHDAY=31",
+        date(2024, 1, 31),
+        date(2024, 1, 1),
+        date(2024, 12, 31),
+        ["2024-01-31", "2024-03-31", "2024-05-31", "2024-07-31", "2024-08-31"]
+        + ["2024-10-31", "2024-12-31"],
+    ),
+    (
+        # Months without the anchor's day are skipped
+        "FREQ=MONTHLY",
+        date(2024, 1, 31),
+        date(2024, 1, 1),
+        date(2024, 6, 30),
+        ["2024-01-31", "2024-03-31", "2024-05-31"],
+    ),
+    (
+        "FREQ=MONTHLY;BYMONTHDAY=-1",
+        date(2024, 1, 15),
+        date(2024, 1, 1),
+        date(2024, 6, 30),
+        ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31"]
+        + ["2024-06-30"],
+    ),
+    (
+        "FREQ=MONTHLY;BYDAY=-1FR",
+        date(2024, 1, 1),
+        date(2024, 1, 1),
+        date(2024, 6, 30),
+        ["2024-01-26", "2024-02-23", "2024-03-29", "2024-04-26", "2024-05-31"]
+        + ["2024-06-28"],
+    ),
+    (
+        # RFC 5545: the week start changes which weeks INTERVAL=2 selects
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,SU;WKST=MO",
+        date(1997, 8, 5),
+        date(1997, 8, 1),
+        date(1997, 8, 31),
+        ["1997-08-05", "1997-08-10", "1997-08-19", "1997-08-24"],
+    ),
+    (
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,SU;WKST=SU",
+        date(1997, 8, 5),
+        date(1997, 8, 1),
+        date(1997, 8, 31),
+        ["1997-08-05", "1997-08-17", "1997-08-19", "1997-08-31"],
+    ),
+    (
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,SA;WKST=SA",
+        date(2024, 1, 1),
+        date(2024, 1, 1),
+        date(2024, 1, 31),
+        ["2024-01-01", "2024-01-13", "2024-01-15", "2024-01-27", "2024-01-29"],
+    ),
+    (
+        # COUNT counts from the anchor, not from the start of the range
+        "FREQ=DAILY;COUNT=5",
+        date(2024, 3, 1),
+        date(2024, 3, 3),
+        date(2024, 3, 31),
+        ["2024-03-03", "2024-03-04", "2024-03-05"],
+    ),
+    (
+        "FREQ=MONTHLY;COUNT=3;BYMONTHDAY=31",
+        date(2024, 1, 31),
+        date(2024, 1, 1),
+        date(2024, 12, 31),
+        ["2024-01-31", "2024-03-31", "2024-05-31"],
+    ),
+    (
+        "FREQ=WEEKLY;UNTIL=20240401",
+        date(2024, 3, 4),
+        date(2024, 3, 1),
+        date(2024, 4, 30),
+        ["2024-03-04", "2024-03-11", "2024-03-18", "2024-03-25", "2024-04-01"],
+    ),
+    (
+        "FREQ=MONTHLY;INTERVAL=2;UNTIL=20240601;BYDAY=-1FR",
+        date(2024, 1, 26),
+        date(2024, 1, 1),
+        date(2024, 12, 31),
+        ["2024-01-26", "2024-03-29", "2024-05-31"],
+    ),
+    (
+        # Feb 29 only comes back in leap years
+        "FREQ=YEARLY",
+        date(2024, 2, 29),
+        date(2024, 1, 1),
+        date(2032, 12, 31),
+        ["2024-02-29", "2028-02-29", "2032-02-29"],
+    ),
+    (
+        "FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29",
+        date(2020, 2, 29),
+        date(2020, 1, 1),
+        date(2029, 1, 1),
+        ["2020-02-29", "2024-02-29", "2028-02-29"],
+    ),
+    (
+        "FREQ=DAILY;INTERVAL=3;BYMONTH=2",
+        date(2024, 1, 30),
+        date(2024, 2, 20),
+        date(2024, 3, 31),
+        ["2024-02-20", "2024-02-23", "2024-02-26", "2024-02-29"],
+    ),
+    (
+        # A range far from the anchor
+        "FREQ=WEEKLY;INTERVAL=3;BYDAY=FR",
+        date(2000, 1, 7),
+        date(2024, 6, 1),
+        date(2024, 7, 31),
+        ["2024-06-14", "2024-07-05", "2024-07-26"],
+    ),
+]
+
+
+CASE_IDS = [f"{rule}@{anchor}" for rule, anchor, *_ in CASES]
+
+
+@pytest.mark.parametrize("rule,anchor,low,high,expected", CASES, ids=CASE_IDS)
+def test_occurrences(rule, anchor, low, high, expected):
+    days = occurrences(parse_rrule(rule), anchor, low, high)
+    assert [d.isoformat() for d in days] == expected
+
+
+@pytest.mark.parametrize("rule,anchor,low,high,expected", CASES, ids=CASE_IDS)
+def test_occurrences_match_dateutil(rule, anchor, low, high, expected):
+    rrule = pytest.importorskip("dateutil.rrule")
+    start = datetime.combine(anchor, datetime.min.time())
+    reference = rrule.rrulestr(rule, dtstart=start).between(
+        datetime.combine(low, datetime.min.time()),
+        datetime.combine(high, datetime.max.time()),
+        inc=True,
+    )
+    assert occurrences(parse_rrule(rule), anchor, low, high) == [
+        d.date() for d in reference
+    ]
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=MONTHLY;BYSETPOS=-1;BYDAY=MO,TU,WE,TH,FR",
+        "FREQ=YEARLY;BYDAY=1MO",
+        "FREQ=HOURLY",
+        "FREQ=WEEKLY;BYDAY=XX",
+        "INTERVAL=2",
+    ],
+)
+def test_unsupported_rules_are_not_expanded(rule):
+    assert parse_rrule(rule) is None
+
+
+def test_ignored_app_parts():
+    assert parse_rrule("RRULE:FREQ=DAILY;TT_SKIP=HOLIDAY") == parse_rrule("FREQ=DAILY")
+
+
+def _task(id, due, **fields):
+    return {"id": id, "title": id, "dueDate": due, "status": 0, **fields}
+
+
+def test_build_agenda_expands_repeating_tasks():
+    tasks = [
+        _task(
+            "weekly",
+            "2024-03-04T09:30:00.000+0000",
+            repeatFlag="RRULE:FREQ=WEEKLY;INTERVAL=1",
+        ),
+        _task("once", "2024-03-11T08:00:00.000+0000"),
+        _task("all-day", "2024-03-11T00:00:00.000+0000", isAllDay=True, timeZone="UTC"),
+        _task(
+            "done",
+            "2024-03-04T09:30:00.000+0000",
+            status=2,
+            repeatFlag="RRULE:FREQ=DAILY",
+        ),
+    ]
+    agenda = build_agenda(tasks, date(2024, 3, 4), date(2024, 3, 17), timezone.utc)
+    assert {
+        day.isoformat(): [e.task["id"] for e in es] for day, es in agenda.items()
+    } == {
+        "2024-03-04": ["weekly", "done"],
+        "2024-03-11": ["all-day", "once", "weekly"],
+    }
+    weekly = [e for es in agenda.values() for e in es if e.task["id"] == "weekly"]
+    assert [(e.time, e.repeat) for e in weekly] == [("09:30", False), ("09:30", True)]
+
+
+def test_build_agenda_keeps_the_current_date():
+    # Due on a Wednesday, repeating on Mondays: the current date stays listed
+    task = _task(
+        "t", "2024-03-06T12:00:00.000+0000", repeatFlag="RRULE:FREQ=WEEKLY;BYDAY=MO"
+    )
+    agenda = build_agenda([task], date(2024, 3, 1), date(2024, 3, 12), timezone.utc)
+    assert [d.isoformat() for d in agenda] == ["2024-03-06", "2024-03-11"]
+
+
+def test_build_agenda_uses_the_time_zone():
+    task = _task("late", "2024-03-04T23:30:00.000+0000")
+    tz = timezone(timedelta(hours=8))
+    agenda = build_agenda([task], date(2024, 3, 4), date(2024, 3, 5), tz)
+    assert [(d.isoformat(), es[0].time) for d, es in agenda.items()] == [
+        ("2024-03-05", "07:30")
+    ]
+
+
+def test_unknown_time_zone():
+    with pytest.raises(ValueError, match="Unknown time zone"):
+        zone("Mars/Olympus")
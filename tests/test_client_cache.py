@@ -0,0 +1,234 @@
+import asyncio
+import json
+import threading
+
+import httpx
+
+from server.client import APIClient, AsyncAPIClient
+from utils.filter import compile_filter
+
+
+class Upstream:
+    """
+    Project p1 served from memory. The first GET of its data is answered with the tasks
+    listed when it arrived, but only once `release` is set, so a write can finish meanwhile.
+    Writes are applied at once but answered only when `finish_write` is set.
+    """
+
+    def __init__(self):
+        self.tasks = [{"id": "t1", "projectId": "p1", "title": "first", "status": 0}]
+        self.gets = 0
+        self.received = threading.Event()
+        self.release = threading.Event()
+        self.writing = threading.Event()
+        self.finish_write = threading.Event()
+        self.finish_write.set()
+
+    def data(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            self.gets += 1
+            tasks = list(self.tasks)
+            return httpx.Response(
+                200, json={"project": {"id": "p1", "name": "P1"}, "tasks": tasks}
+            )
+        task = {**json.loads(request.content), "id": f"t{len(self.tasks) + 1}"}
+        task["status"] = 0
+        self.tasks.append(task)
+        return httpx.Response(200, json=task)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        first = request.method == "GET" and self.gets == 0
+        response = self.data(request)
+        if first:
+            self.received.set()
+            self.release.wait(5)
+        if request.method != "GET":
+            self.writing.set()
+            self.finish_write.wait(5)
+        return response
+
+    async def ahandler(self, request: httpx.Request) -> httpx.Response:
+        first = request.method == "GET" and self.gets == 0
+        response = self.data(request)
+        if first:
+            self.received.set()
+            while not self.release.is_set():
+                await asyncio.sleep(0.001)
+        return response
+
+
+def ids(details):
+    return sorted(t["id"] for t in details["tasks"])
+
+
+def indexed(client):
+    return sorted(
+        t["id"] for t in client.index.select(compile_filter(["status == 0"]), ["p1"])
+    )
+
+
+def test_read_overlapping_a_write_is_not_cached():
+    upstream = Upstream()
+    client = APIClient(
+        token="test",
+        base_url="http://upstream",
+        http_client=httpx.Client(transport=httpx.MockTransport(upstream.handler)),
+    )
+    stale = {}
+    reader = threading.Thread(
+        target=lambda: stale.update(client.get_project_details("p1"))
+    )
+    reader.start()
+    assert upstream.received.wait(5)
+    client.create_task("p1", "second")
+    upstream.release.set()
+    reader.join(5)
+
+    # The read started before the write, its caller gets what it asked for
+    assert ids(stale) == ["t1"]
+    # but it was not kept: the next read and the index see the write
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert indexed(client) == ["t1", "t2"]
+    client.close()
+
+
+def test_async_read_overlapping_a_write_is_not_cached():
+    upstream = Upstream()
+
+    async def run():
+        client = AsyncAPIClient(
+            token="test",
+            base_url="http://upstream",
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream.ahandler)
+            ),
+        )
+        reader = asyncio.create_task(client.get_project_details("p1"))
+        while not upstream.received.is_set():
+            await asyncio.sleep(0.001)
+        await client.create_task("p1", "second")
+        upstream.release.set()
+
+        assert ids(await reader) == ["t1"]
+        assert ids(await client.get_project_details("p1")) == ["t1", "t2"]
+        assert indexed(client) == ["t1", "t2"]
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_read_after_a_write_is_cached():
+    upstream = Upstream()
+    upstream.release.set()
+    client = APIClient(
+        token="test",
+        base_url="http://upstream",
+        http_client=httpx.Client(transport=httpx.MockTransport(upstream.handler)),
+    )
+    client.create_task("p1", "second")
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert upstream.gets == 1
+    client.close()
+
+
+def test_read_after_a_write_does_not_join_an_older_flight():
+    upstream = Upstream()
+    client = APIClient(
+        token="test",
+        base_url="http://upstream",
+        http_client=httpx.Client(transport=httpx.MockTransport(upstream.handler)),
+    )
+    stale = {}
+    reader = threading.Thread(
+        target=lambda: stale.update(client.get_project_details("p1"))
+    )
+    reader.start()
+    assert upstream.received.wait(5)
+    client.create_task("p1", "second")
+
+    # The first read is still in flight, a new one is sent rather than shared
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert upstream.gets == 2
+    upstream.release.set()
+    reader.join(5)
+    assert ids(stale) == ["t1"]
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    client.close()
+
+
+def test_read_during_a_write_does_not_join_an_older_flight():
+    upstream = Upstream()
+    client = APIClient(
+        token="test",
+        base_url="http://upstream",
+        http_client=httpx.Client(transport=httpx.MockTransport(upstream.handler)),
+    )
+    reader = threading.Thread(target=client.get_project_details, args=("p1",))
+    reader.start()
+    assert upstream.received.wait(5)
+    upstream.finish_write.clear()
+    writer = threading.Thread(target=client.create_task, args=("p1", "second"))
+    writer.start()
+    assert upstream.writing.wait(5)
+
+    # The write may or may not show, but the read must not be the one sent before it
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert upstream.gets == 2
+    upstream.finish_write.set()
+    upstream.release.set()
+    writer.join(5)
+    reader.join(5)
+    # Neither read is kept: both overlapped the write
+    assert ids(client.get_project_details("p1")) == ["t1", "t2"]
+    assert upstream.gets == 3
+    client.close()
+
+
+def test_async_read_after_a_write_does_not_join_an_older_flight():
+    upstream = Upstream()
+
+    async def run():
+        client = AsyncAPIClient(
+            token="test",
+            base_url="http://upstream",
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream.ahandler)
+            ),
+        )
+        reader = asyncio.create_task(client.get_project_details("p1"))
+        while not upstream.received.is_set():
+            await asyncio.sleep(0.001)
+        await client.create_task("p1", "second")
+
+        assert ids(await client.get_project_details("p1")) == ["t1", "t2"]
+        assert upstream.gets == 2
+        upstream.release.set()
+        assert ids(await reader) == ["t1"]
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_concurrent_reads_share_one_flight():
+    upstream = Upstream()
+
+    async def run():
+        client = AsyncAPIClient(
+            token="test",
+            base_url="http://upstream",
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream.ahandler)
+            ),
+        )
+        readers = [
+            asyncio.create_task(client.get_project_details("p1")) for _ in range(3)
+        ]
+        while not upstream.received.is_set():
+            await asyncio.sleep(0.001)
+        upstream.release.set()
+        assert [ids(r) for r in await asyncio.gather(*readers)] == [["t1"]] * 3
+        assert upstream.gets == 1
+        await client.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,306 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from utils.filter import compile_filter, filter_task
+
+TODAY = datetime.now().date()
+
+
+def _ts(day: date) -> str:
+    return f"{day.isoformat()}T12:00:00.000+0000"
+
+
+TASKS: List[Dict[str, Any]] = [
+    {
+        "id": "overdue-high",
+        "title": "Pay rent",
+        "priority": 5,
+        "dueDate": _ts(TODAY - timedelta(days=2)),
+        "tags": ["Home", "money"],
+        "status": 0,
+    },
+    {
+        "id": "today-medium",
+        "title": "Weekly review",
+        "priority": 3,
+        "dueDate": _ts(TODAY),
+        "startDate": _ts(TODAY - timedelta(days=1)),
+        "status": 0,
+    },
+    {
+        "id": "tomorrow-low",
+        "title": "Call the bank",
+        "priority": 1,
+        "dueDate": _ts(TODAY + timedelta(days=1)),
+        "tags": ["money"],
+        "status": 0,
+    },
+    {
+        "id": "later-none",
+        "title": "Plan the trip",
+        "priority": 0,
+        "dueDate": _ts(TODAY + timedelta(days=10)),
+        "items": [{"title": "Book flights"}, {"title": "Book hotel"}],
+        "status": 0,
+    },
+    {
+        "id": "no-due",
+        "title": "Read a book",
+        "priority": 1,
+        "status": 0,
+    },
+    {
+        "id": "done",
+        "title": "Weekly review",
+        "priority": 3,
+        "dueDate": _ts(TODAY - timedelta(days=7)),
+        "status": 2,
+    },
+    {
+        "id": "bad-date",
+        "title": "Broken",
+        "priority": 5,
+        "dueDate": "not a date",
+        "status": 0,
+    },
+]
+
+
+def ids(tasks: List[Dict[str, Any]]) -> List[str]:
+    return [t["id"] for t in tasks]
+
+
+def matching(filter_fields: List[str]) -> List[str]:
+    return ids(compile_filter(filter_fields).apply(TASKS))
+
+
+# The single-clause filter from before the expression grammar, kept verbatim (but for the
+# shared `today`) so the compiled filters can be checked against it.
+_LEGACY_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+}
+_LEGACY_PRIORITY_MAP = {"none": 0, "low": 1, "medium": 3, "high": 5}
+
+
+def _legacy_date(kw: str) -> date:
+    if kw.lower() == "yesterday":
+        return TODAY - timedelta(days=1)
+    if kw.lower() == "today":
+        return TODAY
+    if kw.lower() == "tomorrow":
+        return TODAY + timedelta(days=1)
+    return datetime.strptime(kw, "%Y-%m-%d").date()
+
+
+def _legacy_predicate(expr: str) -> Callable[[Dict[Any, Any]], bool]:
+    parts = expr.split(maxsplit=2)
+    if len(parts) != 3:
+        raise ValueError(f"Invalid filter expression: {expr!r}")
+    field, op, raw_val = parts
+    if op not in _LEGACY_OPERATORS:
+        raise ValueError(f"Unsupported operator {op!r} in {expr!r}")
+    cmp_fn = _LEGACY_OPERATORS[op]
+
+    def predicate(task: Dict[Any, Any]) -> bool:
+        if field not in task:
+            return False
+        val = task[field]
+        if "date" in field.lower():
+            try:
+                actual = datetime.strptime(val, "%Y-%m-%dT%H:%M:%S.%f%z").date()
+            except Exception:
+                return False
+            return cmp_fn(actual, _legacy_date(raw_val))
+        if field.lower() == "priority":
+            expected = _LEGACY_PRIORITY_MAP.get(raw_val.lower(), None)
+            if expected is None:
+                expected = int(raw_val)
+            return cmp_fn(int(val), expected)
+        if isinstance(val, (int, float)):
+            return cmp_fn(val, type(val)(raw_val))
+        return cmp_fn(str(val), raw_val)
+
+    return predicate
+
+
+def legacy_filter_task(tasks, filter_fields):
+    preds = [_legacy_predicate(expr) for expr in filter_fields]
+    return [task for task in tasks if all(pred(task) for pred in preds)]
+
+
+LEGACY_FILTERS = [
+    ["dueDate <= tomorrow"],
+    ["dueDate < today"],
+    ["dueDate == today"],
+    ["dueDate != today"],
+    ["dueDate >= yesterday"],
+    ["dueDate > tomorrow"],
+    [f"dueDate <= {(TODAY + timedelta(days=3)).isoformat()}"],
+    ["startDate <= today"],
+    ["priority >= high"],
+    ["priority >= medium"],
+    ["priority == none"],
+    ["priority != low"],
+    ["priority < 3"],
+    ["status == 0"],
+    ["status != 0"],
+    ["status > 1"],
+    ["title == Weekly review"],
+    ["title != Weekly review"],
+    ["title < M"],
+    ["title == Research and Development"],
+    ["title != Research and Development"],
+    ["title == Don't forget"],
+    ["title == Milk, eggs (2)"],
+    ["title != a <> b != c"],
+    ["title == Weekly  review"],
+    ["title < Pay rent"],
+    ["title == 'unterminated"],
+    ["dueDate <= tomorrow", "priority >= medium"],
+    ["status == 0", "priority <= low", "title != Read a book"],
+    ["missingField == 1"],
+]
+
+
+@pytest.mark.parametrize("filter_fields", LEGACY_FILTERS, ids=str)
+def test_compiled_filter_matches_legacy_filter(filter_fields):
+    expected = ids(legacy_filter_task(TASKS, filter_fields))
+    assert ids(filter_task(TASKS, filter_fields)) == expected
+    assert matching(filter_fields) == expected
+
+
+@pytest.mark.parametrize(
+    "title",
+    [
+        "Research and Development",
+        "Don't forget",
+        "Milk, eggs (2)",
+        "a <> b != c",
+        "priority == high or status == 0",
+    ],
+)
+def test_single_comparison_takes_the_rest_of_the_line(title):
+    tasks = [{"id": "match", "title": title}, {"id": "other", "title": "Other"}]
+    assert ids(filter_task(tasks, [f"title == {title}"])) == ["match"]
+    assert ids(filter_task(tasks, [f"title != {title}"])) == ["other"]
+
+
+def test_compiled_filter_is_reusable_and_callable():
+    compiled = compile_filter(["priority >= medium"])
+    assert compiled.apply(TASKS) == compiled.apply(TASKS)
+    assert [t["id"] for t in TASKS if compiled(t)] == matching(["priority >= medium"])
+
+
+def test_and_binds_tighter_than_or():
+    assert matching(
+        ["priority == high or priority == low and tags contains money"]
+    ) == [
+        "overdue-high",
+        "tomorrow-low",
+        "bad-date",
+    ]
+    assert matching(
+        ["(priority == high or priority == low) and tags contains money"]
+    ) == ["overdue-high", "tomorrow-low"]
+
+
+def test_expressions_are_and_ed():
+    assert matching(["priority >= medium", "status == 0"]) == matching(
+        ["priority >= medium and status == 0"]
+    )
+
+
+def test_negation():
+    assert matching(["not status == 0"]) == ["done"]
+    assert matching(["not (priority == high or status != 0)"]) == [
+        "today-medium",
+        "tomorrow-low",
+        "later-none",
+        "no-due",
+    ]
+    assert matching(["not not status != 0"]) == ["done"]
+    assert matching(["priority not in [high, medium, low]"]) == ["later-none"]
+    # A negated clause is the complement: tasks without the field match it
+    assert matching(["tags not contains money"]) == [
+        "today-medium",
+        "later-none",
+        "no-due",
+        "done",
+        "bad-date",
+    ]
+
+
+def test_date_comparisons():
+    assert matching(["dueDate between today and tomorrow"]) == [
+        "today-medium",
+        "tomorrow-low",
+    ]
+    assert matching(["dueDate not between yesterday and tomorrow"]) == [
+        "overdue-high",
+        "later-none",
+        "no-due",
+        "done",
+        "bad-date",
+    ]
+    assert matching([f"dueDate in [today, {TODAY + timedelta(days=10)}]"]) == [
+        "today-medium",
+        "later-none",
+    ]
+    # Full timestamps compare on their date part
+    assert matching([f"dueDate == {_ts(TODAY)}"]) == ["today-medium"]
+    # Tasks without the field, or with an unparseable date, never match a comparison
+    assert "no-due" not in matching(["dueDate != today"])
+    assert "bad-date" not in matching(["dueDate != today"])
+
+
+def test_tags_and_text():
+    # Tags match whole, case-insensitively
+    assert matching(["tags contains home"]) == ["overdue-high"]
+    assert matching(["tags contains mon"]) == []
+    # Text is a case-insensitive substring
+    assert matching(["title contains REVIEW"]) == ["today-medium", "done"]
+    # Subtasks match on their titles
+    assert matching(["items contains hotel"]) == ["later-none"]
+    # Quoted values keep their spaces
+    assert matching(["title == 'Call the bank'"]) == ["tomorrow-low"]
+    assert matching(['title in ["Pay rent", "Read a book"]']) == [
+        "overdue-high",
+        "no-due",
+    ]
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "",
+        "priority",
+        "priority high",
+        "priority ~ high",
+        "(priority == high",
+        "priority == high )",
+        "priority in high",
+        "priority in [high, low",
+        "dueDate between today",
+        "dueDate between today or tomorrow",
+        "title not == x",
+        "priority == high and",
+        "and priority == high",
+        "priority ==",
+        "title contains 'unterminated",
+    ],
+)
+def test_parse_errors(expr):
+    with pytest.raises(ValueError):
+        compile_filter([expr])
+
+
+def test_unknown_priority_name_is_an_error():
+    with pytest.raises(ValueError):
+        compile_filter(["priority == urgent"])
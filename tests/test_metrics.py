@@ -0,0 +1,31 @@
+import logging
+import socket
+import urllib.request
+
+import server.metrics
+from server.metrics import start_exporters
+
+
+def test_exporter_serves_metrics(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(server.metrics, "_exporters_started", False)
+    monkeypatch.setenv("TICKTICK_METRICS_PORT", str(port))
+    monkeypatch.delenv("TICKTICK_METRICS_FILE", raising=False)
+    start_exporters()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as r:
+        assert r.status == 200
+
+
+def test_exporter_port_in_use_is_logged(monkeypatch, caplog):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        monkeypatch.setattr(server.metrics, "_exporters_started", False)
+        monkeypatch.setenv("TICKTICK_METRICS_PORT", str(port))
+        monkeypatch.delenv("TICKTICK_METRICS_FILE", raising=False)
+        with caplog.at_level(logging.ERROR):
+            start_exporters()
+    assert f"Cannot serve metrics on port {port}" in caplog.text
@@ -0,0 +1,45 @@
+import asyncio
+
+from server.pool import ClientPool
+
+
+class Client:
+    def __init__(self, account: str):
+        self.account = account
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_least_recently_used_client_is_closed_beyond_max_clients():
+    async def run():
+        pool = ClientPool(Client, max_clients=2)
+        alice = pool.get("alice")
+        pool.get("bob")
+        pool.get("alice")
+        carol = pool.get("carol")
+        await asyncio.sleep(0)
+        return pool, alice, carol
+
+    pool, alice, carol = asyncio.run(run())
+    assert pool.peek("bob") is None
+    assert pool.peek("alice") is alice and pool.peek("carol") is carol
+    assert pool.evicted == 1
+
+
+def test_idle_clients_are_closed_without_a_call():
+    async def run():
+        pool = ClientPool(Client, idle_timeout=0.05)
+        alice = pool.get("alice")
+        bob = pool.get("bob")
+        eviction = asyncio.create_task(pool.evict_periodically(0.02))
+        with pool.using("bob"):
+            await asyncio.sleep(0.2)
+            eviction.cancel()
+        return pool, alice, bob
+
+    pool, alice, bob = asyncio.run(run())
+    assert alice.closed and pool.peek("alice") is None
+    # A client is never closed while a call runs on it
+    assert not bob.closed and pool.peek("bob") is bob
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+import types
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+import server.scheduler
+from benchmarks.fake_api import FakeDida365
+from server.scheduler import RequestScheduler, parse_retry_after
+
+
+def call(fake: FakeDida365, method: str = "GET", path: str = "/project"):
+    return {
+        "method": method,
+        "url": f"{fake.base_url}/open/v1{path}",
+        "json": {"title": "new"} if method == "POST" else None,
+    }
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    The delays the scheduler sleeps for, without sleeping (the fake keeps the real clock).
+    """
+    delays = []
+    monkeypatch.setattr(
+        server.scheduler,
+        "time",
+        types.SimpleNamespace(
+            monotonic=time.monotonic, time=time.time, sleep=delays.append
+        ),
+    )
+    return delays
+
+
+def wait_received(fake: FakeDida365, count: int, settle: float = 0.3) -> None:
+    """
+    Wait for the fake to have received `count` requests, and a little more for stragglers.
+    """
+    deadline = time.monotonic() + 5
+    while fake.received < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(settle)
+
+
+def test_retry_after_is_honoured():
+    # One request per burst, a 429 tells to wait 0.3s, by then the fake allows one more
+    with FakeDida365(rate_limit=5, rate_burst=1, retry_after=0.3) as fake:
+        scheduler = RequestScheduler(rate=0, backoff_base=0.01)
+        with httpx.Client() as http:
+            assert scheduler.send(http, call(fake)).status_code == 200
+            started = time.monotonic()
+            assert scheduler.send(http, call(fake)).status_code == 200
+            assert time.monotonic() - started >= 0.3
+    assert fake.throttled == 1
+    assert scheduler.throttled == 1
+    assert scheduler.retries == 1
+
+
+def test_retry_after_holds_the_host_bucket():
+    with FakeDida365(rate_limit=5, rate_burst=1, retry_after=0.3) as fake:
+        scheduler = RequestScheduler(rate=100, burst=100)
+        with httpx.Client() as http:
+            scheduler.send(http, call(fake))
+            started = time.monotonic()
+            assert scheduler.send(http, call(fake)).status_code == 200
+            assert time.monotonic() - started >= 0.3
+    assert fake.throttled == 1
+    # The client's own limit for the host slowed down, and grows back on success
+    assert 50 <= scheduler.bucket("127.0.0.1").rate < 100
+
+
+def test_retry_after_is_capped(sleeps):
+    with FakeDida365(rate_limit=0.01, rate_burst=1, retry_after=60) as fake:
+        scheduler = RequestScheduler(rate=0, max_retries=2, backoff_cap=1.0)
+        with httpx.Client() as http:
+            scheduler.send(http, call(fake))
+            assert scheduler.send(http, call(fake)).status_code == 429
+    assert len(sleeps) == 2
+    assert all(1.0 <= delay <= 1.1 for delay in sleeps)
+
+
+def test_parse_retry_after():
+    def response(value):
+        return httpx.Response(429, headers={"Retry-After": value})
+
+    assert parse_retry_after(response("2")) == 2.0
+    assert parse_retry_after(response("-1")) == 0.0
+    assert 8 <= parse_retry_after(response(formatdate(time.time() + 10))) <= 10
+    assert parse_retry_after(response(formatdate(time.time() - 10))) == 0.0
+    assert parse_retry_after(response("soon")) is None
+    assert parse_retry_after(httpx.Response(429)) is None
+
+
+@pytest.mark.parametrize("max_retries", [0, 1, 3, 6])
+def test_backoff_stays_within_retry_limit_and_cap(sleeps, max_retries):
+    with FakeDida365(error_rate=1.0) as fake:
+        scheduler = RequestScheduler(
+            rate=0, max_retries=max_retries, backoff_base=0.05, backoff_cap=0.5
+        )
+        with httpx.Client() as http:
+            assert scheduler.send(http, call(fake)).status_code == 503
+    assert fake.received == max_retries + 1
+    assert scheduler.retries == max_retries
+    assert len(sleeps) == max_retries
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(0.5, 0.05 * 2**attempt)
+
+
+def test_backoff_is_jittered():
+    scheduler = RequestScheduler(backoff_base=0.5, backoff_cap=30.0)
+    delays = {scheduler._backoff(4) for _ in range(50)}
+    assert len(delays) > 1
+    assert all(0 <= delay <= 8.0 for delay in delays)
+
+
+def test_post_answered_5xx_is_not_retried(sleeps):
+    with FakeDida365(error_rate=1.0) as fake:
+        scheduler = RequestScheduler(rate=0)
+        with httpx.Client() as http:
+            assert scheduler.send(http, call(fake, "POST", "/task")).status_code == 503
+            # unless the caller says it is safe
+            response = scheduler.send(
+                http, call(fake, "POST", "/task"), idempotent=True
+            )
+            assert response.status_code == 503
+    assert fake.received == 1 + 4
+    assert scheduler.retries == 3
+
+
+def test_post_timed_out_after_sending_is_not_retried():
+    with FakeDida365(latency=0.3) as fake:
+        scheduler = RequestScheduler(rate=0, backoff_base=0.01)
+        with httpx.Client(timeout=httpx.Timeout(5.0, read=0.1)) as http:
+            with pytest.raises(httpx.ReadTimeout):
+                scheduler.send(http, call(fake, "POST", "/task"))
+            wait_received(fake, 1)
+            assert fake.received == 1
+            assert scheduler.retries == 0
+
+            # A read is safe to send again
+            with pytest.raises(httpx.ReadTimeout):
+                scheduler.send(http, call(fake))
+            wait_received(fake, 1 + 4)
+            assert fake.received == 1 + 4
+            assert scheduler.retries == 3
+
+
+def test_async_post_timed_out_after_sending_is_not_retried():
+    async def run(fake, scheduler):
+        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0, read=0.1)) as http:
+            with pytest.raises(httpx.ReadTimeout):
+                await scheduler.asend(http, call(fake, "POST", "/task"))
+
+    with FakeDida365(latency=0.3) as fake:
+        scheduler = RequestScheduler(rate=0, backoff_base=0.01)
+        asyncio.run(run(fake, scheduler))
+        wait_received(fake, 1)
+        assert fake.received == 1
+        assert scheduler.retries == 0
+
+
+def test_post_not_sent_is_retried(sleeps):
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.method)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={})
+
+    scheduler = RequestScheduler(rate=0)
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+        args = {"method": "POST", "url": "http://upstream/open/v1/task", "json": {}}
+        assert scheduler.send(http, args).status_code == 200
+    assert attempts == ["POST", "POST"]
+
+
+class Concurrency:
+    """
+    Wraps an httpx client, recording the most requests it had in flight at once.
+    """
+
+    def __init__(self, http):
+        self.http = http
+        self.current = 0
+        self.most = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.current += 1
+            self.most = max(self.most, self.current)
+
+    def _exit(self):
+        with self._lock:
+            self.current -= 1
+
+    def request(self, **args):
+        self._enter()
+        try:
+            return self.http.request(**args)
+        finally:
+            self._exit()
+
+
+class AsyncConcurrency(Concurrency):
+    async def request(self, **args):
+        self._enter()
+        try:
+            return await self.http.request(**args)
+        finally:
+            self._exit()
+
+
+def test_in_flight_cap_with_send():
+    with FakeDida365(latency=0.1) as fake:
+        scheduler = RequestScheduler(rate=0, max_in_flight=2)
+        with httpx.Client() as client:
+            http = Concurrency(client)
+            statuses = []
+            threads = [
+                threading.Thread(
+                    target=lambda: statuses.append(
+                        scheduler.send(http, call(fake)).status_code
+                    )
+                )
+                for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+    assert statuses == [200] * 6
+    assert http.most == 2
+
+
+def test_in_flight_cap_with_asend():
+    async def run(fake, scheduler):
+        async with httpx.AsyncClient() as client:
+            http = AsyncConcurrency(client)
+            responses = await asyncio.gather(
+                *(scheduler.asend(http, call(fake)) for _ in range(6))
+            )
+        return http, [r.status_code for r in responses]
+
+    with FakeDida365(latency=0.1) as fake:
+        scheduler = RequestScheduler(rate=0, max_in_flight=2)
+        http, statuses = asyncio.run(run(fake, scheduler))
+    assert statuses == [200] * 6
+    assert http.most == 2
+
+
+def test_rate_limited_burst_gets_through():
+    async def run(fake, scheduler):
+        async with httpx.AsyncClient() as http:
+            responses = await asyncio.gather(
+                *(scheduler.asend(http, call(fake)) for _ in range(12))
+            )
+        return [r.status_code for r in responses]
+
+    with FakeDida365(rate_limit=20, rate_burst=4, retry_after=0.1) as fake:
+        scheduler = RequestScheduler(rate=20, burst=4, backoff_base=0.05)
+        assert asyncio.run(run(fake, scheduler)) == [200] * 12
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from server.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.ado("key", fetch) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(run())
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flights.coalesced == 4
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await follower, flights
+
+    result, flights = asyncio.run(run())
+    assert result == "result"
+    assert flights.coalesced == 1
+    assert not flights._tasks
+
+
+def test_error_is_shared_then_forgotten():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def ok():
+        return "result"
+
+    async def run():
+        flights = SingleFlight()
+        errors = await asyncio.gather(
+            flights.ado("key", fail), flights.ado("key", fail), return_exceptions=True
+        )
+        # The key is free again: the next call runs anew
+        return errors, await flights.ado("key", ok)
+
+    errors, result = asyncio.run(run())
+    assert [type(e) for e in errors] == [ValueError, ValueError]
+    assert result == "result"
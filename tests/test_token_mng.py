@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+
+import utils.token_mng
+from utils.token_mng import REFRESH_MARGIN, TokenManager, save_token
+
+
+class Manager(TokenManager):
+    """
+    Counts the OAuth flows it would start instead of starting them.
+    """
+
+    def __init__(self, path):
+        super().__init__(path=str(path), account="work")
+        self.reauths = 0
+
+    def start_reauth(self) -> str:
+        self.reauths += 1
+        return "http://localhost/auth"
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    def set_available(available: bool) -> None:
+        monkeypatch.setattr(utils.token_mng, "can_open_browser", lambda: available)
+
+    return set_available
+
+
+def test_refresh_margin_is_minutes():
+    assert 0 < REFRESH_MARGIN <= 3600
+
+
+def test_token_valid_beyond_the_margin_does_not_reauthorize(tmp_path, browser):
+    browser(True)
+    save_token("abc", 2 * 3600, tmp_path / "token")
+    tokens = Manager(tmp_path / "token")
+    assert tokens.token == "abc"
+    assert tokens.reauths == 0
+
+
+def test_expiring_token_reauthorizes_with_a_browser(tmp_path, browser):
+    browser(True)
+    save_token("abc", 60, tmp_path / "token")
+    tokens = Manager(tmp_path / "token")
+    assert tokens.token == "abc"
+    assert tokens.reauths == 1
+
+
+def test_expiring_token_is_logged_without_a_browser(tmp_path, browser, caplog):
+    browser(False)
+    save_token("abc", 60, tmp_path / "token")
+    tokens = Manager(tmp_path / "token")
+    with caplog.at_level(logging.WARNING):
+        assert tokens.token == "abc"
+        assert tokens.token == "abc"
+    assert tokens.reauths == 0
+    # Once per token
+    assert len([r for r in caplog.records if "'work' expires" in r.message]) == 1
+
+
+def test_rejected_token_reauthorizes_without_a_browser(tmp_path, browser):
+    browser(False)
+    save_token("abc", 60, tmp_path / "token")
+    tokens = Manager(tmp_path / "token")
+    assert tokens.token_rejected("abc") is False
+    assert tokens.reauths == 1
+
+
+def test_no_browser_in_docker(monkeypatch):
+    monkeypatch.setenv("TICKTICK_DOCKER_SERVER", "true")
+    utils.token_mng.can_open_browser.cache_clear()
+    try:
+        assert utils.token_mng.can_open_browser() is False
+    finally:
+        utils.token_mng.can_open_browser.cache_clear()
@@ -0,0 +1,400 @@
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+
+import server.mcp as server
+from benchmarks.fake_api import FakeDida365
+from server.client import AsyncAPIClient
+from utils.accounts import DEFAULT_ACCOUNT
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch):
+    monkeypatch.setenv("TICKTICK_RATE_LIMIT", "off")
+    monkeypatch.setenv("TICKTICK_INBOX_PROJECT_ID", "inbox0000000000")
+
+
+@pytest.fixture
+def fake():
+    with FakeDida365(projects=2, tasks_per_project=10) as fake:
+        yield fake
+
+
+@pytest.fixture
+def call(fake):
+    """
+    Call a tool by name through FastMCP, against the fake. The calls share one client.
+    """
+    loop = asyncio.new_event_loop()
+    server.clients.put(
+        DEFAULT_ACCOUNT, AsyncAPIClient(token="test", base_url=fake.base_url)
+    )
+
+    def call(tool: str, **arguments) -> str:
+        return text(loop.run_until_complete(server.mcp.call_tool(tool, arguments)))
+
+    yield call
+    loop.run_until_complete(server.clients.aclose())
+    loop.close()
+
+
+def break_project(fake: FakeDida365) -> str:
+    """
+    Add a project that is listed but whose data cannot be fetched (404).
+    """
+    fake.projects["broken00000000"] = {"id": "broken00000000", "name": "Broken"}
+    return "broken00000000"
+
+
+def text(result) -> str:
+    # FastMCP returns the content blocks, plus structured output on newer versions
+    if isinstance(result, tuple):
+        result = result[0]
+    return "".join(block.text for block in result)
+
+
+def jsonl(output: str):
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+
+class HeldReads(httpx.AsyncBaseTransport):
+    """
+    Forwards to the fake, holding the GETs of project data until `release` is set.
+    """
+
+    def __init__(self):
+        self.transport = httpx.AsyncHTTPTransport()
+        self.held = 0
+        self.release = asyncio.Event()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET" and request.url.path.endswith("/data"):
+            self.held += 1
+            await self.release.wait()
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def test_filter_all_tasks_keeps_projects_read_during_a_write():
+    async def run(fake):
+        transport = HeldReads()
+        client = AsyncAPIClient(
+            token="test",
+            base_url=fake.base_url,
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+        server.clients.put(DEFAULT_ACCOUNT, client)
+        arguments = {"filter_fields": ["status == 0"], "mode": "jsonl"}
+        try:
+            call = asyncio.create_task(
+                server.mcp.call_tool("filter_all_tasks", arguments)
+            )
+            while transport.held < len(fake.tasks):
+                await asyncio.sleep(0.001)
+            project_id = next(iter(fake.projects))
+            await client.create_task(project_id, "written meanwhile")
+            transport.release.set()
+            during = jsonl(text(await call))
+            after = jsonl(
+                text(await server.mcp.call_tool("filter_all_tasks", arguments))
+            )
+        finally:
+            await server.clients.aclose()
+        return during, after
+
+    with FakeDida365(projects=2, tasks_per_project=5) as fake:
+        during, after = asyncio.run(run(fake))
+    # The reads overlapped the write so nothing was indexed, the fetched tasks are used
+    for tasks in (during, after):
+        assert len(tasks) == 11
+        assert "written meanwhile" in {t["title"] for t in tasks}
+
+
+def test_filter_all_tasks(fake, call):
+    output = call("filter_all_tasks", filter_fields=["priority >= high"], mode="jsonl")
+    high = {
+        t["id"]
+        for tasks in fake.tasks.values()
+        for t in tasks.values()
+        if t["priority"] == 5
+    }
+    assert len(high) == 4
+    assert {t["id"] for t in jsonl(output)} == high
+
+    output = call(
+        "filter_all_tasks", filter_fields=["title == Task 1-3"], mode="compact"
+    )
+    assert output.splitlines()[1].startswith("[Project 1 (project00000001)] Task 1-3")
+
+
+def test_filter_all_tasks_reports_failed_projects(fake, call):
+    break_project(fake)
+    output = call("filter_all_tasks", filter_fields=["priority >= high"], mode="jsonl")
+    assert len(jsonl(output)) == 4
+    assert (
+        output.splitlines()[-1] == "Failed to fetch projects: Broken (broken00000000)"
+    )
+
+
+def test_filter_all_tasks_without_matches(call):
+    output = call("filter_all_tasks", filter_fields=["title == nothing like it"])
+    # Only the header
+    assert output.startswith("Current time: ")
+    assert len(output.splitlines()) == 1
+
+
+def test_filter_project_tasks_follows_writes_through_the_index(fake, call):
+    project_id = "project00000000"
+
+    def titles():
+        output = call(
+            "filter_project_tasks",
+            project_id=project_id,
+            filter_fields=["dueDate between 2025-07-01 and 2025-07-03"],
+            mode="jsonl",
+        )
+        return sorted(t["title"] for t in jsonl(output))
+
+    assert titles() == ["Task 0-0", "Task 0-1", "Task 0-2"]
+    assert server.clients.peek(DEFAULT_ACCOUNT).index.has_project(project_id)
+
+    created = call(
+        "create_task",
+        project_id=project_id,
+        title="Added",
+        dueDate="2025-07-02T16:00:00.000+0000",
+    )
+    task_id = re.search(r"^id: (\w+)$", created, re.M).group(1)
+    received = fake.received
+    assert titles() == ["Added", "Task 0-0", "Task 0-1", "Task 0-2"]
+    # Answered from the cache and the index the write went through
+    assert fake.received == received
+
+    call("complete_task", project_id=project_id, task_id=task_id)
+    assert titles() == ["Task 0-0", "Task 0-1", "Task 0-2"]
+
+
+def test_filter_project_tasks_errors_and_empty_results(fake, call):
+    output = call(
+        "filter_project_tasks",
+        project_id=break_project(fake),
+        filter_fields=["priority >= high"],
+    )
+    assert output.startswith("Error in filter_project_tasks: ")
+
+    output = call(
+        "filter_project_tasks",
+        project_id="project00000000",
+        filter_fields=["dueDate > 2025-12-31"],
+    )
+    assert len(output.splitlines()) == 1
+
+
+def test_create_tasks(fake, call):
+    project_id = "project00000000"
+    output = call(
+        "create_tasks",
+        tasks=[
+            {"project_id": project_id, "title": "Draft outline", "priority": 3},
+            {"project_id": project_id},
+            {"project_id": project_id, "title": "Write chapter 1"},
+        ],
+    )
+    lines = output.splitlines()
+    assert lines[0] == "Created 2/3 tasks"
+    assert re.fullmatch(r"1\. created \w+: Draft outline", lines[1])
+    assert lines[2].startswith("2. error: ") and "title" in lines[2]
+    assert re.fullmatch(r"3\. created \w+: Write chapter 1", lines[3])
+    created = {t["title"]: t for t in fake.tasks[project_id].values()}
+    assert created["Draft outline"]["priority"] == 3
+    assert "Write chapter 1" in created
+
+    assert call("create_tasks", tasks=[]) == "Created 0/0 tasks"
+
+
+def test_bulk_update_complete_and_delete(fake, call):
+    project_id = "project00000000"
+    tasks = fake.tasks[project_id]
+    first, second, third, *_ = list(tasks)
+    missing = {"project_id": project_id, "task_id": "missing"}
+
+    output = call(
+        "update_tasks",
+        updates=[
+            {"task_id": first, "project_id": project_id, "priority": 5},
+            {**missing, "priority": 5},
+        ],
+    )
+    assert output.splitlines()[:2] == ["Updated 1/2 tasks", "Failed:"]
+    assert output.splitlines()[2].startswith(f"- missing (project {project_id}): ")
+    assert tasks[first]["priority"] == 5
+
+    items = [{"project_id": project_id, "task_id": second}, missing]
+    output = call("complete_tasks", tasks=items)
+    assert output.splitlines()[0] == "Completed 1/2 tasks"
+    assert tasks[second]["status"] == 2
+
+    items = [{"project_id": project_id, "task_id": third}]
+    assert call("delete_tasks", tasks=items) == "Deleted 1/1 tasks"
+    assert third not in tasks
+
+    assert call("complete_tasks", tasks=[]) == "Completed 0/0 tasks"
+
+
+def test_get_project_details_pages_with_cursors(call):
+    project_id = "project00000000"
+    titles, cursor, pages = [], None, 0
+    while True:
+        output = call(
+            "get_project_details",
+            project_id=project_id,
+            limit=4,
+            cursor=cursor,
+            sort="-priority",
+            mode="compact",
+        )
+        pages += 1
+        lines = output.splitlines()
+        assert ("Project Details:" in lines) == (pages == 1)
+        titles += [
+            line.split(". ", 1)[1].split(" [id:")[0]
+            for line in lines
+            if line[0].isdigit()
+        ]
+        if lines[-1] == "No more tasks.":
+            break
+        cursor = lines[-1].removeprefix("Next cursor: ")
+    assert pages == 3
+    assert sorted(titles) == sorted(f"Task 0-{t}" for t in range(10))
+    # Highest priority first: tasks 3 and 7 are high
+    assert sorted(titles[:2]) == ["Task 0-3", "Task 0-7"]
+
+
+def test_get_project_details_bounds(fake, call):
+    project_id = "project00000000"
+    output = call(
+        "get_project_details", project_id=project_id, max_chars=300, mode="compact"
+    )
+    lines = output.splitlines()
+    assert lines[-1].startswith("Next cursor: ")
+    # The budget bounds the listing, the page range and the cursor come on top
+    listing = [line for line in lines[:-1] if not line.startswith("Tasks ")]
+    assert len("\n".join(listing)) <= 300
+    assert 0 < output.count("[id:") < 10
+
+    output = call("get_project_details", project_id=project_id, offset=10)
+    assert output.splitlines()[-1] == "No tasks at offset 10, the project has 10 tasks."
+
+    empty = call("create_project", name="Empty")
+    empty_id = re.search(r"^id: (\w+)$", empty, re.M).group(1)
+    output = call("get_project_details", project_id=empty_id)
+    assert output.splitlines()[-1] == "No tasks in the project."
+
+    output = call("get_project_details", project_id=project_id, limit=0)
+    assert output == "Error in get_project_details: limit must be at least 1"
+
+
+def test_field_projection_and_output_modes(fake, call):
+    project_id = "project00000000"
+    output = call(
+        "get_project_details",
+        project_id=project_id,
+        fields=["id", "title", "dueDate"],
+        mode="jsonl",
+    )
+    tasks = jsonl(output)
+    # The project line, then one object per task
+    assert tasks[0]["id"] == project_id
+    assert len(tasks) == 11
+    assert all(set(t) == {"id", "title", "dueDate"} for t in tasks[1:])
+
+    output = call("get_projects", fields=["id", "name"], mode="compact")
+    assert output.splitlines() == [
+        "1. id: inbox0000000000; name: Inbox",
+        "2. id: project00000000; name: Project 0",
+        "3. id: project00000001; name: Project 1",
+    ]
+
+    task_id = next(iter(fake.tasks[project_id]))
+    output = call(
+        "get_task_by_id", project_id=project_id, task_id=task_id, mode="compact"
+    )
+    assert output.splitlines()[1] == (
+        f"Task 0-0 [id: {task_id}] | due: 2025-07-01 | repeating"
+    )
+    verbose = call("get_task_by_id", project_id=project_id, task_id=task_id)
+    assert f"id: {task_id}" in verbose.splitlines()
+    assert "etag: " in verbose
+
+
+def test_get_project_changes(fake, call):
+    project_id = "project00000000"
+    first, second, third, *_ = list(fake.tasks[project_id])
+
+    output = call("get_project_changes", project_id=project_id)
+    assert "Watching 10 open tasks, pass the cursor to get changes." in output
+    cursor = output.splitlines()[-1].removeprefix("Next cursor: ")
+
+    output = call("get_project_changes", project_id=project_id, cursor=cursor)
+    assert "Changes: 0 added, 0 modified, 0 completed, 0 removed" in output
+    cursor = output.splitlines()[-1].removeprefix("Next cursor: ")
+
+    call("create_task", project_id=project_id, title="Added")
+    call("update_task", task_id=first, project_id=project_id, title="Renamed")
+    call("complete_task", project_id=project_id, task_id=second)
+    call("delete_task", project_id=project_id, task_id=third)
+    output = call("get_project_changes", project_id=project_id, cursor=cursor)
+    lines = output.splitlines()
+    assert "Changes: 1 added, 1 modified, 1 completed, 1 removed" in lines
+    assert lines[lines.index("Added:") + 1].startswith("Added [id: ")
+    assert lines[lines.index("Modified:") + 1].startswith(f"Renamed [id: {first}]")
+    assert lines[lines.index("Completed:") + 1].startswith(f"Task 0-1 [id: {second}]")
+    assert f"Removed: {third}" in lines
+
+
+def test_get_project_changes_errors(fake, call):
+    output = call("get_project_changes", project_id=break_project(fake))
+    assert output.startswith("Error in get_project_changes: ")
+
+
+def test_summarize_tasks(fake, call):
+    summaries = {s["scope"]: s for s in jsonl(call("summarize_tasks", mode="jsonl"))}
+    assert list(summaries) == [
+        "Inbox (inbox0000000000)",
+        "Project 0 (project00000000)",
+        "Project 1 (project00000001)",
+        "All projects",
+    ]
+    assert summaries["Inbox (inbox0000000000)"]["open"] == 0
+    total = summaries["All projects"]
+    assert total["open"] == 20
+    # Every task of the fake is due in July 2025
+    assert total["due"]["overdue"] == 20
+    assert total["priority"] == {"high": 4, "medium": 4, "low": 6, "none": 6}
+    assert total["earliest_due"] == "2025-07-01"
+
+    output = call("summarize_tasks", project_id="project00000000", mode="compact")
+    assert output.splitlines()[1].startswith(
+        "Project 0 (project00000000): open 10, completed 0 | due overdue 10"
+    )
+    assert len(output.splitlines()) == 2
+
+
+def test_summarize_tasks_failed_and_empty(fake, call):
+    break_project(fake)
+    output = call("summarize_tasks", per_project=False, mode="compact")
+    lines = output.splitlines()
+    assert lines[1].startswith("All projects: open 20, completed 0")
+    assert lines[-1] == "Failed to fetch projects: Broken (broken00000000)"
+
+    output = call("summarize_tasks", project_id="broken00000000")
+    assert output.startswith("Error in summarize_tasks: ")
+
+    output = call("summarize_tasks", project_id="inbox0000000000", mode="jsonl")
+    (summary,) = jsonl(output)
+    assert summary["open"] == 0 and summary["earliest_due"] is None
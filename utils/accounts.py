@@ -0,0 +1,142 @@
+import hmac
+import os
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from utils.inbox_mng import DATA_FILE
+from utils.token_mng import TOKEN_FILE, TokenManager, token_manager
+
+DEFAULT_ACCOUNT = "default"
+# Per-account state of the other accounts lives in <ACCOUNTS_DIR>/<account>/
+ACCOUNTS_DIR = os.getenv("TICKTICK_ACCOUNTS_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "accounts"
+)
+# Account names end up in paths: no separators, no leading dot
+_ACCOUNT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}")
+
+_managers: Dict[str, TokenManager] = {}
+_managers_guard = threading.Lock()
+
+
+class AccountError(Exception):
+    """
+    A call bears no key of a configured account, or its account is not authorized yet.
+    """
+
+
+class AccountFiles(NamedTuple):
+    token: str
+    data: str
+    # SQLite mirror, only when TICKTICK_MIRROR_DB enables the mirror
+    mirror: Optional[str]
+
+
+def validate_account(account: str) -> str:
+    if not _ACCOUNT_NAME.fullmatch(account):
+        raise ValueError(
+            f"Invalid account name: {account!r}, use letters, digits and _.@- (64 at most)"
+        )
+    return account
+
+
+def parse_account_keys(value: str) -> Dict[str, str]:
+    """
+    Parse TICKTICK_ACCOUNT_KEYS, "name=key,name=key", into {key: account name}.
+    """
+    keys: Dict[str, str] = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        name, _, key = (part.strip() for part in item.partition("="))
+        if not key:
+            raise ValueError(
+                f"Invalid TICKTICK_ACCOUNT_KEYS entry for {name!r}, use name=key"
+            )
+        if key in keys:
+            raise ValueError(
+                f"TICKTICK_ACCOUNT_KEYS gives {keys[key]!r} and {name!r} the same key"
+            )
+        keys[key] = validate_account(name)
+    return keys
+
+
+# The accounts HTTP calls may run for, by the bearer key their clients send.
+# Empty: every call runs for the server's own account.
+ACCOUNT_KEYS = parse_account_keys(os.getenv("TICKTICK_ACCOUNT_KEYS") or "")
+
+
+def own_account() -> str:
+    """
+    The account of this process: the one stdio calls run for, and HTTP calls when no
+    account keys are configured. Only its OAuth flow can be started by a tool call.
+    """
+    return os.getenv("TICKTICK_ACCOUNT") or DEFAULT_ACCOUNT
+
+
+def bearer_key(authorization: Optional[str]) -> Optional[str]:
+    """
+    The key of an "Authorization: Bearer <key>" header value.
+    """
+    scheme, _, key = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not key.strip():
+        return None
+    return key.strip()
+
+
+def account_for_key(key: Optional[str]) -> Optional[str]:
+    """
+    The configured account a bearer key belongs to, None for a missing or unknown key.
+    Every key is compared, in constant time.
+    """
+    account = None
+    if key is not None:
+        for known, name in ACCOUNT_KEYS.items():
+            if hmac.compare_digest(known.encode("utf-8"), key.encode("utf-8")):
+                account = name
+    return account
+
+
+def account_files(account: str = DEFAULT_ACCOUNT, create: bool = False) -> AccountFiles:
+    """
+    The state files of an account. The default account keeps using .token / .data at the
+    project root, so single-user setups are unchanged.
+    The directory of another account is only made with `create`, when it is authorized
+    (see authorize): calls never add accounts.
+    """
+    mirror = os.getenv("TICKTICK_MIRROR_DB") or None
+    if account == DEFAULT_ACCOUNT:
+        return AccountFiles(TOKEN_FILE, DATA_FILE, mirror)
+    directory = os.path.join(ACCOUNTS_DIR, validate_account(account))
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    return AccountFiles(
+        os.path.join(directory, ".token"),
+        os.path.join(directory, ".data"),
+        os.path.join(directory, "mirror.db") if mirror else None,
+    )
+
+
+def token_manager_for(account: str = DEFAULT_ACCOUNT) -> TokenManager:
+    """
+    The process-wide token manager of an account. Only the one of the process's own
+    account starts OAuth flows, the others are authorized with `authorize`.
+    """
+    if account == DEFAULT_ACCOUNT:
+        manager = token_manager
+    else:
+        with _managers_guard:
+            if account not in _managers:
+                _managers[account] = TokenManager(
+                    path=account_files(account).token, account=account
+                )
+            manager = _managers[account]
+    manager.reauthorize = account == own_account()
+    return manager
+
+
+def authorize(account: str) -> None:
+    """
+    Run the OAuth flow of an account here and wait for its token, making its directory.
+    This is how accounts are added: `python main.py --authorize <name>` on the server.
+    """
+    account_files(validate_account(account), create=True)
+    token_manager_for(account).new_auth().run(force=True)
@@ -0,0 +1,297 @@
+import calendar
+import functools
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+# Rule parts the expander understands. Rules with others (BYSETPOS, BYWEEKNO, ...) are not
+# expanded: their task only shows on its own dates.
+_SUPPORTED_PARTS = {
+    "FREQ",
+    "INTERVAL",
+    "COUNT",
+    "UNTIL",
+    "BYDAY",
+    "BYMONTHDAY",
+    "BYMONTH",
+    "WKST",
+}
+# Ignored parts the Dida365 / TickTick apps add to their rules
+_IGNORED_PARTS = {"TT_SKIP", "TT_WORKDAY"}
+# Safety bound on the periods walked for one task
+_MAX_PERIODS = 100_000
+
+
+class Recurrence(NamedTuple):
+    freq: str
+    interval: int
+    count: Optional[int]
+    until: Optional[date]
+    # (ordinal, weekday): ordinal 0 for every such weekday, else 1 for the first, -1 the last
+    byday: Tuple[Tuple[int, int], ...]
+    bymonthday: Tuple[int, ...]
+    bymonth: Tuple[int, ...]
+    # First day of the week (0 for Monday), where the weeks of INTERVAL=2+ WEEKLY rules start
+    wkst: int = 0
+
+
+@functools.lru_cache(maxsize=256)
+def parse_rrule(rule: str) -> Optional[Recurrence]:
+    """
+    Parse a repeatFlag such as "RRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,WE".
+    Return None for rules the expander does not handle, or that are malformed.
+    """
+    text = rule.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    parts: Dict[str, str] = {}
+    for part in text.split(";"):
+        if not part:
+            continue
+        key, _, value = part.partition("=")
+        key = key.strip().upper()
+        if key in _IGNORED_PARTS:
+            continue
+        if key not in _SUPPORTED_PARTS:
+            return None
+        parts[key] = value.strip().upper()
+    try:
+        freq = parts["FREQ"]
+        if freq not in _FREQUENCIES:
+            return None
+        if freq == "YEARLY" and "BYDAY" in parts and "BYMONTH" not in parts:
+            # Weekdays of the whole year, not handled
+            return None
+        byday = []
+        for item in filter(None, parts.get("BYDAY", "").split(",")):
+            ordinal = int(item[:-2]) if len(item) > 2 else 0
+            byday.append((ordinal, _WEEKDAYS[item[-2:]]))
+        until = parts.get("UNTIL")
+        return Recurrence(
+            freq=freq,
+            interval=max(int(parts.get("INTERVAL") or 1), 1),
+            count=int(parts["COUNT"]) if parts.get("COUNT") else None,
+            until=date(int(until[:4]), int(until[4:6]), int(until[6:8]))
+            if until
+            else None,
+            byday=tuple(byday),
+            bymonthday=tuple(
+                int(d) for d in filter(None, parts.get("BYMONTHDAY", "").split(","))
+            ),
+            bymonth=tuple(
+                int(m) for m in filter(None, parts.get("BYMONTH", "").split(","))
+            ),
+            wkst=_WEEKDAYS[parts.get("WKST") or "MO"],
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _month_days(rule: Recurrence, year: int, month: int, anchor: date) -> List[date]:
+    """
+    The days of a month a MONTHLY / YEARLY rule selects, in order.
+    """
+    last = calendar.monthrange(year, month)[1]
+    days = set()
+    if rule.bymonthday:
+        for day in rule.bymonthday:
+            day = day if day > 0 else last + day + 1
+            if 1 <= day <= last:
+                days.add(day)
+    elif rule.byday:
+        first_weekday = calendar.weekday(year, month, 1)
+        for ordinal, weekday in rule.byday:
+            matches = list(range((weekday - first_weekday) % 7 + 1, last + 1, 7))
+            if ordinal == 0:
+                days.update(matches)
+            elif -len(matches) <= ordinal <= len(matches):
+                days.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+    elif anchor.day <= last:
+        # Like RFC 5545, months without the anchor's day (e.g. the 31st) are skipped
+        days.add(anchor.day)
+    return [date(year, month, day) for day in sorted(days)]
+
+
+def _period(rule: Recurrence, anchor: date, k: int) -> Tuple[date, List[date]]:
+    """
+    The first day of the k-th period (day, week, month or year) from the anchor's,
+    and the candidate days the rule selects in it.
+    """
+    step = k * rule.interval
+    if rule.freq == "DAILY":
+        begin = anchor + timedelta(days=step)
+        days = [begin]
+        if rule.byday:
+            days = [d for d in days if d.weekday() in {w for _, w in rule.byday}]
+    elif rule.freq == "WEEKLY":
+        offset = (anchor.weekday() - rule.wkst) % 7
+        begin = anchor - timedelta(days=offset) + timedelta(weeks=step)
+        offsets = sorted({(w - rule.wkst) % 7 for _, w in rule.byday}) or [offset]
+        days = [begin + timedelta(days=o) for o in offsets]
+    elif rule.freq == "MONTHLY":
+        year, month = _add_months(anchor.year, anchor.month, step)
+        begin = date(year, month, 1)
+        days = _month_days(rule, year, month, anchor)
+    else:
+        begin = date(anchor.year + step, 1, 1)
+        days = []
+        for month in sorted(rule.bymonth) or [anchor.month]:
+            days.extend(_month_days(rule, begin.year, month, anchor))
+        return begin, days
+    if rule.bymonth:
+        days = [d for d in days if d.month in rule.bymonth]
+    return begin, days
+
+
+def _first_period(rule: Recurrence, anchor: date, low: date) -> int:
+    """
+    The first period that can hold days from `low` on, so long-running rules without a
+    COUNT do not walk every period since their anchor.
+    """
+    if rule.count is not None or low <= anchor:
+        return 0
+    if rule.freq == "DAILY":
+        periods = (low - anchor).days
+    elif rule.freq == "WEEKLY":
+        periods = (low - anchor).days // 7
+    elif rule.freq == "MONTHLY":
+        periods = (low.year - anchor.year) * 12 + low.month - anchor.month
+    else:
+        periods = low.year - anchor.year
+    return max(periods // rule.interval - 1, 0)
+
+
+def occurrences(rule: Recurrence, anchor: date, low: date, high: date) -> List[date]:
+    """
+    The days between `low` and `high` included on which a task anchored on `anchor`
+    (its current date) occurs. Like DTSTART, days before the anchor never occur and
+    COUNT counts from it.
+    """
+    found: List[date] = []
+    seen = 0
+    k = _first_period(rule, anchor, low)
+    while k < _MAX_PERIODS:
+        begin, days = _period(rule, anchor, k)
+        k += 1
+        if begin > high:
+            break
+        for day in days:
+            if day < anchor:
+                continue
+            if day > high or (rule.until is not None and day > rule.until):
+                return found
+            seen += 1
+            if rule.count is not None and seen > rule.count:
+                return found
+            if day >= low:
+                found.append(day)
+    return found
+
+
+class AgendaEntry(NamedTuple):
+    day: date
+    # "start" or "due"
+    kind: str
+    # Local time of day, None for all-day tasks
+    time: Optional[str]
+    # True for the occurrences of a repeating task after its current one
+    repeat: bool
+    task: Dict[Any, Any]
+
+
+def zone(name: Optional[str]) -> tzinfo:
+    """
+    The time zone of an IANA name, or the local one when no name is given.
+    """
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {name!r}, use an IANA name")
+    return datetime.now().astimezone().tzinfo  # type: ignore[return-value]
+
+
+def _local(task: Dict[Any, Any], field: str, tz: tzinfo) -> Optional[datetime]:
+    try:
+        moment = datetime.fromisoformat(task[field])
+    except Exception:
+        return None
+    if moment.tzinfo is None:
+        return moment
+    if task.get("isAllDay") and task.get("timeZone"):
+        # All-day dates are midnight in the task's own zone, keep that day
+        try:
+            return moment.astimezone(ZoneInfo(task["timeZone"]))
+        except Exception:
+            pass
+    return moment.astimezone(tz)
+
+
+def _entries(
+    task: Dict[Any, Any], low: date, high: date, tz: tzinfo
+) -> Iterator[AgendaEntry]:
+    moments = {
+        kind: _local(task, field, tz)
+        for kind, field in (("start", "startDate"), ("due", "dueDate"))
+    }
+    start, due = moments["start"], moments["due"]
+    if start is not None and due is not None and start.date() == due.date():
+        # A task starting and due the same day is listed once, at its start time
+        del moments["due"]
+    present = {k: m for k, m in moments.items() if m is not None}
+    if not present:
+        return
+    times = {
+        kind: None if task.get("isAllDay") else f"{m.hour:02d}:{m.minute:02d}"
+        for kind, m in present.items()
+    }
+
+    shifts = [0]
+    rule = (
+        parse_rrule(task["repeatFlag"])
+        if task.get("repeatFlag") and task.get("status", 0) == 0
+        else None
+    )
+    if rule is not None:
+        # Both dates move with the occurrences of the first one
+        anchor = min(m.date() for m in present.values())
+        latest = max(m.date() for m in present.values())
+        # The current dates stay an occurrence even when the rule does not select them
+        shifts = sorted(
+            {0}
+            | {
+                (day - anchor).days
+                for day in occurrences(
+                    rule, anchor, low - timedelta(days=(latest - anchor).days), high
+                )
+            }
+        )
+    for shift in shifts:
+        for kind, moment in present.items():
+            day = moment.date() + timedelta(days=shift)
+            if low <= day <= high:
+                yield AgendaEntry(day, kind, times[kind], shift > 0, task)
+
+
+def build_agenda(
+    tasks: Iterable[Dict[Any, Any]], low: date, high: date, tz: tzinfo
+) -> Dict[date, List[AgendaEntry]]:
+    """
+    Group the tasks starting or due between `low` and `high` (local days in `tz`, included)
+    by day, expanding repeating tasks into their occurrences in the range.
+    Days are in order; within a day, all-day entries come first, then by time.
+    """
+    agenda: Dict[date, List[AgendaEntry]] = {}
+    for task in tasks:
+        for entry in _entries(task, low, high, tz):
+            agenda.setdefault(entry.day, []).append(entry)
+    for entries in agenda.values():
+        entries.sort(key=lambda e: (e.time is not None, e.time or ""))
+    return dict(sorted(agenda.items()))
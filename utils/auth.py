@@ -11,6 +11,7 @@ from dotenv import load_dotenv, find_dotenv
 import os
 from utils.token_mng import save_token, load_token
 import time
+from typing import Optional
 
 load_dotenv(find_dotenv())
 
@@ -21,10 +22,14 @@ class CallbackServer:
         state: str,
         host: str = "localhost",
         port: int = 11365,
+        token_file: Optional[str] = None,
+        account: Optional[str] = None,
     ):
         self.host = host
         self.port = port
         self.state = state
+        self.token_file = token_file
+        self.account = account
         self._server = None
         self._thread = None
         self.token_exchanged = threading.Event()
@@ -44,6 +49,14 @@ class CallbackServer:
                 parsed_url = urlparse(self.path)
                 match parsed_url.path:
                     case "/" | "/auth":
+                        # A sign-in URL of another account reached the flow running now
+                        account = parse_qs(parsed_url.query).get("account", [None])[0]
+                        if account != svr.account:
+                            self.send_error(
+                                409,
+                                "Another account is signing in, retry this link in a moment",
+                            )
+                            return
                         # Redirect to the auth page
                         params = {
                             "client_id": os.getenv("TICKTICK_CLIENT_ID"),
@@ -113,7 +126,7 @@ class CallbackServer:
                                 f"Failed to get token, check your ClientID and ClientSecret, make sure on the provider's side redirect_uri is exactly {f'{svr.host}:{svr.port}/callback'}"
                             )
 
-                        save_token(access_token, expires_in)
+                        save_token(access_token, expires_in, svr.token_file)
 
                         self.send_response(200)
                         self.send_header("Content-Type", "application/json")
@@ -140,17 +153,36 @@ class CallbackServer:
 
 
 class Auth:
-    def __init__(self):
+    def __init__(self, token_file: Optional[str] = None, account: Optional[str] = None):
         self.host = "localhost"
         self.port = int(os.getenv("TICKTICK_PORT") or 11365)
+        # Where the token is saved (default .token), and the account named in the URL
+        self.token_file = token_file
+        self.account = account
 
-    def run(self):
-        token, expires_in = load_token()
-        if token is None or expires_in < time.time():
+    @property
+    def url(self) -> str:
+        """
+        The URL the user visits to sign in.
+        """
+        url = f"http://{self.host}:{self.port}/auth"
+        if self.account:
+            url += f"?{urlencode({'account': self.account})}"
+        return url
+
+    def run(self, force: bool = False):
+        """
+        Run the OAuth flow and wait for the token, unless the saved one is still valid.
+        `force` runs it anyway, to replace a token that is about to expire or was rejected.
+        """
+        token, expires_in = load_token(self.token_file)
+        if force or token is None or expires_in < time.time():
             with CallbackServer(
                 state=secrets.token_hex(16),
                 host=self.host,
                 port=self.port,
+                token_file=self.token_file,
+                account=self.account,
             ) as svr:
                 if os.getenv("TICKTICK_DOCKER_SERVER") not in (
                     "1",
@@ -159,13 +191,11 @@ class Auth:
                     "TRUE",
                 ):
                     try:
-                        webbrowser.open(f"http://{self.host}:{self.port}/auth")
+                        webbrowser.open(self.url)
                     except Exception as e:
                         logging.error(f"Failed to open browser: {e}")
                 else:
-                    logging.info(
-                        f"Please visit {self.host}:{self.port}/auth to authorize"
-                    )
+                    logging.info(f"Please visit {self.url} to authorize")
                 svr.token_exchanged.wait()
         else:
             logging.info("Token is valid, skipping authorization")
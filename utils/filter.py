@@ -1,82 +1,472 @@
+import operator
+import re
 from datetime import datetime, timedelta, date
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 # 1) Supported operators
 _OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
-    "==": lambda a, b: a == b,
-    "!=": lambda a, b: a != b,
-    ">": lambda a, b: a > b,
-    "<": lambda a, b: a < b,
-    ">=": lambda a, b: a >= b,
-    "<=": lambda a, b: a <= b,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
 }
 
 # 2) Named priority levels → numeric
 _PRIORITY_MAP = {"none": 0, "low": 1, "medium": 3, "high": 5}
+PRIORITY_NAMES = {number: name for name, number in _PRIORITY_MAP.items()}
+
+# 3) Expression grammar, one expression per filter string, all strings are and-ed:
+#   expr       := term ("or" term)*
+#   term       := factor ("and" factor)*
+#   factor     := "not" factor | "(" expr ")" | clause
+#   clause     := field op value | field ["not"] "in" list | field ["not"] "contains" value
+#               | field ["not"] "between" value "and" value
+#   list       := "[" value ("," value)* "]"   (parentheses also accepted)
+# Values are quoted strings or bare words, several bare words are joined by a space.
+# An expression that is a single "field op value" comparison keeps the original syntax:
+# its value is the rest of the line as is, e.g. "title == Research and Development".
+_TOKEN = re.compile(
+    r"""\s*(?:("[^"]*"|'[^']*')|(==|!=|>=|<=|>|<)|([()\[\],])|((?:[^\s()\[\],"'<>=!]|!(?!=))+))"""
+)
+_SINGLE_COMPARISON = re.compile(
+    r"""\s*([^\s()\[\],"'<>=!]+)\s+(==|!=|>=|<=|>|<)\s+(.*?)\s*"""
+)
+_QUOTED = re.compile(r""""[^"]*"|'[^']*'""")
+_KEYWORDS = {"and", "or", "not", "in", "contains", "between"}
+
+_MISSING = object()
+
+# Memo of the values parsed from one task during a single evaluation
+Memo = Dict[str, Any]
+Evaluator = Callable[[Dict[Any, Any], Memo], bool]
 
 
 def _parse_iso_date(s: str) -> date:
     # Example format: "2025-07-02T16:00:00.000+0000"
-    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f%z").date()
+    return datetime.fromisoformat(s).date()
 
 
-def _resolve_date_keyword(kw: str) -> date:
-    today = datetime.now().date()
-    if kw.lower() == "yesterday":
+def resolve_date_keyword(kw: str, today: Optional[date] = None) -> date:
+    """
+    The day meant by "yesterday", "today", "tomorrow" or an ISO date (or timestamp).
+    """
+    today = today or datetime.now().date()
+    kw = kw.lower()
+    if kw == "yesterday":
         return today - timedelta(days=1)
-    if kw.lower() == "today":
+    if kw == "today":
         return today
-    if kw.lower() == "tomorrow":
+    if kw == "tomorrow":
         return today + timedelta(days=1)
-    return datetime.strptime(kw, "%Y-%m-%d").date()
+    # Plain dates and full ISO timestamps both compare on their date part
+    return date.fromisoformat(kw[:10])
 
 
-def _build_predicate(expr: str) -> Callable[[Dict[Any, Any]], bool]:
+def _fieldkind(field: str) -> str:
+    lowered = field.lower()
+    if "date" in lowered:
+        return "date"
+    if lowered == "priority":
+        return "priority"
+    return "auto"
+
+
+def _task_date(task: Dict[Any, Any], memo: Memo, field: str) -> Optional[date]:
+    # Each date field is parsed at most once per task per query
+    try:
+        return memo[field]
+    except KeyError:
+        pass
+    try:
+        value = _parse_iso_date(task[field])
+    except Exception:
+        value = None
+    memo[field] = value
+    return value
+
+
+class _Value:
     """
-    Turn a string like "dueDate == tomorrow" into a
-    function that returns True/False for each task.
+    A literal from the expression, converted once per query for the field it is compared to.
     """
-    parts = expr.split(maxsplit=2)
-    if len(parts) != 3:
-        raise ValueError(f"Invalid filter expression: {expr!r}")
-    field, op, raw_val = parts
 
-    if op not in _OPERATORS:
-        raise ValueError(f"Unsupported operator {op!r} in {expr!r}")
+    __slots__ = ("raw", "date", "number", "boolean")
 
-    cmp_fn = _OPERATORS[op]
+    def __init__(self, raw: str, kind: str, today: date):
+        self.raw = raw
+        self.date: Optional[date] = None
+        self.number: Optional[float] = None
+        self.boolean: Optional[bool] = None
+        if kind == "date":
+            self.date = resolve_date_keyword(raw, today)
+        elif kind == "priority":
+            self.number = _PRIORITY_MAP.get(raw.lower())
+            if self.number is None:
+                # maybe raw was a number
+                self.number = int(raw)
+        else:
+            try:
+                self.number = float(raw)
+            except ValueError:
+                pass
+            if raw.lower() in ("true", "false"):
+                self.boolean = raw.lower() == "true"
 
-    def predicate(task: Dict[Any, Any]) -> bool:
-        if field not in task:
-            return False
-        val = task[field]
 
-        # ——— Date fields ———
-        if "date" in field.lower():
-            try:
-                actual = _parse_iso_date(val)
-            except Exception:
+class Node:
+    """
+    A compiled filter expression. `evaluate(task, memo)` tells if a task matches,
+    `cost` estimates how expensive and how unselective it is (lower runs first).
+    """
+
+    cost: float = 1.0
+    evaluate: Evaluator
+
+
+class Comparison(Node):
+    def __init__(self, field: str, op: str, value: _Value, kind: str):
+        self.field, self.op, self.value, self.kind = field, op, value, kind
+        cmp_fn = _OPERATORS[op]
+        # Equality is the most selective, "!=" the least
+        selectivity = {"==": 0.0, "!=": 2.0}.get(op, 1.0)
+
+        if kind == "date":
+            expected = value.date
+            self.cost = 2.0 + selectivity
+
+            def evaluate(task, memo):
+                actual = _task_date(task, memo, field)
+                return actual is not None and cmp_fn(actual, expected)
+
+        elif kind == "priority":
+            expected = value.number
+            self.cost = 0.0 + selectivity
+
+            def evaluate(task, memo):
+                actual = task.get(field)
+                return actual is not None and cmp_fn(int(actual), expected)
+
+        else:
+            raw, number, boolean = value.raw, value.number, value.boolean
+            self.cost = 1.0 + selectivity
+
+            def evaluate(task, memo):
+                actual = task.get(field, _MISSING)
+                if actual is _MISSING:
+                    return False
+                if isinstance(actual, bool):
+                    return boolean is not None and cmp_fn(actual, boolean)
+                if isinstance(actual, (int, float)):
+                    return number is not None and cmp_fn(actual, number)
+                return cmp_fn(str(actual), raw)
+
+        self.evaluate = evaluate
+
+
+class Between(Node):
+    def __init__(self, field: str, low: _Value, high: _Value, kind: str):
+        self.field, self.low, self.high, self.kind = field, low, high, kind
+        lower = Comparison(field, ">=", low, kind).evaluate
+        upper = Comparison(field, "<=", high, kind).evaluate
+        self.cost = (2.0 if kind == "date" else 1.0) + 0.5
+
+        def evaluate(task, memo):
+            return lower(task, memo) and upper(task, memo)
+
+        self.evaluate = evaluate
+
+
+class InList(Node):
+    def __init__(self, field: str, values: List[_Value], kind: str):
+        self.field, self.values, self.kind = field, values, kind
+        self.cost = (2.0 if kind == "date" else 1.0) + 0.2
+        if kind == "date":
+            dates = {v.date for v in values}
+
+            def evaluate(task, memo):
+                return _task_date(task, memo, field) in dates
+
+        elif kind == "priority":
+            numbers = {v.number for v in values}
+
+            def evaluate(task, memo):
+                actual = task.get(field)
+                return actual is not None and int(actual) in numbers
+
+        else:
+            raws = {v.raw for v in values}
+            numbers = {v.number for v in values if v.number is not None}
+
+            def evaluate(task, memo):
+                actual = task.get(field, _MISSING)
+                if actual is _MISSING:
+                    return False
+                if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+                    return actual in numbers
+                return str(actual) in raws
+
+        self.evaluate = evaluate
+
+
+class Contains(Node):
+    """
+    Case-insensitive substring match on text fields, membership on list fields such as tags.
+    Subtask lists match on their titles.
+    """
+
+    def __init__(self, field: str, value: _Value):
+        self.field, self.value = field, value
+        self.cost = 3.0
+        needle = value.raw.lower()
+
+        def evaluate(task, memo):
+            actual = task.get(field)
+            if actual is None:
+                return False
+            if isinstance(actual, list):
+                for item in actual:
+                    if isinstance(item, dict):
+                        if needle in str(item.get("title", "")).lower():
+                            return True
+                    elif str(item).lower() == needle:
+                        return True
                 return False
-            expected = _resolve_date_keyword(raw_val)
-            return cmp_fn(actual, expected)
+            return needle in str(actual).lower()
+
+        self.evaluate = evaluate
+
+
+class And(Node):
+    def __init__(self, children: List[Node]):
+        self.children = sorted(children, key=lambda n: n.cost)
+        self.cost = sum(n.cost for n in children)
+        evaluators = [n.evaluate for n in self.children]
+
+        def evaluate(task, memo):
+            for fn in evaluators:
+                if not fn(task, memo):
+                    return False
+            return True
+
+        self.evaluate = evaluate
+
+
+class Or(Node):
+    def __init__(self, children: List[Node]):
+        self.children = sorted(children, key=lambda n: n.cost)
+        self.cost = sum(n.cost for n in children) + 1.0
+        evaluators = [n.evaluate for n in self.children]
+
+        def evaluate(task, memo):
+            for fn in evaluators:
+                if fn(task, memo):
+                    return True
+            return False
+
+        self.evaluate = evaluate
+
+
+class Not(Node):
+    def __init__(self, child: Node):
+        self.child = child
+        self.cost = child.cost + 2.0
+        inner = child.evaluate
+
+        def evaluate(task, memo):
+            return not inner(task, memo)
+
+        self.evaluate = evaluate
+
+
+class _Parser:
+    def __init__(self, expr: str, today: date):
+        self.expr = expr
+        self.today = today
+        self.tokens: List[tuple[str, str]] = []
+        pos = 0
+        text = expr.rstrip()
+        while pos < len(text):
+            m = _TOKEN.match(text, pos)
+            if not m or m.end() == pos:
+                raise ValueError(f"Invalid filter expression: {expr!r}")
+            pos = m.end()
+            string, op, punct, word = m.groups()
+            if string is not None:
+                self.tokens.append(("str", string[1:-1]))
+            elif op is not None:
+                self.tokens.append(("op", op))
+            elif punct is not None:
+                self.tokens.append(("punct", punct))
+            else:
+                self.tokens.append(("word", word))
+        self.pos = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise ValueError(f"Invalid filter expression: {self.expr!r}")
+        node = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(
+                f"Unexpected {self.tokens[self.pos][1]!r} in {self.expr!r}"
+            )
+        return node
 
-        # ——— Priority keyword or numeric ———
-        if field.lower() == "priority":
-            actual = int(val)
-            expected = _PRIORITY_MAP.get(raw_val.lower(), None)
-            if expected is None:
-                # maybe raw_val was a number
-                expected = int(raw_val)
-            return cmp_fn(actual, expected)
+    def _peek(self) -> Optional[tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
 
-        # ——— Numeric fields ———
-        if isinstance(val, (int, float)):
-            return cmp_fn(val, type(val)(raw_val))
+    def _keyword(self, *words: str) -> Optional[str]:
+        token = self._peek()
+        if token and token[0] == "word" and token[1].lower() in words:
+            self.pos += 1
+            return token[1].lower()
+        return None
 
-        # ——— Fallback to string comparison ———
-        return cmp_fn(str(val), raw_val)
+    def _punct(self, *chars: str) -> Optional[str]:
+        token = self._peek()
+        if token and token[0] == "punct" and token[1] in chars:
+            self.pos += 1
+            return token[1]
+        return None
 
-    return predicate
+    def _expr(self) -> Node:
+        children = [self._term()]
+        while self._keyword("or"):
+            children.append(self._term())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _term(self) -> Node:
+        children = [self._factor()]
+        while self._keyword("and"):
+            children.append(self._factor())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _factor(self) -> Node:
+        if self._keyword("not"):
+            return Not(self._factor())
+        if self._punct("("):
+            node = self._expr()
+            if not self._punct(")"):
+                raise ValueError(f"Missing ')' in {self.expr!r}")
+            return node
+        return self._clause()
+
+    def _clause(self) -> Node:
+        token = self._peek()
+        if not token or token[0] != "word" or token[1].lower() in _KEYWORDS:
+            raise ValueError(f"Invalid filter expression: {self.expr!r}")
+        self.pos += 1
+        field = token[1]
+        kind = _fieldkind(field)
+
+        negate = bool(self._keyword("not"))
+        keyword = self._keyword("in", "contains", "between")
+        node: Node
+        if keyword == "in":
+            node = InList(field, self._list(kind), kind)
+        elif keyword == "contains":
+            node = Contains(field, self._value("auto"))
+        elif keyword == "between":
+            low = self._value(kind)
+            if not self._keyword("and"):
+                raise ValueError(f"Expected 'and' after between in {self.expr!r}")
+            node = Between(field, low, self._value(kind), kind)
+        elif negate:
+            raise ValueError(
+                f"Expected 'in', 'contains' or 'between' after not in {self.expr!r}"
+            )
+        else:
+            token = self._peek()
+            if not token or token[0] != "op":
+                found = token[1] if token else "end of expression"
+                raise ValueError(f"Unsupported operator {found!r} in {self.expr!r}")
+            self.pos += 1
+            node = Comparison(field, token[1], self._value(kind), kind)
+        return Not(node) if negate else node
+
+    def _value(self, kind: str, in_list: bool = False) -> _Value:
+        token = self._peek()
+        if token and token[0] == "str":
+            self.pos += 1
+            return _Value(token[1], kind, self.today)
+        words = []
+        stop = {"and", "or"} if not in_list else set()
+        while True:
+            token = self._peek()
+            if not token or token[0] != "word" or token[1].lower() in stop:
+                break
+            words.append(token[1])
+            self.pos += 1
+        if not words:
+            raise ValueError(f"Missing value in {self.expr!r}")
+        return _Value(" ".join(words), kind, self.today)
+
+    def _list(self, kind: str) -> List[_Value]:
+        opening = self._punct("[", "(")
+        if not opening:
+            raise ValueError(f"Expected a list after 'in' in {self.expr!r}")
+        closing = "]" if opening == "[" else ")"
+        values = [self._value(kind, in_list=True)]
+        while self._punct(","):
+            values.append(self._value(kind, in_list=True))
+        if not self._punct(closing):
+            raise ValueError(f"Missing {closing!r} in {self.expr!r}")
+        return values
+
+
+def _parse_expression(expr: str, today: date) -> Node:
+    single = _SINGLE_COMPARISON.fullmatch(expr)
+    if single is None or not single.group(3) or _QUOTED.fullmatch(single.group(3)):
+        return _Parser(expr, today).parse()
+    try:
+        node: Optional[Node] = _Parser(expr, today).parse()
+    except ValueError:
+        # e.g. "title == Don't forget" or "title == Milk, eggs (2)"
+        node = None
+    if node is not None and not isinstance(node, Comparison):
+        return node
+    field, op, raw = single.groups()
+    kind = _fieldkind(field)
+    return Comparison(field, op, _Value(raw, kind, today), kind)
+
+
+class CompiledFilter:
+    """
+    The and-ed filter expressions compiled once per query: keyword constants resolved,
+    field kinds decided, and top-level clauses ordered cheapest and most selective first.
+    """
+
+    def __init__(self, clauses: Iterable[Node]):
+        self.clauses = sorted(clauses, key=lambda n: n.cost)
+        evaluators = [n.evaluate for n in self.clauses]
+        if not evaluators:
+            self._evaluate: Evaluator = lambda task, memo: True
+        elif len(evaluators) == 1:
+            self._evaluate = evaluators[0]
+        else:
+            self._evaluate = And(self.clauses).evaluate
+
+    def __call__(self, task: Dict[Any, Any]) -> bool:
+        return self._evaluate(task, {})
+
+    def apply(self, tasks: Iterable[Dict[Any, Any]]) -> List[Dict[Any, Any]]:
+        evaluate = self._evaluate
+        return [task for task in tasks if evaluate(task, {})]
+
+
+def compile_filter(filter_fields: List[str]) -> CompiledFilter:
+    """
+    Compile filter expressions like "dueDate <= tomorrow" or
+    "priority in [high, medium] or title contains report" into a CompiledFilter.
+    """
+    today = datetime.now().date()
+    clauses: List[Node] = []
+    for expr in filter_fields:
+        node = _parse_expression(expr, today)
+        # Lift top-level conjunctions so all of them are ordered together
+        clauses.extend(node.children if isinstance(node, And) else [node])
+    return CompiledFilter(clauses)
 
 
 def filter_task(
@@ -85,5 +475,4 @@ def filter_task(
     """
     Return only those tasks for which **all** filter expressions match.
     """
-    preds = [_build_predicate(expr) for expr in filter_fields]
-    return [task for task in tasks if all(pred(task) for pred in preds)]
+    return compile_filter(filter_fields).apply(tasks)
@@ -1,46 +1,104 @@
 import os
-import json
 from typing import Optional, Dict, Any
 
+from utils.state_store import StateStore, open_store
+
 DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".data")
 
+# Discovered (or configured) inbox ids by data file (one per account), kept for the life of the process
+_inbox_project_ids: Dict[str, str] = {}
 
-def read_data() -> Dict[str, Any]:
-    """Read the .data file and return its contents as a dict. If not exists, return empty dict."""
-    if not os.path.exists(DATA_FILE):
-        return {}
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except Exception:
-            return {}
 
+def data_store(data_file: Optional[str] = None) -> StateStore:
+    return open_store(data_file or DATA_FILE)
 
-def save_data(data: Dict[str, Any]) -> None:
-    """Save the given dict to the .data file."""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
 
+def read_data(data_file: Optional[str] = None) -> Dict[str, Any]:
+    """Read the .data file (or `data_file`) and return its contents as a dict. If not exists, return empty dict."""
+    return data_store(data_file).read()
 
-def get_inbox_project_id(client: Any) -> Optional[str]:
+
+def save_data(data: Dict[str, Any], data_file: Optional[str] = None) -> None:
+    """Save the given dict to the .data file (or `data_file`), atomically: readers see the old or the new file."""
+    data_store(data_file).write(data)
+
+
+def known_inbox_project_id(data_file: Optional[str] = None) -> Optional[str]:
     """
-    Get the inbox project id, using .data cache if available, otherwise discover it via the workaround.
-    `client` should be an instance of APIClient or compatible.
+    The inbox id without probing: TICKTICK_INBOX_PROJECT_ID (default account only), else
+    the one in memory, else the one saved in the data file. None when it was never discovered.
     """
-    data = read_data()
-    if "inbox_project_id" in data:
-        return data["inbox_project_id"]
-
-    # Workaround: create a task with an invalid project id
-    invalid_project_id = "11365in"
-    task = client.create_task(project_id=invalid_project_id, title="_inbox_id_probe_")
-    if not isinstance(task, dict) or "projectId" not in task or "id" not in task:
-        return None
-    inbox_project_id = task["projectId"]
-    task_id = task["id"]
-    # Delete the probe task
-    client.delete_task(inbox_project_id, task_id)
-    # Save to .data
-    data["inbox_project_id"] = inbox_project_id
-    save_data(data)
+    store = data_store(data_file)
+    inbox_project_id = _inbox_project_ids.get(store.path)
+    if inbox_project_id is None:
+        if store.path == os.path.abspath(DATA_FILE):
+            inbox_project_id = os.getenv("TICKTICK_INBOX_PROJECT_ID")
+        inbox_project_id = (
+            inbox_project_id or store.read().get("inbox_project_id") or None
+        )
+        if inbox_project_id:
+            _inbox_project_ids[store.path] = inbox_project_id
     return inbox_project_id
+
+
+def _remember(inbox_project_id: str, data_file: Optional[str]) -> str:
+    store = data_store(data_file)
+    _inbox_project_ids[store.path] = inbox_project_id
+    store.update(lambda data: data.update(inbox_project_id=inbox_project_id))
+    return inbox_project_id
+
+
+def get_inbox_project_id(client: Any) -> Optional[str]:
+    """
+    Get the inbox project id, from memory / config / .data if available, otherwise discover it via the workaround.
+    `client` should be an instance of APIClient or compatible; its `data_file`, when set,
+    holds the inbox id of its account.
+    """
+    data_file = getattr(client, "data_file", None)
+    inbox_project_id = known_inbox_project_id(data_file)
+    if inbox_project_id:
+        return inbox_project_id
+
+    # One probe at a time across threads and server processes
+    with data_store(data_file).lock("inbox"):
+        # Another thread or process may have probed while this one waited
+        inbox_project_id = known_inbox_project_id(data_file)
+        if inbox_project_id:
+            return inbox_project_id
+
+        # Workaround: create a task with an invalid project id
+        invalid_project_id = "11365in"
+        task = client.create_task(
+            project_id=invalid_project_id, title="_inbox_id_probe_"
+        )
+        if not isinstance(task, dict) or "projectId" not in task or "id" not in task:
+            return None
+        # Delete the probe task
+        client.delete_task(task["projectId"], task["id"])
+        return _remember(task["projectId"], data_file)
+
+
+async def aget_inbox_project_id(client: Any) -> Optional[str]:
+    """
+    Async variant of get_inbox_project_id for AsyncAPIClient or compatible.
+    """
+    data_file = getattr(client, "data_file", None)
+    inbox_project_id = known_inbox_project_id(data_file)
+    if inbox_project_id:
+        return inbox_project_id
+
+    async with data_store(data_file).lock("inbox"):
+        inbox_project_id = known_inbox_project_id(data_file)
+        if inbox_project_id:
+            return inbox_project_id
+
+        # Workaround: create a task with an invalid project id
+        invalid_project_id = "11365in"
+        task = await client.create_task(
+            project_id=invalid_project_id, title="_inbox_id_probe_"
+        )
+        if not isinstance(task, dict) or "projectId" not in task or "id" not in task:
+            return None
+        # Delete the probe task
+        await client.delete_task(task["projectId"], task["id"])
+        return _remember(task["projectId"], data_file)
@@ -0,0 +1,247 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.filter import (
+    Between,
+    Comparison,
+    CompiledFilter,
+    Contains,
+    InList,
+    Node,
+    _OPERATORS,
+    _parse_iso_date,
+)
+
+_DATE_FIELDS = ("dueDate", "startDate")
+# Sorts after every task id, so (day, _LAST_ID) bounds all the entries of that day
+_LAST_ID = "\U0010ffff"
+_BUCKET_FIELDS = ("priority", "status")
+
+
+def _task_date(task: Dict[Any, Any], field: str) -> Optional[date]:
+    try:
+        return _parse_iso_date(task[field])
+    except Exception:
+        return None
+
+
+class TaskIndex:
+    """
+    Secondary indexes over the tasks the client has seen, so filters do not scan every task:
+    sorted (date, id) lists for dueDate/startDate searched with bisect, buckets for
+    priority/status and an inverted index on tags.
+    Updated incrementally as tasks are loaded, written, completed or deleted.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict[Any, Any]] = {}
+        self._projects: Dict[str, Set[str]] = {}
+        self._project_of: Dict[str, str] = {}
+        self._order: Dict[str, int] = {}
+        self._counter = 0
+        self._dates: Dict[str, List[Tuple[date, str]]] = {f: [] for f in _DATE_FIELDS}
+        self._buckets: Dict[str, Dict[Any, Set[str]]] = {f: {} for f in _BUCKET_FIELDS}
+        self._tags: Dict[str, Set[str]] = {}
+        # Open tasks with a repeatFlag, which can recur after their stored dates
+        self._repeating: Set[str] = set()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def has_project(self, project_id: str) -> bool:
+        return project_id in self._projects
+
+    def load_project(self, project_id: str, tasks: Iterable[Dict[Any, Any]]) -> None:
+        """
+        Replace everything indexed for a project with its freshly fetched task list.
+        """
+        with self._lock:
+            self.drop_project(project_id)
+            self._projects[project_id] = set()
+            for task in tasks:
+                self.upsert(task, project_id)
+
+    def drop_project(self, project_id: str) -> None:
+        with self._lock:
+            for task_id in list(self._projects.pop(project_id, ())):
+                self.remove(task_id)
+
+    def upsert(self, task: Dict[Any, Any], project_id: Optional[str] = None) -> None:
+        task_id = task.get("id")
+        if not task_id:
+            return
+        with self._lock:
+            order = self._order.get(task_id)
+            self.remove(task_id)
+            project_id = task.get("projectId") or project_id
+            if project_id not in self._projects:
+                # Only projects loaded in full are indexed, a partial one would hide tasks
+                return
+            self.tasks[task_id] = task
+            self._projects[project_id].add(task_id)
+            self._project_of[task_id] = project_id
+            if order is None:
+                self._counter += 1
+                order = self._counter
+            self._order[task_id] = order
+            for field in _DATE_FIELDS:
+                value = _task_date(task, field)
+                if value is not None:
+                    insort(self._dates[field], (value, task_id))
+            for field in _BUCKET_FIELDS:
+                if task.get(field) is not None:
+                    self._buckets[field].setdefault(task[field], set()).add(task_id)
+            for tag in task.get("tags") or []:
+                self._tags.setdefault(str(tag).lower(), set()).add(task_id)
+            if task.get("repeatFlag") and task.get("status", 0) == 0:
+                self._repeating.add(task_id)
+
+    def remove(self, task_id: str) -> None:
+        with self._lock:
+            task = self.tasks.pop(task_id, None)
+            if task is None:
+                return
+            self._order.pop(task_id, None)
+            project_id = self._project_of.pop(task_id, None)
+            if project_id in self._projects:
+                self._projects[project_id].discard(task_id)
+            for field in _DATE_FIELDS:
+                value = _task_date(task, field)
+                if value is None:
+                    continue
+                entries = self._dates[field]
+                pos = bisect_left(entries, (value, task_id))
+                if pos < len(entries) and entries[pos] == (value, task_id):
+                    del entries[pos]
+            for field in _BUCKET_FIELDS:
+                bucket = self._buckets[field].get(task.get(field))
+                if bucket is not None:
+                    bucket.discard(task_id)
+            for tag in task.get("tags") or []:
+                self._tags.get(str(tag).lower(), set()).discard(task_id)
+            self._repeating.discard(task_id)
+
+    # Candidate lookups: return the ids a clause can match, or None when no index applies.
+    def _date_range(self, field: str, node: Node) -> Optional[Tuple[int, int]]:
+        entries = self._dates[field]
+        if isinstance(node, Between):
+            return (
+                bisect_left(entries, (node.low.date,)),
+                bisect_right(entries, (node.high.date, _LAST_ID)),
+            )
+        if not isinstance(node, Comparison) or node.op == "!=":
+            return None
+        value = node.value.date
+        lo, hi = 0, len(entries)
+        if node.op in ("==", ">="):
+            lo = bisect_left(entries, (value,))
+        if node.op == ">":
+            lo = bisect_right(entries, (value, _LAST_ID))
+        if node.op in ("==", "<="):
+            hi = bisect_right(entries, (value, _LAST_ID))
+        if node.op == "<":
+            hi = bisect_left(entries, (value,))
+        return lo, hi
+
+    def _bucket_keys(self, field: str, node: Node) -> Optional[List[Any]]:
+        buckets = self._buckets[field]
+        if isinstance(node, Comparison) and node.value.number is not None:
+            cmp_fn = _OPERATORS[node.op]
+            number = node.value.number
+            return [
+                k for k in buckets if isinstance(k, (int, float)) and cmp_fn(k, number)
+            ]
+        if isinstance(node, InList):
+            wanted = {v.number for v in node.values if v.number is not None}
+            return [k for k in buckets if k in wanted]
+        return None
+
+    def _estimate(self, node: Node) -> Optional[int]:
+        field = getattr(node, "field", None)
+        if field in _DATE_FIELDS and isinstance(node, (Comparison, Between)):
+            span = self._date_range(field, node)
+            return None if span is None else max(span[1] - span[0], 0)
+        if field in _BUCKET_FIELDS:
+            keys = self._bucket_keys(field, node)
+            if keys is None:
+                return None
+            return sum(len(self._buckets[field][k]) for k in keys)
+        if field == "tags" and isinstance(node, Contains):
+            return len(self._tags.get(node.value.raw.lower(), ()))
+        return None
+
+    def _lookup(self, node: Node) -> Set[str]:
+        field = node.field  # type: ignore[attr-defined]
+        if field in _DATE_FIELDS:
+            lo, hi = self._date_range(field, node)  # type: ignore[misc]
+            return {task_id for _, task_id in self._dates[field][lo:hi]}
+        if field in _BUCKET_FIELDS:
+            ids: Set[str] = set()
+            for key in self._bucket_keys(field, node) or []:
+                ids |= self._buckets[field][key]
+            return ids
+        return set(self._tags.get(node.value.raw.lower(), ()))  # type: ignore[attr-defined]
+
+    def select(
+        self, compiled: CompiledFilter, project_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[Any, Any]]:
+        """
+        Return the indexed tasks of the given projects (all when None) matching the filter.
+        The most selective indexable clause produces the candidates, the whole filter then
+        runs on those candidates only.
+        """
+        with self._lock:
+            scope: Optional[Set[str]] = None
+            if project_ids is not None:
+                scope = set()
+                for project_id in project_ids:
+                    scope |= self._projects.get(project_id, set())
+
+            best: Optional[Node] = None
+            best_size = None
+            for clause in compiled.clauses:
+                size = self._estimate(clause)
+                if size is not None and (best_size is None or size < best_size):
+                    best, best_size = clause, size
+
+            if best is not None:
+                candidates = self._lookup(best)
+                if scope is not None:
+                    candidates &= scope
+            else:
+                candidates = scope if scope is not None else set(self.tasks)
+
+            ordered = sorted(candidates, key=self._order.__getitem__)
+            return compiled.apply(self.tasks[task_id] for task_id in ordered)
+
+    def dated_between(
+        self, low: date, high: date, project_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[Any, Any]]:
+        """
+        Return the indexed tasks of the given projects (all when None) with a startDate or
+        dueDate between `low` and `high` included, plus the open repeating tasks dated up to
+        `high`, whose next occurrences may fall in the range. Dates compare on their date
+        part, like the filters.
+        """
+        with self._lock:
+            ids: Set[str] = set()
+            for field in _DATE_FIELDS:
+                entries = self._dates[field]
+                lo = bisect_left(entries, (low,))
+                hi = bisect_right(entries, (high, _LAST_ID))
+                ids.update(task_id for _, task_id in entries[lo:hi])
+            for task_id in self._repeating:
+                task = self.tasks[task_id]
+                dates = [_task_date(task, field) for field in _DATE_FIELDS]
+                if any(d is not None and d <= high for d in dates):
+                    ids.add(task_id)
+            if project_ids is not None:
+                scope: Set[str] = set()
+                for project_id in project_ids:
+                    scope |= self._projects.get(project_id, set())
+                ids &= scope
+            ordered = sorted(ids, key=self._order.__getitem__)
+            return [self.tasks[task_id] for task_id in ordered]
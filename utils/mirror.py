@@ -0,0 +1,229 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.filter import (
+    Between,
+    Comparison,
+    CompiledFilter,
+    InList,
+    Node,
+    _parse_iso_date,
+    compile_filter,
+)
+
+# Task field -> (indexed column, kind of value stored in it)
+_COLUMNS = {
+    "projectId": ("project_id", "text"),
+    "dueDate": ("due_date", "date"),
+    "startDate": ("start_date", "date"),
+    "priority": ("priority", "priority"),
+    "status": ("status", "int"),
+    "modifiedTime": ("modified_time", "text"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    due_date TEXT,
+    start_date TEXT,
+    priority INTEGER,
+    status INTEGER,
+    modified_time TEXT,
+    etag TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks (project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_start_date ON tasks (start_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_modified_time ON tasks (modified_time);
+"""
+
+
+def _date_column(value: Any) -> Optional[str]:
+    # Stored as YYYY-MM-DD, the same granularity the filter compares dates at
+    try:
+        return _parse_iso_date(value).isoformat()
+    except Exception:
+        return None
+
+
+def _sql_value(value: Any, kind: str) -> Any:
+    """
+    The column value a filter literal compares to, None when SQL can not express it.
+    """
+    if kind == "date":
+        return value.date.isoformat() if value.date else None
+    if kind in ("priority", "int"):
+        return value.number
+    return value.raw
+
+
+def _sql_clause(node: Node) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Translate a compiled filter clause on an indexed column to SQL, or return None.
+    """
+    if getattr(node, "field", None) not in _COLUMNS:
+        return None
+    column, kind = _COLUMNS[node.field]  # type: ignore[attr-defined]
+    if isinstance(node, Comparison):
+        value = _sql_value(node.value, kind)
+        if value is None:
+            return None
+        return f"{column} {'=' if node.op == '==' else node.op} ?", [value]
+    if isinstance(node, Between):
+        low, high = _sql_value(node.low, kind), _sql_value(node.high, kind)
+        if low is None or high is None:
+            return None
+        return f"{column} BETWEEN ? AND ?", [low, high]
+    if isinstance(node, InList):
+        values = [_sql_value(v, kind) for v in node.values]
+        if any(v is None for v in values):
+            return None
+        return f"{column} IN ({', '.join('?' * len(values))})", values
+    return None
+
+
+def _task_row(task: Dict[Any, Any]) -> tuple:
+    return (
+        task["id"],
+        task.get("projectId"),
+        _date_column(task.get("dueDate")),
+        _date_column(task.get("startDate")),
+        task.get("priority"),
+        task.get("status"),
+        task.get("modifiedTime"),
+        task.get("etag"),
+        json.dumps(task, ensure_ascii=False),
+    )
+
+
+class TaskMirror:
+    """
+    A local SQLite copy of the projects and tasks returned by the API, with the
+    filterable task fields stored in indexed columns.
+    Sync routines only rewrite rows whose etag/modifiedTime (or content, for projects) changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def sync_projects(self, projects: List[Dict[Any, Any]]) -> int:
+        """
+        Mirror the project list, return the number of rows written or deleted.
+        """
+        incoming = {
+            p["id"]: json.dumps(p, ensure_ascii=False) for p in projects if p.get("id")
+        }
+        with self._lock, self._conn:
+            existing = dict(self._conn.execute("SELECT id, data FROM projects"))
+            changed = [(i, d) for i, d in incoming.items() if existing.get(i) != d]
+            removed = [(i,) for i in existing if i not in incoming]
+            self._conn.executemany(
+                "INSERT INTO projects (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                changed,
+            )
+            self._conn.executemany("DELETE FROM projects WHERE id = ?", removed)
+        return len(changed) + len(removed)
+
+    def sync_project(self, project_id: str, details: Dict[Any, Any]) -> int:
+        """
+        Mirror the tasks of one project (the result of get_project_details).
+        Return the number of rows written or deleted.
+        """
+        tasks = [t for t in details.get("tasks", []) if t.get("id")]
+        with self._lock, self._conn:
+            existing = {
+                row[0]: (row[1], row[2])
+                for row in self._conn.execute(
+                    "SELECT id, etag, modified_time FROM tasks WHERE project_id = ?",
+                    (project_id,),
+                )
+            }
+            changed = [
+                _task_row(t)
+                for t in tasks
+                if existing.get(t["id"]) != (t.get("etag"), t.get("modifiedTime"))
+            ]
+            incoming = {t["id"] for t in tasks}
+            removed = [(i,) for i in existing if i not in incoming]
+            self._upsert(changed)
+            self._conn.executemany("DELETE FROM tasks WHERE id = ?", removed)
+        if changed or removed:
+            logging.debug(
+                f"Mirror sync {project_id}: {len(changed)} written, {len(removed)} removed"
+            )
+        return len(changed) + len(removed)
+
+    def upsert_task(self, task: Dict[Any, Any]) -> None:
+        with self._lock, self._conn:
+            self._upsert([_task_row(task)])
+
+    def delete_task(self, task_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def delete_project(self, project_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            self._conn.execute("DELETE FROM tasks WHERE project_id = ?", (project_id,))
+
+    def _upsert(self, rows: List[tuple]) -> None:
+        self._conn.executemany(
+            "INSERT INTO tasks (id, project_id, due_date, start_date, priority, status, "
+            "modified_time, etag, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET project_id = excluded.project_id, "
+            "due_date = excluded.due_date, start_date = excluded.start_date, "
+            "priority = excluded.priority, status = excluded.status, "
+            "modified_time = excluded.modified_time, etag = excluded.etag, "
+            "data = excluded.data",
+            rows,
+        )
+
+    def query(
+        self, filter_fields: List[str], project_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[Any, Any]]:
+        """
+        Return the mirrored tasks matching all filter expressions.
+        Clauses on indexed fields run as SQL, any others are applied in Python
+        to the rows SQL returned.
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        remaining: List[Node] = []
+        if project_ids is not None:
+            project_ids = list(project_ids)
+            where.append(f"project_id IN ({', '.join('?' * len(project_ids))})")
+            params.extend(project_ids)
+        for clause in compile_filter(filter_fields).clauses:
+            sql = _sql_clause(clause)
+            if sql is None:
+                remaining.append(clause)
+                continue
+            where.append(sql[0])
+            params.extend(sql[1])
+
+        sql = "SELECT data FROM tasks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY rowid", params).fetchall()
+        tasks = [json.loads(row[0]) for row in rows]
+        return CompiledFilter(remaining).apply(tasks) if remaining else tasks
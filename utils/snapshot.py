@@ -0,0 +1,89 @@
+import base64
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# task id -> (etag, modifiedTime)
+Snapshot = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+
+def take_snapshot(tasks: Iterable[Dict[Any, Any]]) -> Snapshot:
+    return {
+        t["id"]: (t.get("etag"), t.get("modifiedTime")) for t in tasks if t.get("id")
+    }
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, List[str]]:
+    """
+    Ids of the tasks added, modified and gone (completed, deleted or moved) from old to new.
+    """
+    return {
+        "added": [i for i in new if i not in old],
+        "modified": [i for i in new if i in old and old[i] != new[i]],
+        "gone": [i for i in old if i not in new],
+    }
+
+
+class SnapshotStore:
+    """
+    The last few versions of each project's task snapshot, so a caller holding a cursor
+    of an earlier version can be told what changed since.
+    A version is recorded only when the snapshot differs from the latest one.
+    Cursors carry a per-process id, so a cursor from before a restart reads as expired.
+    """
+
+    def __init__(self, max_versions: int = 8):
+        self.max_versions = max_versions
+        self._store_id = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, OrderedDict[int, Snapshot]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, project_id: str, snapshot: Snapshot) -> int:
+        """
+        Keep the snapshot as the latest version of the project, return its version.
+        """
+        with self._lock:
+            versions = self._versions.setdefault(project_id, OrderedDict())
+            if versions:
+                latest, latest_snapshot = next(reversed(versions.items()))
+                if latest_snapshot == snapshot:
+                    return latest
+                version = latest + 1
+            else:
+                version = 1
+            versions[version] = snapshot
+            while len(versions) > self.max_versions:
+                versions.popitem(last=False)
+            return version
+
+    def get(self, project_id: str, version: int) -> Optional[Snapshot]:
+        with self._lock:
+            return self._versions.get(project_id, {}).get(version)
+
+    def drop_project(self, project_id: str) -> None:
+        with self._lock:
+            self._versions.pop(project_id, None)
+
+    def encode_cursor(self, project_id: str, version: int) -> str:
+        raw = json.dumps(
+            {"s": self._store_id, "p": project_id, "v": version}, separators=(",", ":")
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str, project_id: str) -> Optional[int]:
+        """
+        The version a cursor points to, None when it expired (older versions were dropped
+        or the server restarted). Raise ValueError for a malformed cursor or another project's.
+        """
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            store_id, cursor_project, version = data["s"], data["p"], int(data["v"])
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        if cursor_project != project_id:
+            raise ValueError(f"Cursor belongs to project {cursor_project}")
+        if store_id != self._store_id or self.get(project_id, version) is None:
+            return None
+        return version
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_fd(fd: int, blocking: bool) -> bool:
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                # LK_LOCK gives up after ~10s, keep waiting
+                if not blocking:
+                    return False
+
+    def _unlock_fd(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd: int, blocking: bool) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a sidecar file, held across threads and processes.
+    Usable with `with` (blocking) and `async with` (waits in a worker thread).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if not _lock_fd(fd, blocking):
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        try:
+            _unlock_fd(fd)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    async def __aenter__(self):
+        await asyncio.to_thread(self.acquire)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class StateStore:
+    """
+    One JSON object persisted in a file shared by every server process of a checkout
+    (.token, .data). Writes are atomic (temp file + rename), so a reader never sees a
+    truncated file, and reads are served from memory until the file's mtime or size changes.
+    Read-modify-write and one-off discovery work (OAuth, the inbox probe) run under an
+    advisory file lock, and other processes pick up the result from the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_version: Optional[Tuple[int, int, int]] = None
+        self._locks: Dict[str, FileLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def version(self) -> Optional[Tuple[int, int, int]]:
+        """
+        (inode, mtime_ns, size) of the file, None when it does not exist.
+        Every write renames a new file into place, so the inode alone tells writes apart
+        even within the filesystem's mtime resolution.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def read(self) -> Dict[str, Any]:
+        """
+        The stored object (a copy), {} when the file is missing or unreadable.
+        """
+        version = self.version()
+        if version is None:
+            return {}
+        if version != self._cached_version:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                logging.error(f"Failed to load state from {self.path}")
+                data = {}
+            self._cached, self._cached_version = data, version
+        return dict(self._cached or {})
+
+    def write(self, data: Dict[str, Any]) -> None:
+        """
+        Replace the stored object atomically: readers see the old or the new file.
+        """
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def update(self, fn: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        Read-modify-write under the store lock, so concurrent updates from other
+        processes are not lost. `fn` changes the object in place.
+        """
+        with self.lock():
+            data = self.read()
+            fn(data)
+            self.write(data)
+        return data
+
+    def lock(self, name: str = "write") -> FileLock:
+        """
+        The named lock of this store, e.g. "write" for updates, "auth" for the OAuth flow.
+        """
+        with self._locks_guard:
+            if name not in self._locks:
+                self._locks[name] = FileLock(f"{self.path}.{name}.lock")
+            return self._locks[name]
+
+    def wait_for_change(
+        self,
+        version: Optional[Tuple[int, int, int]],
+        timeout: Optional[float] = None,
+        interval: float = 0.2,
+    ) -> bool:
+        """
+        Block until the file's version differs from `version`, return False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.version() == version:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+
+_stores: Dict[str, StateStore] = {}
+_stores_guard = threading.Lock()
+
+
+def open_store(path: str) -> StateStore:
+    """
+    The process-wide StateStore of a file, so its cache and locks are shared.
+    """
+    path = os.path.abspath(path)
+    with _stores_guard:
+        if path not in _stores:
+            _stores[path] = StateStore(path)
+        return _stores[path]
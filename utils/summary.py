@@ -0,0 +1,100 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional
+
+from utils.filter import PRIORITY_NAMES, _parse_iso_date
+
+# Order of the due buckets in the output
+DUE_BUCKETS = ("overdue", "today", "tomorrow", "next_7_days", "later", "no_due")
+
+
+class TaskSummary:
+    """
+    Counts over a set of tasks, built in one pass and mergeable across projects:
+    status, and for open tasks the due bucket, priority and tags, the earliest due date
+    and the number of open checklist items (subtasks).
+    Due dates compare on their date part, like the filter expressions.
+    """
+
+    def __init__(self, today: Optional[date] = None):
+        self.today = today or datetime.now().date()
+        self.total = 0
+        self.completed = 0
+        self.due: Counter = Counter()
+        self.priority: Counter = Counter()
+        self.tags: Counter = Counter()
+        self.open_subtasks = 0
+        self.earliest_due: Optional[date] = None
+
+    def add(self, task: Dict[Any, Any]) -> None:
+        self.total += 1
+        if task.get("status", 0) != 0:
+            self.completed += 1
+            return
+        try:
+            due = _parse_iso_date(task["dueDate"])
+        except Exception:
+            due = None
+        if due is None:
+            self.due["no_due"] += 1
+        else:
+            days = (due - self.today).days
+            if days < 0:
+                self.due["overdue"] += 1
+            elif days == 0:
+                self.due["today"] += 1
+            elif days == 1:
+                self.due["tomorrow"] += 1
+            elif days <= 7:
+                self.due["next_7_days"] += 1
+            else:
+                self.due["later"] += 1
+            if self.earliest_due is None or due < self.earliest_due:
+                self.earliest_due = due
+        self.priority[PRIORITY_NAMES.get(task.get("priority"), "none")] += 1
+        for tag in task.get("tags") or []:
+            self.tags[str(tag).lower()] += 1
+        for item in task.get("items") or []:
+            if item.get("status", 0) == 0:
+                self.open_subtasks += 1
+
+    def update(self, tasks: Iterable[Dict[Any, Any]]) -> "TaskSummary":
+        for task in tasks:
+            self.add(task)
+        return self
+
+    def merge(self, other: "TaskSummary") -> None:
+        self.total += other.total
+        self.completed += other.completed
+        self.due.update(other.due)
+        self.priority.update(other.priority)
+        self.tags.update(other.tags)
+        self.open_subtasks += other.open_subtasks
+        if other.earliest_due is not None and (
+            self.earliest_due is None or other.earliest_due < self.earliest_due
+        ):
+            self.earliest_due = other.earliest_due
+
+    @property
+    def open(self) -> int:
+        return self.total - self.completed
+
+    def to_dict(self, top_tags: int = 10) -> Dict[str, Any]:
+        """
+        The summary as plain data. Only the `top_tags` most used tags are listed, so the
+        size does not grow with the number of tasks.
+        """
+        return {
+            "open": self.open,
+            "completed": self.completed,
+            "due": {bucket: self.due[bucket] for bucket in DUE_BUCKETS},
+            "priority": {
+                name: self.priority[name] for name in ("high", "medium", "low", "none")
+            },
+            "tags": dict(self.tags.most_common(top_tags)),
+            "other_tags": max(len(self.tags) - top_tags, 0),
+            "earliest_due": self.earliest_due.isoformat()
+            if self.earliest_due
+            else None,
+            "open_subtasks": self.open_subtasks,
+        }
@@ -1,44 +1,255 @@
+import functools
+import logging
 import os
-import json
 import time
-import logging
+import threading
+from typing import Any, Optional
+
+from utils.state_store import StateStore, open_store
 
 TOKEN_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".token")
+# Re-authorize in the background once the token expires within this many seconds
+REFRESH_MARGIN = float(os.getenv("TICKTICK_TOKEN_REFRESH_MARGIN") or 5 * 60)
 
 
-def save_token(access_token: str, expires_in: int) -> None:
+class AuthorizationPending(Exception):
     """
-    Save the access_token and expires_in(the expiration date) to the .token file in the project root.
+    Raised while the OAuth flow has not produced a valid token yet.
     """
-    data = {
-        "access_token": access_token,
-        "expires_in": time.time() + expires_in,
-    }
-    with open(TOKEN_FILE, "w") as f:
-        json.dump(data, f)
 
 
-def load_token() -> tuple[str | None, int]:
+def save_token(access_token: str, expires_in: int, path: Optional[str] = None) -> None:
     """
-    Load the access_token and expires_in from the .token file.
+    Save the access_token and expires_in(the expiration date) to the .token file in the project root,
+    or to `path` (another account's token file).
+    The file is replaced atomically, other server processes pick the new token up from it.
+    """
+    open_store(path or TOKEN_FILE).write(
+        {
+            "access_token": access_token,
+            "expires_in": time.time() + expires_in,
+        }
+    )
+
+
+def load_token(path: Optional[str] = None) -> tuple[str | None, int]:
+    """
+    Load the access_token and expires_in from the .token file (or `path`).
     Returns None if the file does not exist or is invalid.
     """
-    if not os.path.exists(TOKEN_FILE):
-        return None, 0
-    try:
-        with open(TOKEN_FILE, "r") as f:
-            data = json.load(f)
-        if "access_token" in data and "expires_in" in data:
-            return data["access_token"], data["expires_in"]
-        return None, 0
-    except Exception:
-        logging.error(f"Failed to load token from {TOKEN_FILE}")
-        return None, 0
+    data = open_store(path or TOKEN_FILE).read()
+    if "access_token" in data and "expires_in" in data:
+        return data["access_token"], data["expires_in"]
+    return None, 0
 
 
 def is_token_valid() -> bool:
     """
     Returns True if the token exists and is not expired, otherwise False.
     """
-    token, expires_in = load_token()
-    return token is not None and expires_in > time.time()
+    return token_manager.is_valid()
+
+
+# Held while an OAuth flow of any account runs in this process
+_oauth_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def can_open_browser() -> bool:
+    """
+    True when the OAuth flow can open a browser for the user: not in the Docker setup
+    (where the sign-in URL is only logged) and with a browser to run.
+    """
+    if os.getenv("TICKTICK_DOCKER_SERVER") in ("1", "true", "True", "TRUE"):
+        return False
+    # Imported here: only needed when the token has to be authorized
+    import webbrowser
+
+    try:
+        webbrowser.get()
+    except webbrowser.Error:
+        return False
+    return True
+
+
+class TokenManager:
+    """
+    Keeps the access token in memory. The token file is stat'ed at most once per
+    `check_interval` seconds and only re-read when it changed, so reading the
+    token on every request costs no file I/O.
+    When the token was rejected, or is about to expire and a browser can be opened,
+    the OAuth flow is started in a background thread; the new token is picked up once
+    it is saved, by this process or by another one sharing the token file.
+    Without `reauthorize` no flow is started, it is only logged: the account is
+    authorized by the operator (see utils.accounts).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        refresh_margin: float = REFRESH_MARGIN,
+        check_interval: float = 1.0,
+        account: Optional[str] = None,
+        reauthorize: bool = True,
+    ):
+        self._path = path
+        # Named in the sign-in URL, None for the default account
+        self.account = account
+        self.reauthorize = reauthorize
+        self.refresh_margin = refresh_margin
+        self.check_interval = check_interval
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._version: Optional[tuple] = None
+        self._checked_at = float("-inf")
+        self._rejected: Optional[str] = None
+        # The token whose coming expiry was logged
+        self._expiry_logged: Optional[str] = None
+        self._auth_thread: Optional[threading.Thread] = None
+        self._auth_url = ""
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> StateStore:
+        # Resolved on use, so a TOKEN_FILE override applies to the default manager too
+        return open_store(self._path or TOKEN_FILE)
+
+    def reload(self, force: bool = False) -> None:
+        """
+        Re-read the token file if it changed since the last read.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            store = self.store
+            version = store.version()
+            if version == self._version and not force:
+                return
+            self._version = version
+            data = store.read()
+            self._token = data.get("access_token")
+            self._expires_at = data.get("expires_in", 0.0) if self._token else 0.0
+
+    @property
+    def token(self) -> Optional[str]:
+        """
+        The current token. Starts re-authorization when it is about to expire.
+        """
+        self.reload()
+        if self._token is not None and self.expires_in() < self.refresh_margin:
+            self._refresh_ahead()
+        return self._token
+
+    def _refresh_ahead(self) -> None:
+        """
+        Sign in again before the token expires, when the user can be shown a browser.
+        Otherwise only log it: nobody would see the sign-in page, and the flow starts
+        anyway once the token expires or is rejected.
+        """
+        if self.reauthorize and can_open_browser():
+            self.start_reauth()
+        elif self._expiry_logged != self._token:
+            self._expiry_logged = self._token
+            account = f" of account {self.account!r}" if self.account else ""
+            logging.warning(
+                f"The access token{account} expires in {max(self.expires_in(), 0):.0f}s, "
+                "authorize again to replace it"
+            )
+
+    def expires_in(self) -> float:
+        return self._expires_at - time.time()
+
+    def is_valid(self) -> bool:
+        self.reload()
+        return (
+            self._token is not None
+            and self._token != self._rejected
+            and self.expires_in() > 0
+        )
+
+    def token_rejected(self, token: Optional[str]) -> bool:
+        """
+        The API answered 401 to a request sent with `token`.
+        Return True when another token is available now, so the request can be retried
+        once; otherwise start re-authorization and return False.
+        """
+        self.reload(force=True)
+        if self._token is not None and self._token != token:
+            return True
+        self._rejected = token
+        if self.reauthorize:
+            self.start_reauth()
+        else:
+            logging.warning(
+                f"The access token of account {self.account!r} was rejected, "
+                "authorize it again"
+            )
+        return False
+
+    def new_auth(self) -> Any:
+        """
+        An OAuth flow saving its token to this manager's file.
+        """
+        # Imported here: the OAuth callback server is only needed to authorize
+        from utils.auth import Auth
+
+        return Auth(self._path, self.account)
+
+    @property
+    def reauth_pending(self) -> bool:
+        return self._auth_thread is not None and self._auth_thread.is_alive()
+
+    def start_reauth(self) -> str:
+        """
+        Start the OAuth flow in a background thread unless it is already running.
+        Return the URL the user has to visit.
+        """
+        with self._lock:
+            if not self.reauth_pending:
+                auth = self.new_auth()
+                self._auth_url = auth.url
+                self._auth_thread = threading.Thread(
+                    target=self._reauthorize,
+                    args=(auth, self.store.version()),
+                    name="Auth",
+                    daemon=True,
+                )
+                self._auth_thread.start()
+            return self._auth_url
+
+    def _fresh(self) -> bool:
+        self.reload(force=True)
+        return (
+            self._token is not None
+            and self._token != self._rejected
+            and self.expires_in() > self.refresh_margin
+        )
+
+    def _reauthorize(self, auth: Any, seen_version: Optional[tuple]) -> None:
+        """
+        Run the OAuth flow in one process only: whoever holds the store's "auth" lock runs
+        it, the other processes wait for the token file to change.
+        """
+        store = self.store
+        lock = store.lock("auth")
+        while True:
+            if lock.acquire(blocking=False):
+                try:
+                    # Another process may have saved a new token since it was requested
+                    if store.version() == seen_version or not self._fresh():
+                        # The callback port serves one sign-in at a time
+                        with _oauth_lock:
+                            auth.run(force=True)
+                finally:
+                    lock.release()
+                self.reload(force=True)
+                return
+            if store.wait_for_change(seen_version, timeout=5.0):
+                if self._fresh():
+                    return
+                seen_version = store.version()
+
+
+token_manager = TokenManager()